@@ -11,12 +11,117 @@ import './App.css'
 
 const API_BASE_URL = 'https://nghki1c88963.manus.space/api'
 
+// 提交后台任务并通过SSE等待结果，SSE不可用时退回轮询
+const runJob = async (path, body, onProgress) => {
+  const submitResponse = await fetch(`${API_BASE_URL}/jobs/${path}`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify(body)
+  })
+  
+  const submitted = await submitResponse.json()
+  if (!submitResponse.ok) {
+    throw new Error(submitted.error || '提交任务失败')
+  }
+  
+  const finish = (job, resolve, reject) => {
+    if (job.status === 'done') {
+      resolve(job.result)
+    } else {
+      reject(new Error(job.error || '任务执行失败'))
+    }
+  }
+  
+  const poll = (resolve, reject) => {
+    const timer = setInterval(async () => {
+      try {
+        const response = await fetch(`${API_BASE_URL}/jobs/${submitted.job_id}`)
+        const job = await response.json()
+        if (!response.ok) {
+          throw new Error(job.error || '查询任务失败')
+        }
+        onProgress?.(job.progress)
+        if (job.status === 'done' || job.status === 'failed') {
+          clearInterval(timer)
+          finish(job, resolve, reject)
+        }
+      } catch (error) {
+        clearInterval(timer)
+        reject(error)
+      }
+    }, 1000)
+  }
+  
+  return new Promise((resolve, reject) => {
+    if (typeof EventSource === 'undefined') {
+      poll(resolve, reject)
+      return
+    }
+    const events = new EventSource(`${API_BASE_URL}/jobs/${submitted.job_id}/events`)
+    events.addEventListener('progress', (event) => {
+      onProgress?.(JSON.parse(event.data).progress)
+    })
+    events.addEventListener('result', (event) => {
+      events.close()
+      finish(JSON.parse(event.data), resolve, reject)
+    })
+    events.onerror = () => {
+      events.close()
+      poll(resolve, reject)
+    }
+  })
+}
+
+// 流式生成检索策略：search_strategy字段完整后立即回调，不必等待完整结果
+const streamStrategy = async (prompt, onStrategy) => {
+  const response = await fetch(`${API_BASE_URL}/stream_ai_strategy`, {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({ prompt })
+  })
+  
+  if (!response.ok || !response.body) {
+    throw new Error('流式生成不可用')
+  }
+  
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+    let boundary
+    while ((boundary = buffer.indexOf('\n\n')) >= 0) {
+      const block = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+      const event = block.match(/^event: (.*)$/m)?.[1]
+      const data = JSON.parse(block.match(/^data: (.*)$/m)?.[1] || 'null')
+      if (event === 'search_strategy') {
+        onStrategy(data)
+      } else if (event === 'result') {
+        return data
+      } else if (event === 'error') {
+        throw new Error(data.error || 'AI策略生成失败')
+      }
+    }
+  }
+  throw new Error('AI策略生成中断')
+}
+
 function App() {
   const [keyword, setKeyword] = useState('')
   const [isGenerating, setIsGenerating] = useState(false)
   const [isSearching, setIsSearching] = useState(false)
   const [aiResponse, setAiResponse] = useState(null)
   const [pubmedResults, setPubmedResults] = useState(null)
+  const [searchProgress, setSearchProgress] = useState(null)
+  const [preview, setPreview] = useState(null)
+  const [isPreviewing, setIsPreviewing] = useState(false)
   const [error, setError] = useState(null)
 
   const handleGenerateStrategy = async () => {
@@ -41,20 +146,16 @@ function App() {
       
       const promptData = await promptResponse.json()
       
-      // 第二步：调用AI生成策略
-      const aiResponse = await fetch(`${API_BASE_URL}/get_ai_strategy`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ prompt: promptData.prompt })
-      })
-      
-      if (!aiResponse.ok) {
-        throw new Error('AI策略生成失败')
+      // 第二步：流式生成AI策略，检索策略先行显示；流式接口不可用时改用后台任务
+      let aiData
+      try {
+        aiData = await streamStrategy(promptData.prompt, (data) => {
+          setAiResponse({ search_strategy: data.search_strategy })
+        })
+      } catch (streamError) {
+        console.warn('流式生成失败，改用后台任务:', streamError)
+        aiData = await runJob('strategy', { prompt: promptData.prompt })
       }
-      
-      const aiData = await aiResponse.json()
       setAiResponse(aiData.ai_response)
       
     } catch (error) {
@@ -69,48 +170,77 @@ function App() {
     if (!aiResponse?.search_strategy) return
     
     setIsSearching(true)
+    setSearchProgress(null)
+    setError(null)
+    
+    try {
+      // CSV改由/export_pubmed_search流式下载，这里只需要检索数量
+      const data = await runJob(
+        'search',
+        { search_strategy: aiResponse.search_strategy, include_csv: false },
+        setSearchProgress
+      )
+      setPubmedResults(data)
+      
+    } catch (error) {
+      console.error('PubMed检索失败:', error)
+      setError(error.message || 'PubMed检索时发生错误')
+    } finally {
+      setIsSearching(false)
+    }
+  }
+
+  const handlePreview = async () => {
+    if (!aiResponse?.search_strategy) return
+    
+    setIsPreviewing(true)
     setError(null)
     
     try {
-      const response = await fetch(`${API_BASE_URL}/execute_pubmed_search`, {
+      // 只获取命中数，不获取文献记录
+      const response = await fetch(`${API_BASE_URL}/preview_pubmed_search`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
         },
         body: JSON.stringify({ search_strategy: aiResponse.search_strategy })
       })
-      
+      const data = await response.json()
       if (!response.ok) {
-        throw new Error('PubMed检索失败')
+        throw new Error(data.error || '命中数预览失败')
       }
-      
-      const data = await response.json()
-      setPubmedResults(data)
+      setPreview(data)
       
     } catch (error) {
-      console.error('PubMed检索失败:', error)
-      setError(error.message || 'PubMed检索时发生错误')
+      console.error('命中数预览失败:', error)
+      setError(error.message || '命中数预览时发生错误')
     } finally {
-      setIsSearching(false)
+      setIsPreviewing(false)
     }
   }
 
   const downloadCSV = () => {
-    if (!pubmedResults?.pubmed_results_csv) return
+    if (!pubmedResults?.search_strategy_used) return
     
     try {
-      // 解码base64 CSV数据
-      const csvData = atob(pubmedResults.pubmed_results_csv)
-      const blob = new Blob([csvData], { type: 'text/csv;charset=utf-8;' })
+      // 由后端流式导出CSV，浏览器边接收边写入文件，无需在内存中解码整个结果集；
+      // 导出数量与本次检索获取的记录数一致，而不是全部命中
+      const retmax = pubmedResults.search_log?.retmax ?? pubmedResults.retrieved_count
+      const params = new URLSearchParams({
+        search_strategy: pubmedResults.search_strategy_used,
+        format: 'csv',
+        gzip: 'true'
+      })
+      if (retmax) {
+        params.set('retmax', String(retmax))
+      }
       const link = document.createElement('a')
-      const url = URL.createObjectURL(blob)
-      link.setAttribute('href', url)
+      link.setAttribute('href', `${API_BASE_URL}/export_pubmed_search?${params.toString()}`)
       link.setAttribute('download', `pubmed_results_${keyword}_${new Date().toISOString().split('T')[0]}.csv`)
       link.style.visibility = 'hidden'
       document.body.appendChild(link)
       link.click()
       document.body.removeChild(link)
-      URL.revokeObjectURL(url)
     } catch (error) {
       console.error('下载CSV文件失败:', error)
       setError('下载CSV文件时发生错误')
@@ -203,6 +333,38 @@ function App() {
                   readOnly
                   className="min-h-[100px] font-mono text-sm"
                 />
+                <div className="flex items-center gap-4 mt-2">
+                  <Button variant="outline" size="sm" onClick={handlePreview} disabled={isPreviewing}>
+                    {isPreviewing ? <Loader2 className="h-4 w-4 mr-2 animate-spin" /> : <Search className="h-4 w-4 mr-2" />}
+                    预览命中数
+                  </Button>
+                  {preview?.search_strategy === aiResponse.search_strategy && (
+                    <span className="text-sm text-gray-600">命中 {preview.total_count} 篇（{preview.elapsed_seconds}秒）</span>
+                  )}
+                </div>
+                {preview?.search_strategy === aiResponse.search_strategy && preview.blocks.length > 1 && (
+                  <table className="w-full mt-3 text-sm">
+                    <thead>
+                      <tr className="text-left text-gray-500">
+                        <th className="py-1">检索块</th>
+                        <th className="py-1 text-right">单独命中</th>
+                        <th className="py-1 text-right">累加后命中</th>
+                      </tr>
+                    </thead>
+                    <tbody>
+                      {preview.blocks.map((block, index) => (
+                        <tr key={index} className="border-t">
+                          <td className="py-1 font-mono text-xs break-all">{block.clause}</td>
+                          <td className="py-1 text-right">{block.count ?? '-'}</td>
+                          <td className="py-1 text-right">
+                            {block.cumulative_count ?? '-'}
+                            {block.retained_ratio !== undefined && ` (${Math.round(block.retained_ratio * 100)}%)`}
+                          </td>
+                        </tr>
+                      ))}
+                    </tbody>
+                  </table>
+                )}
               </div>
 
               {/* Keywords Analysis */}
@@ -211,19 +373,19 @@ function App() {
                 <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-4">
                   <div className="space-y-2">
                     <Badge variant="outline">疾病/病症</Badge>
-                    <p className="text-sm text-gray-600">{aiResponse.keywords_analysis.disease}</p>
+                    <p className="text-sm text-gray-600">{aiResponse.keywords_analysis?.disease}</p>
                   </div>
                   <div className="space-y-2">
                     <Badge variant="outline">干预措施</Badge>
-                    <p className="text-sm text-gray-600">{aiResponse.keywords_analysis.intervention}</p>
+                    <p className="text-sm text-gray-600">{aiResponse.keywords_analysis?.intervention}</p>
                   </div>
                   <div className="space-y-2">
                     <Badge variant="outline">目标人群</Badge>
-                    <p className="text-sm text-gray-600">{aiResponse.keywords_analysis.population}</p>
+                    <p className="text-sm text-gray-600">{aiResponse.keywords_analysis?.population}</p>
                   </div>
                   <div className="space-y-2">
                     <Badge variant="outline">研究类型</Badge>
-                    <p className="text-sm text-gray-600">{aiResponse.keywords_analysis.study_type}</p>
+                    <p className="text-sm text-gray-600">{aiResponse.keywords_analysis?.study_type}</p>
                   </div>
                 </div>
               </div>
@@ -234,7 +396,7 @@ function App() {
               <div>
                 <h3 className="font-semibold mb-2">相关MeSH术语</h3>
                 <div className="flex flex-wrap gap-2">
-                  {aiResponse.mesh_terms.map((term, index) => (
+                  {(aiResponse.mesh_terms || []).map((term, index) => (
                     <Badge key={index} variant="secondary">{term}</Badge>
                   ))}
                 </div>
@@ -254,7 +416,7 @@ function App() {
 
               <div className="flex items-center justify-between pt-4">
                 <div className="text-sm text-gray-500">
-                  预估结果数量: {aiResponse.estimated_results}
+                  预估结果数量: {aiResponse.estimated_results ?? '生成中...'}
                 </div>
                 <Button 
                   onClick={handlePubmedSearch}
@@ -264,7 +426,7 @@ function App() {
                   {isSearching ? (
                     <>
                       <Loader2 className="h-4 w-4 mr-2 animate-spin" />
-                      检索中...
+                      {searchProgress?.total ? `检索中 ${searchProgress.fetched}/${searchProgress.total}` : '检索中...'}
                     </>
                   ) : (
                     <>
@@ -297,7 +459,7 @@ function App() {
                   <div>
                     <p className="font-medium text-green-800">检索完成</p>
                     <p className="text-sm text-green-600">
-                      共检索到 {pubmedResults.total_count} 篇文献，已生成CSV文件
+                      共检索到 {pubmedResults.total_count} 篇文献，CSV文件包含已获取的 {pubmedResults.retrieved_count} 篇
                     </p>
                   </div>
                 </div>
@@ -0,0 +1,92 @@
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+# 每次EFetch请求的PMID数量
+EFETCH_BATCH_SIZE = 200
+
+# 同时进行的EFetch请求数量，实际频率仍受共享客户端的令牌桶限制
+EFETCH_CONCURRENCY = 3
+
+
+def element_text(element):
+    """合并元素内全部文本（包括<i>、<sup>等内联标记）"""
+    return " ".join("".join(element.itertext()).split())
+
+
+def parse_pubmed_article(article):
+    """从单个PubmedArticle元素提取PMID、摘要、MeSH主题词和出版类型"""
+    citation = article.find("MedlineCitation")
+    if citation is None:
+        return None, None
+    pmid = citation.findtext("PMID", "").strip()
+
+    # 结构化摘要按段落标签拼接，如 "BACKGROUND: ... METHODS: ..."
+    sections = [
+        {"label": abstract_text.get("Label", ""), "text": element_text(abstract_text)}
+        for abstract_text in citation.iterfind("Article/Abstract/AbstractText")
+    ]
+
+    mesh_terms = []
+    for heading in citation.iterfind("MeshHeadingList/MeshHeading"):
+        descriptor = heading.find("DescriptorName")
+        if descriptor is None:
+            continue
+        term = element_text(descriptor)
+        if descriptor.get("MajorTopicYN") == "Y":
+            term += "*"
+        qualifiers = [element_text(q) for q in heading.iterfind("QualifierName")]
+        mesh_terms.append("/".join([term] + qualifiers))
+
+    publication_types = [element_text(pt) for pt in citation.iterfind("Article/PublicationTypeList/PublicationType")]
+
+    return pmid, {
+        "abstract": " ".join(f"{s['label']}: {s['text']}" if s["label"] else s["text"] for s in sections),
+        "abstract_sections": sections,
+        "mesh_terms": mesh_terms,
+        "publication_types": publication_types,
+    }
+
+
+def iter_efetch_articles(source):
+    """增量解析EFetch XML，逐篇产出(pmid, 信息)，解析后立即清理元素以保持内存平稳"""
+    context = ET.iterparse(source, events=("start", "end"))
+    root = None
+    for event, element in context:
+        if root is None and event == "start":
+            root = element
+        if event == "end" and element.tag == "PubmedArticle":
+            pmid, info = parse_pubmed_article(element)
+            element.clear()
+            # 已处理的子元素仍挂在根节点上，需要一并移除
+            root.clear()
+            if pmid:
+                yield pmid, info
+
+
+def fetch_abstract_batch(client, base_url, pmids, tool_params):
+    """对一批PMID调用EFetch并解析，返回{pmid: 信息}"""
+    fetch_params = {
+        "db": "pubmed",
+        "id": ",".join(pmids),
+        "rettype": "abstract",
+        "retmode": "xml",
+        **tool_params
+    }
+    response = client.post(f"{base_url}efetch.fcgi", data=fetch_params, timeout=60, stream=True)
+    try:
+        response.raw.decode_content = True
+        return dict(iter_efetch_articles(response.raw))
+    finally:
+        response.close()
+
+
+def fetch_abstracts(client, base_url, pmids, tool_params=None, batch_size=EFETCH_BATCH_SIZE, concurrency=EFETCH_CONCURRENCY):
+    """分批并发获取摘要、MeSH主题词与出版类型，返回{pmid: 信息}"""
+    batches = [pmids[start:start + batch_size] for start in range(0, len(pmids), batch_size)]
+    found = {}
+    if not batches:
+        return found
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(batches)), thread_name_prefix="efetch") as executor:
+        for batch_result in executor.map(lambda batch: fetch_abstract_batch(client, base_url, batch, tool_params or {}), batches):
+            found.update(batch_result)
+    return found
@@ -0,0 +1,135 @@
+import time
+
+from sqlalchemy import Column, Float, MetaData, String, Table, Text, case, func, inspect, select
+from sqlalchemy.dialects.sqlite import insert
+
+from records import Record
+
+metadata = MetaData()
+
+articles_table = Table(
+    "articles",
+    metadata,
+    Column("pmid", String(16), primary_key=True),
+    Column("title", Text, nullable=False, default=""),
+    Column("authors", Text, nullable=False, default=""),
+    Column("journal", Text, nullable=False, default=""),
+    Column("publication_date", String(64), nullable=False, default=""),
+    Column("doi", String(255), nullable=False, default=""),
+    Column("abstract", Text, nullable=False, default=""),
+    Column("study_type", String(64), nullable=False, default=""),
+    # EFetch补充的字段，NULL表示尚未补充
+    Column("mesh_terms", Text),
+    Column("publication_types", Text),
+    Column("fetched_at", Float, nullable=False, index=True),
+)
+
+# 结果字段与数据表列的对应关系（与导出字段顺序一致），PMID单独处理，URL由Record根据PMID生成
+RECORD_COLUMNS = {
+    "Title": "title",
+    "Authors": "authors",
+    "Journal": "journal",
+    "Publication_Date": "publication_date",
+    "DOI": "doi",
+    "Abstract": "abstract",
+    "Study_Type": "study_type",
+}
+
+# EFetch补充的字段，记录中不存在时写入NULL，不覆盖已保存的值
+ENRICHED_COLUMNS = {
+    "MeSH_Terms": "mesh_terms",
+    "Publication_Types": "publication_types",
+}
+
+# SQLite单条语句的绑定参数数量有限，分批查询
+LOOKUP_CHUNK_SIZE = 500
+
+
+def row_to_record(row):
+    fields = {field: getattr(row, column) for field, column in RECORD_COLUMNS.items()}
+    fields.update((field, getattr(row, column)) for field, column in ENRICHED_COLUMNS.items())
+    return Record(row.pmid, **fields)
+
+
+def record_to_row(record, fetched_at):
+    row = {"pmid": record["PMID"], "fetched_at": fetched_at}
+    for field, column in RECORD_COLUMNS.items():
+        row[column] = record.get(field) or ""
+    for field, column in ENRICHED_COLUMNS.items():
+        row[column] = record.get(field)
+    return row
+
+
+def add_missing_columns(engine, table):
+    """为旧版本创建的表补充新增的可空列，create_all不会修改已存在的表"""
+    existing = {column["name"] for column in inspect(engine).get_columns(table.name)}
+    missing = [column for column in table.columns if column.name not in existing]
+    if not missing:
+        return
+    with engine.begin() as conn:
+        for column in missing:
+            conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(engine.dialect)}")
+
+
+class ArticleStore:
+    """按PMID持久化已解析的文献记录，重叠的检索只需获取缺失或过期的记录
+
+    通过init_app使用应用已配置的SQLAlchemy数据库；未初始化时所有查询均视为未命中。
+    """
+
+    def __init__(self, max_age=30 * 24 * 3600):
+        self.max_age = max_age
+        self.engine = None
+
+    @property
+    def enabled(self):
+        return self.engine is not None
+
+    def init_app(self, app):
+        """创建articles表，需在db.init_app(app)之后调用"""
+        self.max_age = app.config.get("ARTICLE_STORE_MAX_AGE", self.max_age)
+        if not app.config.get("ARTICLE_STORE_ENABLED", True) or "sqlalchemy" not in app.extensions:
+            return
+        with app.app_context():
+            self.engine = app.extensions["sqlalchemy"].engine
+        metadata.create_all(self.engine)
+        add_missing_columns(self.engine, articles_table)
+
+    def get_many(self, pmids):
+        """返回{pmid: 结果字典}，只包含未过期的记录"""
+        if self.engine is None or not pmids:
+            return {}
+        fresh_after = time.time() - self.max_age
+        found = {}
+        with self.engine.connect() as conn:
+            for start in range(0, len(pmids), LOOKUP_CHUNK_SIZE):
+                chunk = pmids[start:start + LOOKUP_CHUNK_SIZE]
+                rows = conn.execute(
+                    select(articles_table)
+                    .where(articles_table.c.pmid.in_(chunk))
+                    .where(articles_table.c.fetched_at > fresh_after)
+                )
+                for row in rows:
+                    found[row.pmid] = row_to_record(row)
+        return found
+
+    def upsert_many(self, records):
+        """批量写入记录，已存在的PMID更新字段；已保存的摘要与MeSH主题词等补充字段不会被空值覆盖"""
+        if self.engine is None or not records:
+            return
+        now = time.time()
+        stmt = insert(articles_table)
+        update_columns = {column: stmt.excluded[column] for column in RECORD_COLUMNS.values()}
+        update_columns["abstract"] = case((stmt.excluded.abstract != "", stmt.excluded.abstract), else_=articles_table.c.abstract)
+        for column in ENRICHED_COLUMNS.values():
+            update_columns[column] = func.coalesce(stmt.excluded[column], articles_table.c[column])
+        update_columns["fetched_at"] = stmt.excluded.fetched_at
+        stmt = stmt.on_conflict_do_update(index_elements=[articles_table.c.pmid], set_=update_columns)
+        with self.engine.begin() as conn:
+            conn.execute(stmt, [record_to_row(record, now) for record in records])
+
+    def count(self):
+        if self.engine is None:
+            return 0
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(articles_table)).scalar()
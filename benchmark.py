@@ -0,0 +1,346 @@
+"""离线基准测试：使用本地模拟的E-utilities服务测量检索、CSV生成与完整接口的性能
+
+示例：
+    python benchmark.py --sizes 100,10000,100000 --concurrency 1,4 --output benchmark_results.json
+    python benchmark.py --sizes 100,10000 --compare benchmark_results.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import Flask
+
+import literature
+from eutils import EutilsClient
+from mock_eutils import MockEutilsServer
+from search_cache import SearchCache
+
+SCENARIOS = ("search_pubmed", "csv", "endpoint_search", "endpoint_export")
+
+BENCHMARK_QUERY = "health technology assessment[tiab]"
+
+
+def percentile(values, fraction):
+    """线性插值的百分位数，values需已排序"""
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def current_rss():
+    """当前常驻内存（字节），不支持/proc时返回None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def max_rss():
+    """进程生命周期内的最大常驻内存（字节）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS以字节为单位，Linux以KB为单位
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RssSampler:
+    """在后台线程中定期采样常驻内存，记录运行期间的峰值"""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.start_rss = None
+        self.peak = None
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def __enter__(self):
+        self.start_rss = current_rss()
+        self.peak = self.start_rss
+        if self.start_rss is not None:
+            self.thread = threading.Thread(target=self.run, daemon=True)
+            self.thread.start()
+        return self
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            rss = current_rss()
+            if rss is not None and rss > self.peak:
+                self.peak = rss
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        rss = current_rss()
+        if rss is not None and rss > self.peak:
+            self.peak = rss
+        if self.peak is None:
+            self.peak = max_rss()
+
+
+def make_app():
+    app = Flask(__name__)
+    app.register_blueprint(literature.literature_bp, url_prefix="/api")
+    return app
+
+
+def make_operation(scenario, size, app):
+    """返回执行一次场景的函数，函数返回处理的记录数"""
+    fetch_all = size > literature.ESUMMARY_BATCH_SIZE
+
+    if scenario == "search_pubmed":
+        def operation():
+            results, total = literature.search_pubmed(BENCHMARK_QUERY, retmax=size, fetch_all=fetch_all)
+            if results is None:
+                raise RuntimeError(total)
+            return len(results)
+        return operation
+
+    if scenario == "csv":
+        # CSV生成只计时编码部分，检索结果预先获取一次
+        results, total = literature.search_pubmed(BENCHMARK_QUERY, retmax=size, fetch_all=fetch_all)
+        if results is None:
+            raise RuntimeError(total)
+
+        def operation():
+            literature.encode_csv_base64(results)
+            return len(results)
+        return operation
+
+    if scenario == "endpoint_search":
+        def operation():
+            response = app.test_client().post("/api/execute_pubmed_search", json={
+                "search_strategy": BENCHMARK_QUERY,
+                "retmax": size,
+                "no_cache": True,
+            })
+            if response.status_code != 200:
+                raise RuntimeError(response.get_json().get("error"))
+            return response.get_json()["retrieved_count"]
+        return operation
+
+    if scenario == "endpoint_export":
+        def operation():
+            response = app.test_client().get("/api/export_pubmed_search", query_string={
+                "search_strategy": BENCHMARK_QUERY,
+                "retmax": size,
+                "format": "csv",
+            })
+            if response.status_code != 200:
+                raise RuntimeError(response.get_data(as_text=True))
+            # 表头占一行
+            return response.get_data().count(b"\n") - 1
+        return operation
+
+    raise ValueError(f"未知的基准场景: {scenario}")
+
+
+def default_iterations(size, concurrency):
+    """小结果集多跑几轮以稳定百分位数，大结果集保证每个并发线程至少运行一次"""
+    return max(concurrency, min(20, 100000 // max(size, 1)))
+
+
+def run_case(scenario, size, concurrency, iterations, app):
+    """以指定并发执行iterations次场景，返回延迟、吞吐量与内存统计"""
+    operation = make_operation(scenario, size, app)
+    latencies = []
+    errors = []
+    records = 0
+    lock = threading.Lock()
+
+    def timed_call(_):
+        nonlocal records
+        started = time.perf_counter()
+        try:
+            count = operation()
+        except Exception as e:
+            with lock:
+                errors.append(str(e))
+            return
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            records += count
+
+    with RssSampler() as sampler:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(timed_call, range(iterations)))
+        wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "scenario": scenario,
+        "size": size,
+        "concurrency": concurrency,
+        "iterations": iterations,
+        "errors": len(errors),
+        "error_samples": errors[:3],
+        "wall_seconds": round(wall, 4),
+        "latency_p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+        "latency_p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "latency_max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+        "throughput_ops": round(len(latencies) / wall, 3) if wall else 0.0,
+        "throughput_records": round(records / wall, 1) if wall else 0.0,
+        "rss_start_mb": round(sampler.start_rss / 2 ** 20, 1) if sampler.start_rss is not None else None,
+        "rss_peak_mb": round(sampler.peak / 2 ** 20, 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(sizes, concurrency_levels, scenarios=SCENARIOS, latency=0.0, error_rate=0.0, iterations=None,
+                   rate=1000, seed=0, log=None):
+    """启动模拟服务并依次运行全部组合，返回可序列化为JSON的报告"""
+    corpus_size = max(sizes)
+    original_client = literature.eutils_client
+    original_cache = literature.search_cache
+    original_base_url = literature.PUBMED_BASE_URL
+    runs = []
+    with MockEutilsServer(corpus_size=corpus_size, latency=latency, error_rate=error_rate, seed=seed) as server:
+        literature.PUBMED_BASE_URL = server.base_url
+        literature.eutils_client = EutilsClient(rate=rate, backoff_base=0.05, backoff_max=1)
+        literature.search_cache = SearchCache()
+        app = make_app()
+        try:
+            for scenario in scenarios:
+                for size in sizes:
+                    for concurrency in concurrency_levels:
+                        count = iterations or default_iterations(size, concurrency)
+                        result = run_case(scenario, size, concurrency, count, app)
+                        # 模拟服务的请求日志只用于测试断言，长时间运行时需要清理
+                        server.requests.clear()
+                        server.histories.clear()
+                        # 释放上一组合保存的结果视图，减少对下一组合内存峰值的影响
+                        literature.result_views.views.clear()
+                        gc.collect()
+                        runs.append(result)
+                        if log:
+                            log(result)
+        finally:
+            literature.eutils_client = original_client
+            literature.search_cache = original_cache
+            literature.PUBMED_BASE_URL = original_base_url
+
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "sizes": list(sizes),
+            "concurrency": list(concurrency_levels),
+            "scenarios": list(scenarios),
+            "latency_seconds": latency,
+            "error_rate": error_rate,
+            "iterations": iterations,
+            "rate": rate,
+            "seed": seed,
+        },
+        "runs": runs,
+    }
+
+
+def compare_reports(baseline, current, threshold=0.2):
+    """按场景、规模与并发对比p50/p99延迟，返回变慢超过threshold比例的条目"""
+    baseline_runs = {(r["scenario"], r["size"], r["concurrency"]): r for r in baseline["runs"]}
+    regressions = []
+    for run in current["runs"]:
+        before = baseline_runs.get((run["scenario"], run["size"], run["concurrency"]))
+        if before is None:
+            continue
+        for metric in ("latency_p50_ms", "latency_p99_ms"):
+            if before[metric] and run[metric] > before[metric] * (1 + threshold):
+                regressions.append({
+                    "scenario": run["scenario"],
+                    "size": run["size"],
+                    "concurrency": run["concurrency"],
+                    "metric": metric,
+                    "baseline": before[metric],
+                    "current": run[metric],
+                    "ratio": round(run[metric] / before[metric], 3),
+                })
+    return regressions
+
+
+def parse_int_list(value):
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def format_run(run):
+    return (
+        f"{run['scenario']:<16} size={run['size']:<7} c={run['concurrency']:<3} "
+        f"p50={run['latency_p50_ms']:>10.1f}ms p99={run['latency_p99_ms']:>10.1f}ms "
+        f"{run['throughput_ops']:>8.2f} ops/s {run['throughput_records']:>11.1f} rec/s "
+        f"rss={run['rss_peak_mb']}MB errors={run['errors']}"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="离线基准测试（本地模拟E-utilities服务）")
+    parser.add_argument("--sizes", type=parse_int_list, default=[100, 10000, 100000], help="结果规模，逗号分隔")
+    parser.add_argument("--concurrency", type=parse_int_list, default=[1, 4], help="并发数，逗号分隔")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"运行的场景，可选: {', '.join(SCENARIOS)}")
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟服务每次响应的延迟（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="模拟服务随机返回503的比例")
+    parser.add_argument("--iterations", type=int, default=None, help="每个组合的运行次数，默认按规模自动选择")
+    parser.add_argument("--rate", type=float, default=1000, help="E-utilities客户端每秒请求上限")
+    parser.add_argument("--seed", type=int, default=0, help="随机错误的种子")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON结果文件")
+    parser.add_argument("--compare", help="与之前的JSON结果对比，延迟变慢超过阈值时以状态码1退出")
+    parser.add_argument("--threshold", type=float, default=0.2, help="判定为性能退化的延迟增幅")
+    args = parser.parse_args(argv)
+
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"未知的场景: {', '.join(sorted(unknown))}")
+
+    # 先读取基准结果，便于与输出文件使用同一路径
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    report = run_benchmarks(
+        args.sizes, args.concurrency, scenarios,
+        latency=args.latency, error_rate=args.error_rate, iterations=args.iterations,
+        rate=args.rate, seed=args.seed, log=lambda run: print(format_run(run), flush=True),
+    )
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"结果已保存到 {args.output}")
+
+    if baseline is not None:
+        regressions = compare_reports(baseline, report, args.threshold)
+        for item in regressions:
+            print(f"性能退化: {item['scenario']} size={item['size']} c={item['concurrency']} "
+                  f"{item['metric']} {item['baseline']} -> {item['current']} (x{item['ratio']})")
+        if regressions:
+            return 1
+        print("未发现性能退化")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
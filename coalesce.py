@@ -0,0 +1,195 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """合并相同键的并发调用：同一时刻只有第一个调用真正执行，其余调用等待并共享其结果或异常"""
+
+    def __init__(self):
+        self.calls = {}
+        self.executed = 0
+        self.shared = 0
+        self.lock = threading.Lock()
+
+    def do(self, key, func, *args, **kwargs):
+        """执行或等待func，返回(结果, 是否共享了其他调用的结果)"""
+        with self.lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                future = self.calls[key] = Future()
+                self.executed += 1
+            else:
+                self.shared += 1
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self.lock:
+                del self.calls[key]
+
+    def stats(self):
+        with self.lock:
+            return {"in_flight": len(self.calls), "executed": self.executed, "shared": self.shared}
+
+
+class SharedStream:
+    """一次进行中的流式计算的输出：生产线程逐块追加，每个读者都从第一块开始读到结束"""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.condition = threading.Condition()
+
+    def append(self, chunk):
+        with self.condition:
+            self.chunks.append(chunk)
+            self.condition.notify_all()
+
+    def finish(self, error=None):
+        with self.condition:
+            self.done = True
+            self.error = error
+            self.condition.notify_all()
+
+    def __iter__(self):
+        position = 0
+        while True:
+            with self.condition:
+                while position == len(self.chunks) and not self.done:
+                    self.condition.wait()
+                pending = self.chunks[position:]
+                position = len(self.chunks)
+                finished = self.done and not pending
+            if finished:
+                break
+            yield from pending
+        if self.error is not None:
+            raise self.error
+
+
+class StreamFlight:
+    """合并相同键的并发流式调用
+
+    第一个调用在后台线程中执行produce(emit, *args)，emit输出的每一块都追加到共享缓冲区；
+    同时到来的相同调用读取同一缓冲区，不再重复执行。生产在后台线程进行，发起的读者断开后其余读者不受影响。
+    """
+
+    def __init__(self):
+        self.streams = {}
+        self.executed = 0
+        self.shared = 0
+        self.lock = threading.Lock()
+
+    def open(self, key, produce, *args):
+        """返回(SharedStream, 是否共享了进行中的调用)"""
+        with self.lock:
+            stream = self.streams.get(key)
+            if stream is not None:
+                self.shared += 1
+                return stream, True
+            stream = self.streams[key] = SharedStream()
+            self.executed += 1
+        threading.Thread(target=self.run, args=(key, stream, produce, args), name="stream-flight", daemon=True).start()
+        return stream, False
+
+    def run(self, key, stream, produce, args):
+        error = None
+        try:
+            produce(stream.append, *args)
+        except Exception as e:
+            error = e
+        finally:
+            with self.lock:
+                del self.streams[key]
+            stream.finish(error)
+
+    def stats(self):
+        with self.lock:
+            return {"in_flight": len(self.streams), "executed": self.executed, "shared": self.shared}
+
+
+class MemoizedSingleFlight:
+    """带LRU淘汰与TTL的结果缓存，未命中时通过SingleFlight合并相同键的并发计算
+
+    cacheable(result)为False的结果（如错误响应）只共享给同时等待的调用，不写入缓存。
+    """
+
+    def __init__(self, max_entries=256, ttl=86400):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.flight = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.time() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_or_compute(self, key, func, *args, cacheable=None, **kwargs):
+        """返回(结果, 状态)，状态为hit、miss或coalesced"""
+        value = self.get(key)
+        if value is not None:
+            with self.lock:
+                self.hits += 1
+            return value, "hit"
+
+        def compute():
+            # 等待进入SingleFlight期间其他调用可能已完成并写入缓存
+            cached = self.get(key)
+            if cached is not None:
+                return cached
+            result = func(*args, **kwargs)
+            if cacheable is None or cacheable(result):
+                self.put(key, result)
+            return result
+
+        value, shared = self.flight.do(key, compute)
+        if not shared:
+            with self.lock:
+                self.misses += 1
+        return value, "coalesced" if shared else "miss"
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self.lock:
+            stats = {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+        stats["coalesced"] = self.flight.stats()["shared"]
+        return stats
@@ -0,0 +1,79 @@
+import pytest
+from flask import Flask
+
+import literature
+from eutils import EutilsClient
+from coalesce import MemoizedSingleFlight
+from mock_eutils import MockEutilsServer
+from search_cache import SearchCache
+from strategy_backends import StubStrategyBackend
+
+# eutils fixture默认的模拟文献数量，测试模块可用pytest.mark.corpus_size(n)指定
+DEFAULT_CORPUS_SIZE = 1000
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "corpus_size(n): eutils fixture启动的模拟E-utilities服务的文献数量")
+
+
+@pytest.fixture(autouse=True)
+def fast_eutils_client(monkeypatch):
+    """测试中使用高频率、快速退避的E-utilities客户端，避免受NCBI限流配置拖慢"""
+    client = EutilsClient(rate=1000, backoff_base=0.001)
+    monkeypatch.setattr(literature, "eutils_client", client)
+    return client
+
+
+@pytest.fixture(autouse=True)
+def fresh_search_cache(monkeypatch):
+    """每个测试使用独立的检索结果缓存"""
+    cache = SearchCache()
+    monkeypatch.setattr(literature, "search_cache", cache)
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_strategy_cache(monkeypatch):
+    """每个测试使用独立的检索策略缓存"""
+    cache = MemoizedSingleFlight()
+    monkeypatch.setattr(literature, "strategy_cache", cache)
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def fast_strategy_backend(monkeypatch):
+    """测试中的stub后端不模拟生成延迟"""
+    backend = StubStrategyBackend(duration=0)
+    monkeypatch.setattr(literature, "strategy_backend", backend)
+    return backend
+
+
+@pytest.fixture
+def client():
+    """挂载literature蓝图（/api）的Flask测试客户端"""
+    app = Flask(__name__)
+    app.register_blueprint(literature.literature_bp, url_prefix="/api")
+    return app.test_client()
+
+
+@pytest.fixture
+def eutils_server(monkeypatch):
+    """启动模拟E-utilities服务并将PUBMED_BASE_URL指向它的工厂，测试结束时关闭启动过的全部服务"""
+    servers = []
+
+    def start(corpus_size=DEFAULT_CORPUS_SIZE, server_class=MockEutilsServer, **kwargs):
+        server = server_class(corpus_size=corpus_size, **kwargs).start()
+        servers.append(server)
+        monkeypatch.setattr(literature, "PUBMED_BASE_URL", server.base_url)
+        return server
+
+    yield start
+    for server in reversed(servers):
+        server.stop()
+
+
+@pytest.fixture
+def eutils(request, eutils_server):
+    """按corpus_size标记的文献数量启动的模拟E-utilities服务"""
+    marker = request.node.get_closest_marker("corpus_size")
+    return eutils_server(marker.args[0] if marker else DEFAULT_CORPUS_SIZE)
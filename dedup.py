@@ -0,0 +1,275 @@
+import re
+import unicodedata
+import zlib
+from collections import deque
+
+# MinHash签名的桶数与LSH分带：6个带、每带4行，Jaccard相似度约0.64以上的标题才可能成为候选
+MINHASH_PERMUTATIONS = 24
+LSH_BANDS = 6
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+
+# 标题相似度默认阈值
+TITLE_THRESHOLD = 0.8
+
+# 词数过少的标题（如 Editorial、Erratum）不参与标题匹配
+MIN_TITLE_TOKENS = 4
+
+# 超过此大小的LSH桶视为退化情况，不做两两比较
+MAX_BUCKET_SIZE = 100
+
+# 桶内保存CRC32除以桶数后的商（小于2**28）；空桶借用的值加上距离乘以偏移，与原值区分
+DENSIFY_OFFSET = 1 << 28
+EMPTY_BIN = 1 << 40
+
+# 一个带中至少包含几个非借用的值才参与分桶
+MIN_BAND_ORIGINALS = 2
+
+DOI_PREFIX_PATTERN = re.compile(r"^(https?://(dx\.)?doi\.org/|doi:\s*)", re.I)
+COMBINING_PATTERN = re.compile(r"[\u0300-\u036f]")
+WORD_PATTERN = re.compile(r"[^\W_]+")
+
+
+def normalize_doi(doi):
+    """统一DOI格式：去掉doi.org链接或doi:前缀，小写"""
+    return DOI_PREFIX_PATTERN.sub("", (doi or "").strip()).strip().lower()
+
+
+def title_tokens(title):
+    """标题规范化后的词集合：去除重音与标点、忽略大小写"""
+    text = COMBINING_PATTERN.sub("", unicodedata.normalize("NFKD", title or "")).casefold()
+    return WORD_PATTERN.findall(text)
+
+
+def minhash_signature(token_bytes):
+    """单次哈希MinHash（one permutation hashing）签名
+
+    每个词只计算一次CRC32，按哈希值分到MINHASH_PERMUTATIONS个桶中并保留每桶最小值；
+    空桶沿环向右借用最近非空桶的值（加上与距离相关的偏移），保证相似集合的签名仍逐位可比。
+    """
+    size = MINHASH_PERMUTATIONS
+    bins = [EMPTY_BIN] * size
+    for value in map(zlib.crc32, token_bytes):
+        index = value % size
+        value //= size
+        if value < bins[index]:
+            bins[index] = value
+    if EMPTY_BIN in bins:
+        filled = bins[:]
+        for index in range(size):
+            if filled[index] != EMPTY_BIN:
+                continue
+            for distance in range(1, size):
+                value = filled[(index + distance) % size]
+                if value != EMPTY_BIN:
+                    bins[index] = value + distance * DENSIFY_OFFSET
+                    break
+    return tuple(bins)
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b)
+
+
+class UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, i):
+        parent = self.parent
+        root = i
+        while parent[root] != root:
+            root = parent[root]
+        while parent[i] != root:
+            parent[i], i = root, parent[i]
+        return root
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return False
+        # 保留较小的序号作为根，使结果与输入顺序一致
+        if root_b < root_a:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        return True
+
+
+def record_quality(record):
+    """代表记录的优先级：有PMID、有DOI、有摘要、非空字段多者优先"""
+    return (
+        bool(record.get("PMID")),
+        bool(normalize_doi(record.get("DOI"))),
+        bool(record.get("Abstract")),
+        sum(1 for value in record.values() if value),
+    )
+
+
+def deduplicate(records, title_threshold=TITLE_THRESHOLD):
+    """对文献记录去重，返回{"records", "clusters", "stats"}
+
+    依次按PMID、规范化DOI、规范化标题完全相同以及MinHash/LSH找到的近似标题（Jaccard不低于title_threshold）
+    将记录合并为簇。按标题合并时，两个簇的PMID或DOI均存在且不同则不合并。records为每簇的代表记录
+    （按输入顺序），clusters只列出包含多条记录的簇，members与representative为记录在输入中的序号。
+    """
+    size = len(records)
+    groups = UnionFind(size)
+    reasons = {}
+    # 每个簇根节点对应的(PMID, DOI)，用于阻止标题合并把不同文献连在一起
+    identities = [(str(record.get("PMID") or "").strip(), normalize_doi(record.get("DOI"))) for record in records]
+
+    def link(a, b, reason):
+        root_a, root_b = groups.find(a), groups.find(b)
+        if root_a != root_b:
+            (pmid_a, doi_a), (pmid_b, doi_b) = identities[root_a], identities[root_b]
+            groups.union(root_a, root_b)
+            identities[min(root_a, root_b)] = (pmid_a or pmid_b, doi_a or doi_b)
+        reasons.setdefault((min(a, b), max(a, b)), reason)
+
+    def compatible(a, b):
+        (pmid_a, doi_a), (pmid_b, doi_b) = identities[groups.find(a)], identities[groups.find(b)]
+        return not (pmid_a and pmid_b and pmid_a != pmid_b) and not (doi_a and doi_b and doi_a != doi_b)
+
+    # 精确匹配：PMID与DOI的哈希索引（合并会改写根节点的identities，先保留各记录自身的值）
+    keys = list(identities)
+    for field, position in (("pmid", 0), ("doi", 1)):
+        index = {}
+        for i, identity in enumerate(keys):
+            key = identity[position]
+            if not key:
+                continue
+            first = index.setdefault(key, i)
+            if first != i:
+                link(first, i, field)
+
+    # 标题：相同规范化标题先归并，每个不同标题只计算一次签名
+    title_index = {}
+    titles = []
+    for i, record in enumerate(records):
+        tokens = title_tokens(record.get("Title"))
+        if len(tokens) < MIN_TITLE_TOKENS:
+            continue
+        key = " ".join(tokens)
+        entry = title_index.get(key)
+        if entry is None:
+            title_index[key] = len(titles)
+            titles.append((frozenset(tokens), [i]))
+        else:
+            titles[entry][1].append(i)
+
+    def new_title_index(members):
+        # pmid/doi：组内第一条带该标识的记录；open：簇中仍缺少PMID/缺少DOI的记录队列；anchor：组内第一条记录
+        return {"pmid": {}, "doi": {}, "open": (deque(), deque()), "anchor": members[0]}
+
+    def open_member(queue, position):
+        # 簇合并后已补齐该标识的记录从队首移除，每条记录最多移除一次
+        while queue and identities[groups.find(queue[0])][position]:
+            queue.popleft()
+        return queue[0] if queue else None
+
+    def find_partner(index, i):
+        """在标题组的索引中找一条可与i合并的记录，只检查常数个候选，不与组内记录两两比较"""
+        pmid, doi = keys[i]
+        candidates = (index["pmid"].get(pmid), index["doi"].get(doi),
+                      open_member(index["open"][0], 0), open_member(index["open"][1], 1), index["anchor"])
+        for candidate in candidates:
+            if candidate is not None and candidate != i and compatible(candidate, i):
+                return candidate
+        return None
+
+    def add_to_index(index, i):
+        pmid, doi = keys[i]
+        if pmid:
+            index["pmid"].setdefault(pmid, i)
+        if doi:
+            index["doi"].setdefault(doi, i)
+        identity = identities[groups.find(i)]
+        for position in (0, 1):
+            if not identity[position]:
+                index["open"][position].append(i)
+
+    title_indexes = []
+    for _, members in titles:
+        # 只有一条记录的标题不需要索引
+        if len(members) == 1:
+            title_indexes.append(None)
+            continue
+        index = new_title_index(members)
+        for i in members:
+            partner = find_partner(index, i)
+            if partner is not None:
+                link(partner, i, "title")
+            add_to_index(index, i)
+        title_indexes.append(index)
+
+    def link_similar_titles(title_a, title_b):
+        # 用较小组的记录在较大组的索引中查找
+        if len(titles[title_a][1]) < len(titles[title_b][1]):
+            title_a, title_b = title_b, title_a
+        index = title_indexes[title_a]
+        for b in titles[title_b][1]:
+            if index is None:
+                partner = titles[title_a][1][0]
+                partner = partner if compatible(partner, b) else None
+            else:
+                partner = find_partner(index, b)
+            if partner is not None:
+                link(partner, b, "similar_title")
+                return
+
+    buckets = {}
+    for title_id, (tokens, _) in enumerate(titles):
+        signature = minhash_signature([token.encode("utf-8") for token in tokens])
+        for band in range(LSH_BANDS):
+            rows = signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+            # 整带都借自同一个词时，只要共有这个词就会落入同一桶，不作为候选依据
+            if sum(map(DENSIFY_OFFSET.__gt__, rows)) >= MIN_BAND_ORIGINALS:
+                buckets.setdefault((band, rows), []).append(title_id)
+
+    compared = set()
+    candidate_pairs = 0
+    for bucket in buckets.values():
+        if len(bucket) < 2 or len(bucket) > MAX_BUCKET_SIZE:
+            continue
+        for x in range(len(bucket)):
+            for y in range(x + 1, len(bucket)):
+                pair = (bucket[x], bucket[y])
+                if pair in compared:
+                    continue
+                compared.add(pair)
+                candidate_pairs += 1
+                if jaccard(titles[pair[0]][0], titles[pair[1]][0]) >= title_threshold:
+                    link_similar_titles(*pair)
+
+    # 汇总簇并选出代表记录
+    members_by_root = {}
+    for i in range(size):
+        members_by_root.setdefault(groups.find(i), []).append(i)
+    reasons_by_root = {}
+    for (a, _), reason in reasons.items():
+        reasons_by_root.setdefault(groups.find(a), set()).add(reason)
+
+    representatives = []
+    clusters = []
+    for root, members in members_by_root.items():
+        representative = max(members, key=lambda i: (record_quality(records[i]), -i))
+        representatives.append(representative)
+        if len(members) > 1:
+            clusters.append({
+                "representative": representative,
+                "members": members,
+                "match": sorted(reasons_by_root.get(root, ())),
+            })
+    representatives.sort()
+
+    return {
+        "records": [records[i] for i in representatives],
+        "clusters": clusters,
+        "stats": {
+            "input": size,
+            "unique": len(representatives),
+            "duplicates": size - len(representatives),
+            "clusters": len(clusters),
+            "distinct_titles": len(titles),
+            "title_candidate_pairs": candidate_pairs,
+        },
+    }
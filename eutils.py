@@ -0,0 +1,178 @@
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import REGISTRY, SIZE_BUCKETS
+
+# NCBI限制：无API Key每秒3次请求，有API Key每秒10次
+DEFAULT_RATE = 3
+API_KEY_RATE = 10
+
+# 需要退避重试的HTTP状态码
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+UPSTREAM_REQUESTS = REGISTRY.counter(
+    "eutils_requests_total", "E-utilities调用次数（按最终状态码，网络错误记为error）", ("endpoint", "status")
+)
+UPSTREAM_RETRIES = REGISTRY.counter("eutils_retries_total", "E-utilities重试次数", ("endpoint",))
+UPSTREAM_SECONDS = REGISTRY.histogram("eutils_request_seconds", "E-utilities调用耗时（含重试与限流等待）", ("endpoint",))
+UPSTREAM_WAIT_SECONDS = REGISTRY.counter("eutils_rate_limit_wait_seconds_total", "令牌桶限流累计等待时间", ("endpoint",))
+UPSTREAM_BYTES = REGISTRY.histogram("eutils_response_bytes", "E-utilities响应大小", ("endpoint",), buckets=SIZE_BUCKETS)
+
+
+class HistoryInvalid(Exception):
+    """History Server中的WebEnv/query_key已失效（如NCBI已清理），需要重新执行ESearch"""
+
+
+class TokenBucket:
+    """线程安全的令牌桶限流器
+
+    容量默认为1，不允许突发：请求间隔至少1/rate秒，任意1秒窗口内不超过rate个请求。
+    """
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """预约一个令牌，必要时等待，返回等待的秒数"""
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # 令牌可以预支为负数，等待时间按排队位置计算，保证先到先得
+            self.tokens -= 1
+            delay = max(0.0, -self.tokens / self.rate)
+        if delay:
+            self.sleep(delay)
+        return delay
+
+
+class EutilsClient:
+    """共享连接池、限流与重试的E-utilities HTTP客户端
+
+    所有文献检索路由共用一个实例：Session保持长连接，令牌桶保证不超过NCBI的请求频率，
+    429/5xx及网络错误按带抖动的指数退避重试。最近的调用耗时保存在timings中。
+    """
+
+    def __init__(self, api_key=None, rate=None, max_retries=4, backoff_base=0.5, backoff_max=8.0,
+                 pool_size=10, history_size=1000):
+        self.api_key = api_key
+        self.limiter = TokenBucket(rate or (API_KEY_RATE if api_key else DEFAULT_RATE))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.timings = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+
+    def backoff(self, attempt, response=None):
+        """计算第attempt次重试前的等待时间，优先遵循Retry-After"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def request(self, method, url, params=None, data=None, timeout=30, stream=False):
+        """限流并重试的HTTP请求，最终失败时抛出requests异常
+
+        stream为True时不预先读取响应体，由调用方从response.raw增量读取并负责关闭。
+        """
+        params = dict(params or {})
+        if self.api_key:
+            params["api_key"] = self.api_key
+        endpoint = url.rsplit("/", 1)[-1]
+        started = time.perf_counter()
+        waited = 0.0
+        attempt = 0
+        while True:
+            waited += self.limiter.acquire()
+            response = None
+            try:
+                response = self.session.request(method, url, params=params, data=data, timeout=timeout, stream=stream)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt >= self.max_retries:
+                    self.record(endpoint, None, started, waited, attempt + 1)
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt >= self.max_retries:
+                    size = int(response.headers.get("Content-Length", 0)) if stream else len(response.content)
+                    self.record(endpoint, response.status_code, started, waited, attempt + 1, size)
+                    if response.status_code >= 400:
+                        response.close()
+                    response.raise_for_status()
+                    return response
+                response.close()
+            time.sleep(self.backoff(attempt, response))
+            attempt += 1
+
+    def get(self, url, params=None, timeout=30):
+        return self.request("GET", url, params=params, timeout=timeout)
+
+    def post(self, url, data=None, timeout=30, stream=False):
+        """以表单提交参数，适用于NCBI建议的大量UID请求"""
+        return self.request("POST", url, data=data, timeout=timeout, stream=stream)
+
+    def get_json(self, url, params=None, timeout=30):
+        return self.get(url, params=params, timeout=timeout).json()
+
+    def record(self, endpoint, status, started, waited, attempts, size=0):
+        elapsed = time.perf_counter() - started
+        UPSTREAM_REQUESTS.inc(endpoint=endpoint, status=status if status is not None else "error")
+        if attempts > 1:
+            UPSTREAM_RETRIES.inc(attempts - 1, endpoint=endpoint)
+        UPSTREAM_SECONDS.observe(elapsed, endpoint=endpoint)
+        UPSTREAM_WAIT_SECONDS.inc(waited, endpoint=endpoint)
+        if status is not None:
+            UPSTREAM_BYTES.observe(size, endpoint=endpoint)
+        timing = {
+            "endpoint": endpoint,
+            "status": status,
+            "elapsed_ms": round(elapsed * 1000, 2),
+            "rate_limit_wait_ms": round(waited * 1000, 2),
+            "attempts": attempts,
+            "bytes": size,
+            "timestamp": time.time()
+        }
+        with self._lock:
+            self.timings.append(timing)
+
+    def stats(self):
+        """按端点汇总最近调用的耗时"""
+        with self._lock:
+            timings = list(self.timings)
+        summary = defaultdict(lambda: {"calls": 0, "retries": 0, "errors": 0, "elapsed_ms": []})
+        for timing in timings:
+            entry = summary[timing["endpoint"]]
+            entry["calls"] += 1
+            entry["retries"] += timing["attempts"] - 1
+            if timing["status"] is None or timing["status"] >= 400:
+                entry["errors"] += 1
+            entry["elapsed_ms"].append(timing["elapsed_ms"])
+        result = {}
+        for endpoint, entry in summary.items():
+            elapsed = sorted(entry.pop("elapsed_ms"))
+            entry["avg_ms"] = round(sum(elapsed) / len(elapsed), 2)
+            entry["p50_ms"] = elapsed[len(elapsed) // 2]
+            entry["max_ms"] = elapsed[-1]
+            result[endpoint] = entry
+        return {"rate_per_second": self.limiter.rate, "endpoints": result, "recent": timings[-20:]}
+
+
+def client_from_env():
+    """根据环境变量NCBI_API_KEY创建客户端"""
+    return EutilsClient(api_key=os.environ.get("NCBI_API_KEY") or None)
@@ -0,0 +1,143 @@
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+from jobs import DONE, FAILED, QUEUED, RUNNING
+
+EXPORT_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+CHECKPOINT_FILE = "checkpoint.json"
+
+# 导出过程中逐批追加的数据文件，完成后改名为result.<扩展名>
+PARTIAL_FILE = "data.part"
+
+# 接口返回的导出状态中不包含History Server的内部参数
+PRIVATE_FIELDS = ("webenv", "query_key", "webenv_at")
+
+
+class ExportsNotConfigured(Exception):
+    """未通过init_app配置导出目录"""
+
+
+def export_summary(state):
+    return {name: value for name, value in state.items() if name not in PRIVATE_FIELDS}
+
+
+class ExportStore:
+    """大批量导出任务的磁盘检查点
+
+    每个导出任务一个目录：checkpoint.json记录检索参数、WebEnv/query_key、下一批的偏移量以及已写入的
+    行数与字节数；data.part按批追加导出内容。检查点在每批数据落盘后以原子替换的方式更新，
+    继续导出时data.part先截断到检查点记录的长度，丢弃未记录的半批数据。
+    """
+
+    def __init__(self, root=None):
+        self.root = root
+
+    def init_app(self, app):
+        """使用EXPORT_DIR配置的目录，默认为应用目录下的exports"""
+        self.root = app.config.get("EXPORT_DIR") or os.path.join(app.root_path, "exports")
+        os.makedirs(self.root, exist_ok=True)
+
+    def require_root(self):
+        if self.root is None:
+            raise ExportsNotConfigured("导出任务需要配置导出目录")
+        return self.root
+
+    def path(self, export_id, name=""):
+        if not EXPORT_ID_PATTERN.match(export_id):
+            raise ValueError("导出任务ID格式错误")
+        return os.path.join(self.require_root(), export_id, name)
+
+    def create(self, search_strategy, export_format, extension, retmax, include_abstracts, batch_size):
+        now = time.time()
+        state = {
+            "export_id": uuid.uuid4().hex,
+            "status": QUEUED,
+            "search_strategy": search_strategy,
+            "format": export_format,
+            "extension": extension,
+            "retmax": retmax,
+            "include_abstracts": include_abstracts,
+            "batch_size": batch_size,
+            "webenv": None,
+            "query_key": None,
+            "webenv_at": None,
+            "total_count": None,
+            "limit": None,
+            "offset": 0,
+            "rows_written": 0,
+            "bytes_written": 0,
+            "resumes": 0,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+            "finished_at": None,
+        }
+        os.makedirs(self.path(state["export_id"]))
+        self.save(state)
+        return state
+
+    def save(self, state):
+        """原子地写入检查点：先写临时文件并fsync，再替换"""
+        state["updated_at"] = time.time()
+        path = self.path(state["export_id"], CHECKPOINT_FILE)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    def load(self, export_id):
+        try:
+            with open(self.path(export_id, CHECKPOINT_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def list(self):
+        root = self.require_root()
+        states = [self.load(name) for name in os.listdir(root) if EXPORT_ID_PATTERN.match(name)]
+        return sorted((state for state in states if state is not None), key=lambda state: state["created_at"])
+
+    def interrupted(self):
+        """进程退出时仍在排队或运行的导出任务"""
+        return [state for state in self.list() if state["status"] in (QUEUED, RUNNING)]
+
+    def append(self, state, data, rows, offset):
+        """在已确认的数据之后写入一批内容并更新检查点
+
+        写入位置为检查点记录的字节数，之后的残留内容被截断；数据fsync后才保存新的偏移量，
+        因此检查点记录的内容一定已经落盘。
+        """
+        path = self.path(state["export_id"], PARTIAL_FILE)
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            f.seek(state["bytes_written"])
+            f.write(data)
+            f.truncate()
+            f.flush()
+            os.fsync(f.fileno())
+            bytes_written = f.tell()
+        state.update(offset=offset, rows_written=state["rows_written"] + rows, bytes_written=bytes_written)
+        self.save(state)
+
+    def result_path(self, state):
+        return self.path(state["export_id"], f"result.{state['extension']}")
+
+    def finish(self, state):
+        """将数据文件改名为最终结果；已有内容不再读入内存"""
+        partial = self.path(state["export_id"], PARTIAL_FILE)
+        if not os.path.exists(partial):
+            open(partial, "wb").close()
+        os.truncate(partial, state["bytes_written"])
+        os.replace(partial, self.result_path(state))
+        state.update(status=DONE, error=None, finished_at=time.time())
+        self.save(state)
+
+    def fail(self, state, error):
+        state.update(status=FAILED, error=error)
+        self.save(state)
@@ -0,0 +1,275 @@
+import json
+import logging
+import re
+import time
+
+from sqlalchemy import inspect
+from sqlalchemy.exc import OperationalError
+
+from article_store import ENRICHED_COLUMNS as STORE_ENRICHED_COLUMNS
+from article_store import RECORD_COLUMNS as STORE_RECORD_COLUMNS
+from article_store import articles_table
+
+logger = logging.getLogger(__name__)
+
+TABLE_NAME = "articles_fts"
+
+# 全文索引的列：前7列参与检索，其余只随结果返回；rowid即PMID
+INDEXED_COLUMNS = {
+    "title": "Title",
+    "abstract": "Abstract",
+    "mesh_terms": "MeSH_Terms",
+    "authors": "Authors",
+    "journal": "Journal",
+    "publication_types": "Publication_Types",
+    "study_type": "Study_Type",
+}
+STORED_COLUMNS = {
+    "publication_date": "Publication_Date",
+    "doi": "DOI",
+}
+COLUMNS = list(INDEXED_COLUMNS) + list(STORED_COLUMNS) + ["indexed_at"]
+
+# BM25各列权重（与COLUMNS顺序一致），标题命中最重要
+BM25_WEIGHTS = (10.0, 4.0, 3.0, 1.0, 1.0, 1.0, 1.0, 0.0, 0.0, 0.0)
+
+# 只在EFetch补充时获得的字段，ESummary记录为空时保留索引中已有的值
+ENRICHED_COLUMNS = ("abstract", "mesh_terms", "publication_types")
+
+# PubMed字段标签与索引列的对应关系
+FIELD_TAGS = {
+    "ti": ("title",),
+    "title": ("title",),
+    "ab": ("abstract",),
+    "abstract": ("abstract",),
+    "tiab": ("title", "abstract"),
+    "mh": ("mesh_terms",),
+    "mesh": ("mesh_terms",),
+    "mesh terms": ("mesh_terms",),
+    "au": ("authors",),
+    "author": ("authors",),
+    "ta": ("journal",),
+    "journal": ("journal",),
+    "pt": ("publication_types", "study_type"),
+    "publication type": ("publication_types", "study_type"),
+}
+
+QUERY_TOKEN_PATTERN = re.compile(r'"[^"]*"\*?|\(|\)|\[[^\]]*\]|[^\s()"\[\]]+')
+
+OPERATORS = ("AND", "OR", "NOT")
+
+# 返回的摘要片段长度（词数）与高亮标记
+SNIPPET_TOKENS = 24
+HIGHLIGHT = ("<mark>", "</mark>")
+
+
+class FulltextIndexNotConfigured(Exception):
+    """未通过init_app配置数据库，或SQLite不支持FTS5"""
+
+
+def to_fts_query(query):
+    """将PubMed风格的检索式转换为FTS5查询
+
+    支持AND/OR/NOT、括号、"短语"、词尾*前缀匹配以及紧跟检索词的字段标签（如[tiab]、[mh]、[pt]）；
+    未加标签的检索词匹配全部检索列。格式错误时抛出ValueError。
+    """
+    tokens = QUERY_TOKEN_PATTERN.findall(query)
+    parts = []
+    expect_term = True
+    depth = 0
+    position = 0
+    while position < len(tokens):
+        token = tokens[position]
+        position += 1
+        if token in OPERATORS:
+            if expect_term:
+                raise ValueError(f"运算符位置错误: {token}")
+            parts.append(token)
+            expect_term = True
+            continue
+        if token == "(":
+            if not expect_term:
+                parts.append("AND")
+            parts.append(token)
+            depth += 1
+            expect_term = True
+            continue
+        if token == ")":
+            depth -= 1
+            if depth < 0 or expect_term:
+                raise ValueError("括号不匹配或括号内为空")
+            parts.append(token)
+            continue
+        if token.startswith("["):
+            raise ValueError(f"字段标签必须紧跟检索词: {token}")
+
+        prefix = token.endswith("*")
+        text = token[:-1] if prefix else token
+        if text.startswith('"'):
+            text = text[1:-1]
+        if not text.strip():
+            raise ValueError("检索词不能为空")
+        term = '"' + text.replace('"', '""') + '"' + ("*" if prefix else "")
+        if position < len(tokens) and tokens[position].startswith("["):
+            tag = " ".join(tokens[position][1:-1].lower().split())
+            position += 1
+            columns = FIELD_TAGS.get(tag)
+            if columns is None:
+                raise ValueError(f"不支持的字段标签: [{tag}]")
+            term = "{" + " ".join(columns) + "} : " + term
+        # 相邻检索词之间省略运算符时按AND处理
+        if not expect_term:
+            parts.append("AND")
+        parts.append(term)
+        expect_term = False
+    if depth != 0:
+        raise ValueError("括号不匹配")
+    if expect_term:
+        raise ValueError("检索式不完整" if parts else "检索式不能为空")
+    return " ".join(parts)
+
+
+def record_to_values(record, pmid, indexed_at):
+    values = [record.get(field) or "" for field in INDEXED_COLUMNS.values()]
+    values += [record.get(field) or "" for field in STORED_COLUMNS.values()]
+    return [pmid] + values + [indexed_at]
+
+
+class FulltextIndex:
+    """检索过的文献记录的本地SQLite FTS5全文索引
+
+    每批记录获取后增量写入（同一PMID替换旧记录，已有的摘要、MeSH主题词不会被空值覆盖），
+    之后可用PubMed风格的检索式在本地按BM25排序查询，不再请求PubMed。
+    通过init_app使用应用已配置的SQLAlchemy数据库；SQLite未编译FTS5时不启用。
+    """
+
+    def __init__(self):
+        self.engine = None
+
+    @property
+    def enabled(self):
+        return self.engine is not None
+
+    def init_app(self, app):
+        """创建articles_fts虚拟表，需在db.init_app(app)之后调用"""
+        if not app.config.get("FULLTEXT_INDEX_ENABLED", True) or "sqlalchemy" not in app.extensions:
+            return
+        with app.app_context():
+            engine = app.extensions["sqlalchemy"].engine
+        if engine.dialect.name != "sqlite":
+            return
+        columns = ", ".join(COLUMNS[:len(INDEXED_COLUMNS)] + [f"{name} UNINDEXED" for name in COLUMNS[len(INDEXED_COLUMNS):]])
+        try:
+            with engine.begin() as conn:
+                conn.exec_driver_sql(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE_NAME} USING fts5({columns}, tokenize='unicode61 remove_diacritics 2')"
+                )
+        except OperationalError as e:
+            logger.warning("SQLite不支持FTS5，本地全文检索未启用: %s", e)
+            return
+        self.engine = engine
+        self.backfill()
+
+    def backfill(self):
+        """将文献库（articles表）中尚未索引的记录写入索引，返回写入的数量
+
+        文献库命中与检索缓存命中的记录不会再经过ESummary，启用索引前保存的记录需要在启动时补入。
+        """
+        engine = self.require_engine()
+        if not inspect(engine).has_table(articles_table.name):
+            return 0
+        existing = {column["name"] for column in inspect(engine).get_columns(articles_table.name)}
+        sources = {**STORE_RECORD_COLUMNS, **STORE_ENRICHED_COLUMNS}
+        fields = list(INDEXED_COLUMNS.values()) + list(STORED_COLUMNS.values())
+        values = [f"coalesce({sources[field]}, '')" if sources.get(field) in existing else "''" for field in fields]
+        with engine.begin() as conn:
+            added = conn.exec_driver_sql(
+                f"INSERT INTO {TABLE_NAME}(rowid, {', '.join(COLUMNS)}) "
+                f"SELECT CAST(pmid AS INTEGER), {', '.join(values)}, fetched_at FROM {articles_table.name} "
+                f"WHERE pmid != '' AND pmid NOT GLOB '*[^0-9]*' "
+                f"AND CAST(pmid AS INTEGER) NOT IN (SELECT rowid FROM {TABLE_NAME})"
+            ).rowcount
+        if added:
+            logger.info("已将文献库中的 %d 篇记录补入本地全文索引", added)
+        return added
+
+    def require_engine(self):
+        if self.engine is None:
+            raise FulltextIndexNotConfigured("本地全文检索需要配置SQLite数据库（含FTS5）")
+        return self.engine
+
+    def add(self, records):
+        """写入或替换一批记录，返回写入的数量；PMID不是数字的记录跳过"""
+        if self.engine is None or not records:
+            return 0
+        by_pmid = {}
+        for record in records:
+            pmid = str(record.get("PMID") or "").strip()
+            if pmid.isdigit():
+                by_pmid[int(pmid)] = record
+        if not by_pmid:
+            return 0
+
+        now = time.time()
+        rows = {pmid: record_to_values(record, pmid, now) for pmid, record in by_pmid.items()}
+        positions = [COLUMNS.index(column) + 1 for column in ENRICHED_COLUMNS]
+        needs_existing = [pmid for pmid, row in rows.items() if not all(row[i] for i in positions)]
+        with self.engine.begin() as conn:
+            if needs_existing:
+                existing = conn.exec_driver_sql(
+                    f"SELECT rowid, {', '.join(ENRICHED_COLUMNS)} FROM {TABLE_NAME} WHERE rowid IN (SELECT value FROM json_each(?))",
+                    (json.dumps(needs_existing),),
+                )
+                for pmid, *values in existing:
+                    row = rows[pmid]
+                    for i, value in zip(positions, values):
+                        row[i] = row[i] or value
+            placeholders = ", ".join("?" * (len(COLUMNS) + 1))
+            conn.exec_driver_sql(
+                f"INSERT OR REPLACE INTO {TABLE_NAME}(rowid, {', '.join(COLUMNS)}) VALUES ({placeholders})",
+                [tuple(row) for row in rows.values()],
+            )
+        return len(rows)
+
+    def search(self, query, limit=50, offset=0, pmids=None):
+        """按BM25相关度查询，返回{"fts_query", "total", "items"}；pmids限制在给定的PMID集合内"""
+        engine = self.require_engine()
+        fts_query = to_fts_query(query)
+        where = f"{TABLE_NAME} MATCH ?"
+        params = [fts_query]
+        if pmids is not None:
+            where += " AND rowid IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps([int(pmid) for pmid in pmids if str(pmid).isdigit()]))
+
+        weights = ", ".join(str(weight) for weight in BM25_WEIGHTS)
+        abstract_column = COLUMNS.index("abstract")
+        select_columns = ", ".join(COLUMNS[:-1])
+        try:
+            with engine.connect() as conn:
+                total = conn.exec_driver_sql(f"SELECT count(*) FROM {TABLE_NAME} WHERE {where}", tuple(params)).scalar()
+                rows = conn.exec_driver_sql(
+                    f"SELECT rowid, {select_columns}, bm25({TABLE_NAME}, {weights}) AS score, "
+                    f"snippet({TABLE_NAME}, {abstract_column}, ?, ?, '…', {SNIPPET_TOKENS}) "
+                    f"FROM {TABLE_NAME} WHERE {where} ORDER BY score LIMIT ? OFFSET ?",
+                    (*HIGHLIGHT, *params, limit, offset),
+                ).all()
+        except OperationalError as e:
+            raise ValueError(f"检索式语法错误: {e.orig}")
+
+        items = []
+        fields = list(INDEXED_COLUMNS.values()) + list(STORED_COLUMNS.values())
+        for pmid, *values in rows:
+            record = {"PMID": str(pmid)}
+            record.update(zip(fields, values[:len(fields)]))
+            record["URL"] = f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/"
+            # bm25()越小越相关，取相反数使分数越大越相关
+            record["score"] = round(-values[len(fields)], 4)
+            record["snippet"] = values[len(fields) + 1]
+            items.append(record)
+        return {"fts_query": fts_query, "total": total, "items": items}
+
+    def count(self):
+        if self.engine is None:
+            return 0
+        with self.engine.connect() as conn:
+            return conn.exec_driver_sql(f"SELECT count(*) FROM {TABLE_NAME}").scalar()
@@ -0,0 +1,141 @@
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class JobQueueFull(Exception):
+    """排队任务数达到上限"""
+
+
+class Job:
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = QUEUED
+        self.fetched = 0
+        self.total = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        # 每次状态或进度变化时递增，供SSE判断是否需要推送
+        self.version = 0
+
+    def to_dict(self, include_result=True):
+        data = {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": {"fetched": self.fetched, "total": self.total},
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+        if self.error is not None:
+            data["error"] = self.error
+        if include_result and self.status == DONE:
+            data["result"] = self.result
+        return data
+
+
+class JobManager:
+    """在有界线程池中执行检索任务，保存进度与结果
+
+    任务函数接收progress(fetched, total)回调，返回(结果字典, HTTP状态码)；
+    完成的任务在result_ttl秒内可以查询，最多保留max_finished个，超出时先删除最早完成的任务。
+    """
+
+    def __init__(self, max_workers=4, max_pending=100, result_ttl=3600, max_finished=100, thread_name_prefix="search-job"):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.max_finished = max_finished
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self.jobs = {}
+        self.condition = threading.Condition()
+
+    def submit(self, kind, func, *args, **kwargs):
+        with self.condition:
+            self.expire()
+            pending = sum(1 for job in self.jobs.values() if job.status in (QUEUED, RUNNING))
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"排队任务已达上限 {self.max_pending}")
+            job = Job(kind)
+            self.jobs[job.id] = job
+        self.executor.submit(self.run, job, func, args, kwargs)
+        return job
+
+    def run(self, job, func, args, kwargs):
+        self.update(job, status=RUNNING)
+
+        def progress(fetched, total=None):
+            self.update(job, fetched=fetched, total=total if total is not None else job.total)
+
+        try:
+            result, status_code = func(*args, progress=progress, **kwargs)
+        except Exception as e:
+            self.update(job, status=FAILED, error=f"任务执行失败: {str(e)}", finished_at=time.time())
+            return
+        if status_code >= 400:
+            self.update(job, status=FAILED, error=result.get("error", "任务执行失败"), finished_at=time.time())
+        else:
+            self.update(job, status=DONE, result=result, finished_at=time.time())
+
+    def update(self, job, **fields):
+        with self.condition:
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.version += 1
+            self.condition.notify_all()
+            if job.finished_at:
+                self.expire()
+
+    def get(self, job_id):
+        with self.condition:
+            self.expire()
+            return self.jobs.get(job_id)
+
+    def expire(self):
+        """删除超过保留时间或超出保留数量的已完成任务，调用方需持有condition"""
+        deadline = time.time() - self.result_ttl
+        finished = sorted((job for job in self.jobs.values() if job.finished_at), key=lambda job: job.finished_at)
+        excess = len(finished) - self.max_finished
+        for i, job in enumerate(finished):
+            if i < excess or job.finished_at < deadline:
+                del self.jobs[job.id]
+
+    def wait(self, job, version, timeout):
+        """等待任务版本号变化，返回最新版本号"""
+        with self.condition:
+            self.condition.wait_for(lambda: job.version != version, timeout=timeout)
+            return job.version
+
+    def iter_events(self, job, keepalive=15):
+        """以Server-Sent Events格式输出任务进度，任务结束后停止"""
+        version = -1
+        while True:
+            current = self.wait(job, version, keepalive)
+            if current == version:
+                # 长时间无进度时发送注释行保持连接
+                yield ": keepalive\n\n"
+                continue
+            version = current
+            finished = job.status in (DONE, FAILED)
+            event = "result" if finished else "progress"
+            yield f"event: {event}\ndata: {json.dumps(job.to_dict(include_result=finished), ensure_ascii=False)}\n\n"
+            if finished:
+                return
+
+    def stats(self):
+        with self.condition:
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self.jobs.values():
+                counts[job.status] += 1
+        return {"max_workers": self.max_workers, "max_pending": self.max_pending, "max_finished": self.max_finished, "jobs": counts}
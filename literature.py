@@ -1,19 +1,142 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, g, request, jsonify, send_file
 import json
+import logging
 import time
-import csv
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import io
 import base64
+import zlib
 import requests
-from datetime import datetime
-import urllib.parse
-import xml.etree.ElementTree as ET
+from datetime import datetime, timedelta
+from eutils import HistoryInvalid, client_from_env
+from search_cache import SearchCache, normalize_strategy, split_and_blocks
+from article_store import ArticleStore
+from jobs import JobManager, JobQueueFull, QUEUED, RUNNING, DONE
+from abstracts import fetch_abstracts
+from saved_searches import SavedSearchStore, SavedSearchNotConfigured
+from result_views import ResultViewRegistry, FACET_FIELDS
+from metrics import REGISTRY, SIZE_BUCKETS, CONTENT_TYPE
+from coalesce import SingleFlight, MemoizedSingleFlight, StreamFlight
+from dedup import deduplicate, TITLE_THRESHOLD
+from export_jobs import ExportStore, ExportsNotConfigured, export_summary
+from search_audit import SearchAuditLog, SearchHistoryNotConfigured
+from fulltext_index import FulltextIndex, FulltextIndexNotConfigured
+from records import parse_esummary_article, encode_csv, encode_ndjson, write_csv
+from strategy_backends import (
+    StrategyStreamParser, backend_from_env, keyword_span, parse_strategy_response, validate_strategy
+)
 
 literature_bp = Blueprint("literature", __name__)
 
+logger = logging.getLogger(__name__)
+
+# 检索各阶段耗时：esearch、efetch_uilist、esummary（HTTP与JSON解码）、parse、article_store、abstracts、csv_write、base64、result_view，
+# 以及检索策略生成的strategy_model（完整生成）与strategy_first_field（流式输出中search_strategy完整的时间）
+STAGE_SECONDS = REGISTRY.histogram("search_stage_seconds", "检索各阶段耗时", ("stage",))
+HTTP_REQUESTS = REGISTRY.counter("http_requests_total", "接口请求次数", ("endpoint", "method", "status"))
+HTTP_SECONDS = REGISTRY.histogram("http_request_seconds", "接口处理耗时（流式响应不含传输时间）", ("endpoint",))
+HTTP_RESPONSE_BYTES = REGISTRY.histogram("http_response_bytes", "接口响应大小（不含流式响应）", ("endpoint",), buckets=SIZE_BUCKETS)
+HTTP_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "正在处理的接口请求数", ("endpoint",))
+SEARCH_JOBS = REGISTRY.gauge("search_jobs", "后台任务数量", ("status",))
+EXPORT_JOBS = REGISTRY.gauge("export_jobs", "后台导出任务数量", ("status",))
+SEARCH_CACHE_ENTRIES = REGISTRY.gauge("search_cache_entries", "内存缓存中的检索结果数量")
+COALESCED_REQUESTS = REGISTRY.counter("coalesced_requests_total", "共享进行中相同请求结果的次数", ("kind",))
+
 # PubMed E-utilities基础URL
 PUBMED_BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
 
+# 使用History Server时每次ESummary请求的PMID数量
+ESUMMARY_BATCH_SIZE = 500
+
+# 超过该数量的PMID列表改用POST提交，避免URL过长
+ESUMMARY_GET_MAX_IDS = 200
+
+# 单次ESearch返回的PMID数量上限（NCBI限制为10000）
+ESEARCH_ID_PAGE_SIZE = 10000
+
+# 批量检索同时执行的流程数量与单次提交的最大项数
+BULK_CONCURRENCY = 8
+BULK_MAX_ITEMS = 50
+
+# 命中数预览的并发请求数与最多拆分的检索块数量
+PREVIEW_CONCURRENCY = 6
+PREVIEW_MAX_BLOCKS = 12
+
+# /api/deduplicate单次提交的最大记录数
+DEDUP_MAX_RECORDS = 200000
+
+# 继续导出任务时，超过此时间（秒）的WebEnv重新通过ESearch获取；NCBI会清理长时间未使用的History
+EXPORT_WEBENV_MAX_AGE = 3600
+
+EUTILS_TOOL_PARAMS = {
+    "tool": "literature_search_tool",
+    "email": "developer@example.com"
+}
+
+# 所有路由共用的E-utilities客户端（连接池、限流、重试）
+eutils_client = client_from_env()
+
+# 检索结果缓存，持久层由main.py调用search_cache.init_app(app)启用
+search_cache = SearchCache()
+
+# 按PMID保存的文献记录，由main.py调用article_store.init_app(app)启用
+article_store = ArticleStore()
+
+# 后台检索任务队列，长时间的检索不再占用请求线程
+job_manager = JobManager()
+
+# 导出任务使用单独的线程池，耗时很长的导出不会占满检索任务的线程
+export_job_manager = JobManager(max_workers=2, thread_name_prefix="export-job")
+
+# 定期更新的已保存检索，由main.py调用saved_search_store.init_app(app)启用
+saved_search_store = SavedSearchStore()
+
+# 服务器端保存的检索结果，供分页、排序与分面查询
+result_views = ResultViewRegistry()
+
+# 检索策略生成后端，由环境变量STRATEGY_BACKEND选择，默认使用本地stub
+strategy_backend = backend_from_env()
+
+# 按关键词缓存生成的检索策略，相同关键词的并发请求共用一次生成
+strategy_cache = MemoizedSingleFlight(max_entries=256, ttl=86400)
+
+# 合并相同关键词的并发流式策略生成，后到的请求读取同一组SSE事件
+strategy_streams = StreamFlight()
+
+# 合并缓存未命中时相同检索的并发请求
+search_flight = SingleFlight()
+
+# 检索命中数缓存，键为规范化后的检索策略
+count_cache = MemoizedSingleFlight(max_entries=1024, ttl=3600)
+
+# 可断点续传的导出任务检查点，由main.py调用export_store.init_app(app)启用
+export_store = ExportStore()
+
+# 检索日志（PRISMA检索记录），由main.py调用search_audit_log.init_app(app)启用，后台线程批量写入
+search_audit_log = SearchAuditLog()
+
+# 检索过的文献记录的本地全文索引，由main.py调用fulltext_index.init_app(app)启用
+fulltext_index = FulltextIndex()
+
+# 本进程中各导出任务最近一次提交的后台任务，避免同一导出被重复执行
+export_jobs = {}
+export_jobs_lock = threading.Lock()
+
+# 结果查询每页最多返回的记录数
+RESULT_PAGE_MAX = 500
+
+# 导出结果的字段顺序
+RESULT_FIELDNAMES = ["PMID", "Title", "Authors", "Journal", "Publication_Date", "DOI", "Abstract", "Study_Type", "URL"]
+
+# 启用摘要补充时追加的字段
+ENRICHED_FIELDNAMES = RESULT_FIELDNAMES + ["MeSH_Terms", "Publication_Types"]
+
+def build_prompt(keyword):
+    """根据用户新的要求生成Prompt"""
+    prompt = f"""请为疾病或干预方式：{keyword} 为主题生成一段可以用于PubMed的文献检索策略，以获得卫生技术评估相关的所有文献。\n\n请以JSON格式返回结果，包含以下字段： \n{{\n    "search_strategy": "完整的PubMed搜索策略", \n    "explanation": "搜索策略的详细说明", \n    "keywords_analysis": {{\n        "disease": "识别出的疾病/病症", \n        "intervention": "识别出的干预措施", \n        "population": "识别出的目标人群", \n        "study_type": "推荐的研究类型" \n    }}, \n    "estimated_results": "预估检索结果数量范围", \n    "mesh_terms": ["相关的MeSH术语列表"], \n    "search_tips": "检索优化建议" \n}}\n\n请确保搜索策略专业、准确、全面。特别需要注意：不要在"search_strategy"中出现"\\n", 或""符号。"""
+    return prompt
+
 @literature_bp.route("/generate_prompt", methods=["POST"])
 def generate_prompt():
     """生成用于AI模型的Prompt"""
@@ -24,55 +147,463 @@ def generate_prompt():
         if not keyword:
             return jsonify({"error": "关键词不能为空"}), 400
         
-        # 根据用户新的要求生成Prompt
-        prompt = f"""请为疾病或干预方式：{keyword} 为主题生成一段可以用于PubMed的文献检索策略，以获得卫生技术评估相关的所有文献。\n\n请以JSON格式返回结果，包含以下字段： \n{{\n    "search_strategy": "完整的PubMed搜索策略", \n    "explanation": "搜索策略的详细说明", \n    "keywords_analysis": {{\n        "disease": "识别出的疾病/病症", \n        "intervention": "识别出的干预措施", \n        "population": "识别出的目标人群", \n        "study_type": "推荐的研究类型" \n    }}, \n    "estimated_results": "预估检索结果数量范围", \n    "mesh_terms": ["相关的MeSH术语列表"], \n    "search_tips": "检索优化建议" \n}}\n\n请确保搜索策略专业、准确、全面。特别需要注意：不要在"search_strategy"中出现"\\n", 或""符号。"""
+        prompt = build_prompt(keyword)
         
         return jsonify({"prompt": prompt})
         
     except Exception as e:
         return jsonify({"error": f"生成Prompt失败: {str(e)}"}), 500
 
+def strategy_cache_key(prompt):
+    """由build_prompt生成的Prompt按规范化关键词（合并空白、忽略大小写）缓存，其他Prompt按合并空白后的全文缓存"""
+    span = keyword_span(prompt)
+    if span and prompt == build_prompt(prompt[span[0]:span[1]]):
+        return "keyword:" + " ".join(prompt[span[0]:span[1]].split()).casefold()
+    return "prompt:" + " ".join(prompt.split())
+
+def generate_ai_strategy(prompt):
+    """生成检索策略，返回(响应字典, HTTP状态码)
+    
+    相同关键词的结果在strategy_cache中保存，并发的相同请求共用一次生成。
+    """
+    prompt = prompt.strip()
+    
+    if not prompt:
+        return {"error": "Prompt不能为空"}, 400
+    
+    (result, status_code), cache_status = strategy_cache.get_or_compute(
+        strategy_cache_key(prompt), run_strategy_model, prompt, cacheable=lambda value: value[1] == 200
+    )
+    if cache_status == "coalesced":
+        COALESCED_REQUESTS.inc(kind="strategy")
+    return {**result, "cache": cache_status}, status_code
+
+def run_strategy_model(prompt):
+    """调用检索策略模型后端并解析输出，返回(响应字典, HTTP状态码)"""
+    with STAGE_SECONDS.time(stage="strategy_model"):
+        text = strategy_backend.generate(prompt)
+    try:
+        ai_response = parse_strategy_response(text)
+    except ValueError as e:
+        logger.error("AI策略解析失败: %s", e)
+        return {"error": f"AI策略解析失败: {str(e)}"}, 502
+    return strategy_result(ai_response), 200
+
+def strategy_result(ai_response):
+    problems = validate_strategy(ai_response["search_strategy"])
+    return {"ai_response": ai_response, "validation": {"valid": not problems, "problems": problems}}
+
 @literature_bp.route("/get_ai_strategy", methods=["POST"])
 def get_ai_strategy():
     """模拟AI模型生成检索策略"""
     try:
         data = request.get_json()
-        prompt = data.get("prompt", "").strip()
+        result, status_code = generate_ai_strategy(data.get("prompt", ""))
+        return jsonify(result), status_code
         
-        if not prompt:
-            return jsonify({"error": "Prompt不能为空"}), 400
-        
-        # 模拟AI调用延迟
-        time.sleep(2)
-        
-        # 从prompt中提取关键词
-        keyword_start = prompt.find("疾病或干预方式：") + len("疾病或干预方式：")
-        keyword_end = prompt.find(" 为主题", keyword_start)
-        keyword = prompt[keyword_start:keyword_end].strip()
-        
-        # 模拟AI生成的JSON结果
-        ai_response = {
-            "search_strategy": f"(\"{keyword}\" [MeSH Terms] OR {keyword} [Text Word]) AND (health technology assessment [MeSH Terms] OR HTA [Text Word]) AND (clinical trial [pt] OR randomized controlled trial [pt] OR systematic review [pt] OR meta-analysis [pt] OR cohort studies [pt] OR real world evidence [Text Word]) AND ((\"2015/01/01\"[Date - Publication] : \"3000/12/31\"[Date - Publication])) AND (English [Language])",
-            "explanation": f"本检索策略针对关键词 \"{keyword}\" 设计，结合了疾病相关术语、卫生技术评估相关术语、高质量研究类型限制、时间限制和语言限制。策略包含了临床有效性、安全性、经济性评价以及生命质量相关的结局指标，同时涵盖了流行病学和卫生经济学评价的关键要素。",
-            "keywords_analysis": {
-                "disease": keyword,
-                "intervention": "相关干预措施（药物治疗、非药物治疗、医疗器械等）",
-                "population": "成年患者群体",
-                "study_type": "随机对照试验、系统评价、Meta分析、队列研究、真实世界研究"
-            },
-            "estimated_results": "500-2000篇文献",
-            "mesh_terms": [keyword, "Health Technology Assessment", "Cost-Effectiveness Analysis", "Quality of Life", "Clinical Effectiveness", "Safety", "Economic Evaluation"],
-            "search_tips": "建议根据实际检索结果调整检索词的组合方式，如果结果过多可以增加更具体的限制条件，如果结果过少可以减少部分限制或使用更广泛的同义词。可以考虑分步检索，先检索核心概念，再逐步添加限制条件。"
+    except Exception as e:
+        return jsonify({"error": f"AI策略生成失败: {str(e)}"}), 500
+
+def format_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def produce_strategy_events(emit, prompt, cache_key):
+    """执行一次流式生成，将(事件名, 数据)依次交给emit；成功的结果写入strategy_cache"""
+    cached = strategy_cache.get(cache_key)
+    if cached is None:
+        started = time.perf_counter()
+        parser = StrategyStreamParser()
+        try:
+            for chunk in strategy_backend.stream(prompt):
+                emit(("token", {"text": chunk}))
+                strategy = parser.feed(chunk)
+                if strategy is not None:
+                    STAGE_SECONDS.observe(time.perf_counter() - started, stage="strategy_first_field")
+                    problems = validate_strategy(strategy)
+                    emit(("search_strategy", {"search_strategy": strategy, "valid": not problems, "problems": problems}))
+            STAGE_SECONDS.observe(time.perf_counter() - started, stage="strategy_model")
+            result = strategy_result(parse_strategy_response(parser.text))
+        except Exception as e:
+            logger.exception("AI策略流式生成失败: %s", e)
+            emit(("error", {"error": f"AI策略生成失败: {str(e)}"}))
+            return
+        strategy_cache.put(cache_key, (result, 200))
+        streamed_strategy = parser.search_strategy is not None
+    else:
+        # 等待期间另一次生成已完成并写入缓存
+        result, _ = cached
+        streamed_strategy = False
+    
+    if not streamed_strategy:
+        # 字段未能在流中提前识别（如格式不同），在结果前补发
+        emit(("search_strategy", {"search_strategy": result["ai_response"]["search_strategy"], **result["validation"]}))
+    emit(("result", result))
+
+def iter_strategy_events(prompt, cache_key):
+    """以SSE输出检索策略生成过程
+    
+    token事件为模型输出的文本片段；search_strategy字段完整后立即推送search_strategy事件（含校验结果），
+    生成结束后推送result事件，失败时推送error事件。缓存命中时直接推送结果；
+    相同关键词的并发请求共用一次生成，后到的请求从头收到同样的事件。
+    """
+    cached = strategy_cache.get(cache_key)
+    if cached is not None:
+        result, _ = cached
+        yield format_sse("search_strategy", {"search_strategy": result["ai_response"]["search_strategy"], **result["validation"]})
+        yield format_sse("result", {**result, "cache": "hit"})
+        return
+    
+    stream, shared = strategy_streams.open(cache_key, produce_strategy_events, prompt, cache_key)
+    if shared:
+        COALESCED_REQUESTS.inc(kind="strategy")
+    cache_status = "coalesced" if shared else "miss"
+    try:
+        for event, data in stream:
+            if event == "result":
+                data = {**data, "cache": cache_status}
+            yield format_sse(event, data)
+    except Exception as e:
+        yield format_sse("error", {"error": f"AI策略生成失败: {str(e)}"})
+
+@literature_bp.route("/stream_ai_strategy", methods=["POST"])
+def stream_ai_strategy():
+    """以Server-Sent Events流式返回检索策略生成过程"""
+    data = request.get_json(silent=True) or {}
+    prompt = data.get("prompt", "").strip()
+    
+    if not prompt:
+        return jsonify({"error": "Prompt不能为空"}), 400
+    
+    return Response(
+        iter_strategy_events(prompt, strategy_cache_key(prompt)),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def parse_esummary_batch(summary_data, pmid_list):
+    """按PMID顺序将ESummary响应解析为Record列表"""
+    results = []
+    with STAGE_SECONDS.time(stage="parse"):
+        if "result" in summary_data:
+            for pmid in pmid_list:
+                if pmid in summary_data["result"]:
+                    results.append(parse_esummary_article(pmid, summary_data["result"][pmid]))
+    return results
+
+def esearch_history(query):
+    """使用ESearch将检索结果存入History Server，返回(WebEnv, query_key, 总数, PMID列表)
+    
+    启用文献库时同一次请求带回前ESEARCH_ID_PAGE_SIZE个PMID，供按PMID分批读取文献库；否则PMID列表为空。
+    """
+    search_params = {
+        "db": "pubmed",
+        "term": query,
+        "retmax": ESEARCH_ID_PAGE_SIZE if article_store.enabled else 0,
+        "usehistory": "y",
+        "retmode": "json",
+        **EUTILS_TOOL_PARAMS
+    }
+    
+    with STAGE_SECONDS.time(stage="esearch"):
+        search_response = eutils_client.get(f"{PUBMED_BASE_URL}esearch.fcgi", params=search_params, timeout=30)
+        search_data = search_response.json()
+    
+    esearch_result = search_data.get("esearchresult")
+    if not esearch_result or "webenv" not in esearch_result:
+        raise ValueError(f"搜索结果格式错误: {search_data}")
+    
+    return esearch_result["webenv"], esearch_result["querykey"], int(esearch_result.get("count", 0)), esearch_result.get("idlist", [])
+
+def index_records(records):
+    """将新获取的记录增量写入本地全文索引；索引失败只记录日志，不影响检索"""
+    if not fulltext_index.enabled:
+        return
+    try:
+        with STAGE_SECONDS.time(stage="fulltext_index"):
+            fulltext_index.add(records)
+    except Exception as e:
+        logger.warning("写入本地全文索引失败: %s", e)
+
+def esummary_by_ids(pmid_list):
+    """按PMID列表调用ESummary并解析结果"""
+    summary_url = f"{PUBMED_BASE_URL}esummary.fcgi"
+    results = []
+    for start in range(0, len(pmid_list), ESUMMARY_BATCH_SIZE):
+        chunk = pmid_list[start:start + ESUMMARY_BATCH_SIZE]
+        summary_params = {
+            "db": "pubmed",
+            "id": ",".join(chunk),
+            "retmode": "json",
+            **EUTILS_TOOL_PARAMS
+        }
+        with STAGE_SECONDS.time(stage="esummary"):
+            if len(chunk) > ESUMMARY_GET_MAX_IDS:
+                summary_response = eutils_client.post(summary_url, data=summary_params, timeout=30)
+            else:
+                summary_response = eutils_client.get(summary_url, params=summary_params, timeout=30)
+            summary_data = summary_response.json()
+        batch = parse_esummary_batch(summary_data, chunk)
+        index_records(batch)
+        results.extend(batch)
+    return results
+
+def fetch_articles(pmid_list):
+    """获取PMID对应的文献记录，文献库中未过期的记录不再请求ESummary"""
+    with STAGE_SECONDS.time(stage="article_store"):
+        stored = article_store.get_many(pmid_list)
+    missing = [pmid for pmid in pmid_list if pmid not in stored]
+    if stored:
+        logger.debug("文献库命中 %d 篇，需获取 %d 篇", len(stored), len(missing))
+    if missing:
+        fetched = esummary_by_ids(missing)
+        with STAGE_SECONDS.time(stage="article_store"):
+            article_store.upsert_many(fetched)
+        for record in fetched:
+            stored[record["PMID"]] = record
+    return [stored[pmid] for pmid in pmid_list if pmid in stored]
+
+def enrich_with_abstracts(results):
+    """通过EFetch补充摘要、MeSH主题词与完整出版类型，就地修改并返回results
+    
+    文献库中已补充过的记录（带有MeSH_Terms字段）不再请求EFetch。
+    """
+    pending = [record for record in results if "MeSH_Terms" not in record]
+    if not pending:
+        return results
+    with STAGE_SECONDS.time(stage="abstracts"):
+        details = fetch_abstracts(eutils_client, PUBMED_BASE_URL, [record["PMID"] for record in pending], EUTILS_TOOL_PARAMS)
+    for record in pending:
+        info = details.get(record["PMID"])
+        if info is None:
+            record.setdefault("MeSH_Terms", "")
+            record.setdefault("Publication_Types", "")
+            continue
+        record["Abstract"] = info["abstract"]
+        record["MeSH_Terms"] = "; ".join(info["mesh_terms"])
+        record["Publication_Types"] = "; ".join(info["publication_types"])
+    # 摘要写回文献库，后续检索可以直接读取
+    article_store.upsert_many(pending)
+    index_records(pending)
+    return results
+
+def efetch_uilist(webenv, query_key, retstart, retmax):
+    """从History Server获取一段PMID列表"""
+    fetch_params = {
+        "db": "pubmed",
+        "query_key": query_key,
+        "WebEnv": webenv,
+        "retstart": retstart,
+        "retmax": retmax,
+        "rettype": "uilist",
+        "retmode": "text",
+        **EUTILS_TOOL_PARAMS
+    }
+    with STAGE_SECONDS.time(stage="efetch_uilist"):
+        try:
+            fetch_response = eutils_client.get(f"{PUBMED_BASE_URL}efetch.fcgi", params=fetch_params, timeout=30)
+        except requests.exceptions.HTTPError as e:
+            # 失效的WebEnv/query_key返回400
+            if e.response is not None and e.response.status_code == 400:
+                raise HistoryInvalid(f"PMID列表获取失败（WebEnv/query_key已失效）: {e}") from e
+            raise
+        text = fetch_response.text
+    if "<ERROR>" in text:
+        raise HistoryInvalid(f"PMID列表获取失败（WebEnv/query_key已失效）: {text.strip()}")
+    return text.split()
+
+def esearch_count(query):
+    """只获取检索命中数（rettype=count），不返回PMID"""
+    search_params = {
+        "db": "pubmed",
+        "term": query,
+        "rettype": "count",
+        "retmode": "json",
+        **EUTILS_TOOL_PARAMS
+    }
+    with STAGE_SECONDS.time(stage="esearch_count"):
+        search_response = eutils_client.get(f"{PUBMED_BASE_URL}esearch.fcgi", params=search_params, timeout=30)
+        search_data = search_response.json()
+    
+    esearch_result = search_data.get("esearchresult")
+    if not esearch_result or "count" not in esearch_result:
+        raise ValueError(f"搜索结果格式错误: {search_data}")
+    return int(esearch_result["count"])
+
+def cached_count(query):
+    """带缓存的命中数，返回(命中数, 缓存状态)"""
+    return count_cache.get_or_compute(normalize_strategy(query), esearch_count, query)
+
+def preview_search_counts(search_strategy):
+    """并发获取整个策略、各顶层AND检索块及逐块累加后的命中数，返回(响应字典, HTTP状态码)"""
+    blocks = split_and_blocks(search_strategy)[:PREVIEW_MAX_BLOCKS]
+    prefixes = [" AND ".join(f"({block})" for block in blocks[:i + 1]) for i in range(len(blocks))]
+    # 第一个前缀与第一个检索块、最后一个前缀与整个策略等价，规范化后相同的查询只请求一次
+    queries = {}
+    for query in [search_strategy] + blocks + prefixes:
+        queries.setdefault(normalize_strategy(query), query)
+    
+    def count_query(query):
+        try:
+            count, cache_status = cached_count(query)
+            return {"count": count, "cache": cache_status}
+        except Exception as e:
+            return {"error": f"获取命中数失败: {str(e)}"}
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(PREVIEW_CONCURRENCY, len(queries)), thread_name_prefix="count-preview") as executor:
+        counts = dict(zip(queries, executor.map(count_query, queries.values())))
+    
+    total = counts[normalize_strategy(search_strategy)]
+    if "error" in total:
+        return {"error": total["error"]}, 500
+    
+    block_details = []
+    previous = None
+    for block, prefix in zip(blocks, prefixes):
+        block_count = counts[normalize_strategy(block)]
+        prefix_count = counts[normalize_strategy(prefix)]
+        detail = {
+            "clause": block,
+            "count": block_count.get("count"),
+            "cumulative_query": prefix,
+            "cumulative_count": prefix_count.get("count"),
+        }
+        # 加入本块后剩余的比例，越小说明该块限制越强
+        if previous and prefix_count.get("count") is not None:
+            detail["retained_ratio"] = round(prefix_count["count"] / previous, 4)
+        errors = [c["error"] for c in (block_count, prefix_count) if "error" in c]
+        if errors:
+            detail["error"] = errors[0]
+        block_details.append(detail)
+        previous = prefix_count.get("count")
+    
+    return {
+        "search_strategy": search_strategy,
+        "total_count": total["count"],
+        "blocks": block_details,
+        "queries": len(queries),
+        "cache_hits": sum(1 for c in counts.values() if c.get("cache") == "hit"),
+        "elapsed_seconds": round(time.perf_counter() - started, 3)
+    }, 200
+
+def collect_pmids(query, **extra_params):
+    """只获取检索命中的PMID列表（不取记录详情），返回(PMID列表, 总数)
+    
+    extra_params可传入datetype/mindate/maxdate等日期限制；超过一页时通过History Server分页。
+    """
+    search_params = {
+        "db": "pubmed",
+        "term": query,
+        "retmax": ESEARCH_ID_PAGE_SIZE,
+        "usehistory": "y",
+        "retmode": "json",
+        **extra_params,
+        **EUTILS_TOOL_PARAMS
+    }
+    with STAGE_SECONDS.time(stage="esearch"):
+        search_response = eutils_client.get(f"{PUBMED_BASE_URL}esearch.fcgi", params=search_params, timeout=30)
+        search_data = search_response.json()
+    
+    esearch_result = search_data.get("esearchresult")
+    if not esearch_result:
+        raise ValueError(f"搜索结果格式错误: {search_data}")
+    
+    pmids = list(esearch_result.get("idlist", []))
+    total_count = int(esearch_result.get("count", 0))
+    while len(pmids) < total_count:
+        page = efetch_uilist(esearch_result["webenv"], esearch_result["querykey"], len(pmids), ESEARCH_ID_PAGE_SIZE)
+        if not page:
+            break
+        pmids.extend(page)
+    return pmids, total_count
+
+def iter_history_pmid_batches(webenv, query_key, count, batch_size, start=0, pmids=None):
+    """按batch_size分组产出History Server中[start, count)范围的PMID
+    
+    pmids为ESearch已返回的前若干个PMID（自位置0起）；其余PMID每次通过EFetch获取ESEARCH_ID_PAGE_SIZE个，
+    不再每批单独请求一次PMID列表。
+    """
+    pending = list(pmids or ())[start:count]
+    position = start + len(pending)
+    while pending or position < count:
+        if len(pending) < batch_size and position < count:
+            page = efetch_uilist(webenv, query_key, position, min(ESEARCH_ID_PAGE_SIZE, count - position))
+            if page:
+                pending.extend(page)
+                position += len(page)
+                continue
+            # History中没有更多PMID
+            position = count
+            if not pending:
+                break
+        yield pending[:batch_size]
+        del pending[:batch_size]
+
+def iter_esummary_batches(webenv, query_key, count, batch_size=ESUMMARY_BATCH_SIZE, start=0, pmids=None):
+    """从History Server分批获取ESummary记录，每批产出一个结果列表
+    
+    启用文献库时按PMID分批，只对缺失或过期的PMID请求ESummary；pmids为ESearch已返回的PMID列表，
+    start为起始偏移量。
+    """
+    if article_store.enabled:
+        for pmid_list in iter_history_pmid_batches(webenv, query_key, count, batch_size, start, pmids):
+            yield fetch_articles(pmid_list)
+        return
+    
+    for retstart in range(start, count, batch_size):
+        retmax = min(batch_size, count - retstart)
+        summary_params = {
+            "db": "pubmed",
+            "query_key": query_key,
+            "WebEnv": webenv,
+            "retstart": retstart,
+            "retmax": retmax,
+            "retmode": "json",
+            **EUTILS_TOOL_PARAMS
         }
         
-        return jsonify({"ai_response": ai_response})
+        with STAGE_SECONDS.time(stage="esummary"):
+            summary_response = eutils_client.get(f"{PUBMED_BASE_URL}esummary.fcgi", params=summary_params, timeout=30)
+            summary_data = summary_response.json()
         
-    except Exception as e:
-        return jsonify({"error": f"AI策略生成失败: {str(e)}"}), 500
+        if "result" not in summary_data:
+            # 失效的WebEnv/query_key返回{"error": ...}或{"esummaryresult": [...]}，而不是HTTP错误
+            if "error" in summary_data or "esummaryresult" in summary_data:
+                raise HistoryInvalid(f"摘要结果格式错误（WebEnv/query_key已失效）: {summary_data}")
+            raise ValueError(f"摘要结果格式错误: {summary_data}")
+        
+        pmid_list = summary_data["result"].get("uids", [])
+        if not pmid_list:
+            break
+        batch = parse_esummary_batch(summary_data, pmid_list)
+        index_records(batch)
+        yield batch
 
-def search_pubmed(query, retmax=100):
-    """使用PubMed E-utilities API进行检索"""
+def search_pubmed(query, retmax=100, fetch_all=False, batch_size=ESUMMARY_BATCH_SIZE, progress=None):
+    """使用PubMed E-utilities API进行检索
+    
+    fetch_all为True时通过History Server（WebEnv/query_key）分批获取全部结果，
+    此时retmax为获取数量上限，None表示不设上限。progress(fetched, total)在每批完成后调用。
+    """
     try:
+        if fetch_all:
+            logger.info("正在搜索PubMed（History模式）: %s", query)
+            webenv, query_key, total_count, pmids = esearch_history(query)
+            limit = total_count if retmax is None else min(retmax, total_count)
+            
+            logger.info("找到 %d 篇文献，分批获取前 %d 篇详细信息", total_count, limit)
+            
+            results = []
+            if progress:
+                progress(0, limit)
+            for batch in iter_esummary_batches(webenv, query_key, limit, batch_size, pmids=pmids):
+                results.extend(batch)
+                if progress:
+                    progress(len(results), limit)
+            
+            logger.info("成功解析 %d 篇文献信息", len(results))
+            return results, total_count
+        
         # 第一步：使用ESearch获取PMID列表
         search_url = f"{PUBMED_BASE_URL}esearch.fcgi"
         search_params = {
@@ -80,167 +611,1012 @@ def search_pubmed(query, retmax=100):
             "term": query,
             "retmax": retmax,
             "retmode": "json",
-            "tool": "literature_search_tool",
-            "email": "developer@example.com"
+            **EUTILS_TOOL_PARAMS
         }
         
-        print(f"正在搜索PubMed: {query}")
-        search_response = requests.get(search_url, params=search_params, timeout=30)
-        search_response.raise_for_status()
-        search_data = search_response.json()
+        logger.info("正在搜索PubMed: %s", query)
+        with STAGE_SECONDS.time(stage="esearch"):
+            search_response = eutils_client.get(search_url, params=search_params, timeout=30)
+            search_data = search_response.json()
         
         if "esearchresult" not in search_data:
-            print(f"PubMed ESearch结果格式错误: {search_data}")
+            logger.error("PubMed ESearch结果格式错误: %s", search_data)
             return None, "搜索结果格式错误"
         
         pmid_list = search_data["esearchresult"].get("idlist", [])
         total_count = int(search_data["esearchresult"].get("count", 0))
         
-        print(f"找到 {total_count} 篇文献，获取前 {len(pmid_list)} 篇详细信息")
+        logger.info("找到 %d 篇文献，获取前 %d 篇详细信息", total_count, len(pmid_list))
         
         if not pmid_list:
             return [], total_count
         
-        # 第二步：使用ESummary获取文献摘要信息
-        summary_url = f"{PUBMED_BASE_URL}esummary.fcgi"
-        summary_params = {
-            "db": "pubmed",
-            "id": ",".join(pmid_list),
-            "retmode": "json",
-            "tool": "literature_search_tool",
-            "email": "developer@example.com"
-        }
+        # 第二步：使用ESummary获取文献摘要信息（文献库中已有的记录直接读取）
+        if progress:
+            progress(0, len(pmid_list))
+        results = fetch_articles(pmid_list)
+        if progress:
+            progress(len(results), len(pmid_list))
         
-        summary_response = requests.get(summary_url, params=summary_params, timeout=30)
-        summary_response.raise_for_status()
-        summary_data = summary_response.json()
-        
-        # 解析结果
-        results = []
-        if "result" in summary_data:
-            for pmid in pmid_list:
-                if pmid in summary_data["result"]:
-                    article = summary_data["result"][pmid]
-                    
-                    # 提取作者信息
-                    authors = []
-                    if "authors" in article:
-                        for author in article["authors"][:3]:  # 只取前3个作者
-                            authors.append(author.get("name", ""))
-                    author_str = ", ".join(authors)
-                    if len(article.get("authors", [])) > 3:
-                        author_str += " et al"
-                    
-                    # 提取期刊信息
-                    journal = article.get("fulljournalname", article.get("source", ""))
-                    
-                    # 提取发表日期
-                    pub_date = article.get("pubdate", "")
-                    
-                    # 提取DOI
-                    doi = ""
-                    if "articleids" in article:
-                        for article_id in article["articleids"]:
-                            if article_id.get("idtype") == "doi":
-                                doi = article_id.get("value", "")
-                                break
-                    
-                    # 确定研究类型
-                    study_type = ""
-                    if "pubtype" in article:
-                        pub_types = [pt for pt in article["pubtype"]]
-                        if "Randomized Controlled Trial" in pub_types:
-                            study_type = "RCT"
-                        elif "Systematic Review" in pub_types:
-                            study_type = "Systematic Review"
-                        elif "Meta-Analysis" in pub_types:
-                            study_type = "Meta-Analysis"
-                        elif "Review" in pub_types:
-                            study_type = "Review"
-                        else:
-                            study_type = "Original Research"
-                    
-                    result = {
-                        "PMID": pmid,
-                        "Title": article.get("title", ""),
-                        "Authors": author_str,
-                        "Journal": journal,
-                        "Publication_Date": pub_date,
-                        "DOI": doi,
-                        "Abstract": "",  # ESummary不包含摘要，需要EFetch获取
-                        "Study_Type": study_type,
-                        "URL": f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/"
-                    }
-                    results.append(result)
-        
-        print(f"成功解析 {len(results)} 篇文献信息")
+        logger.info("成功解析 %d 篇文献信息", len(results))
         return results, total_count
         
     except requests.exceptions.RequestException as e:
-        print(f"网络请求错误: {str(e)}")
+        logger.error("网络请求错误: %s", e)
         return None, f"网络请求错误: {str(e)}"
     except Exception as e:
-        print(f"检索过程中发生错误: {str(e)}")
+        logger.exception("检索过程中发生错误: %s", e)
         return None, f"检索过程中发生错误: {str(e)}"
 
+def parse_retmax(value):
+    """校验retmax参数，None表示不设上限"""
+    if value is None:
+        return None
+    try:
+        retmax = int(value)
+    except (TypeError, ValueError):
+        raise ValueError("retmax必须为正整数")
+    if retmax <= 0:
+        raise ValueError("retmax必须为正整数")
+    return retmax
+
+def retrieve_pubmed_results(search_strategy, retmax, fetch_all, include_abstracts=False, no_cache=False, progress=None):
+    """带缓存的检索，返回(results, total_count, 缓存状态)；失败时results为None，total_count为错误信息"""
+    cache_key = search_cache.make_key(search_strategy, retmax, fetch_all, include_abstracts)
+    cached = None if no_cache else search_cache.get(cache_key)
+    if cached is not None:
+        results, total_count = cached
+        return results, total_count, "hit"
+    
+    def compute():
+        results, total_count = search_pubmed(search_strategy, retmax=retmax, fetch_all=fetch_all, progress=progress)
+        if results is None:
+            return None, total_count
+        
+        if include_abstracts:
+            enrich_with_abstracts(results)
+        
+        search_cache.put(cache_key, (results, total_count))
+        return results, total_count
+    
+    # 相同检索的并发请求共用一次检索，等待的请求不再单独报告进度
+    (results, total_count), shared = search_flight.do(cache_key, compute)
+    if shared:
+        COALESCED_REQUESTS.inc(kind="search")
+    if results is None:
+        return None, total_count, "miss"
+    return results, total_count, "coalesced" if shared else ("bypass" if no_cache else "miss")
+
+def encode_csv_base64(results, fieldnames=RESULT_FIELDNAMES):
+    """将结果按fieldnames转换为CSV并编码为base64
+    
+    列固定由fieldnames决定：文献库中的记录可能带有未请求的补充字段（如MeSH_Terms），不应改变导出的列。
+    """
+    with STAGE_SECONDS.time(stage="csv_write"):
+        output = io.StringIO()
+        write_csv(output, results, fieldnames)
+        csv_content = output.getvalue()
+        output.close()
+    
+    with STAGE_SECONDS.time(stage="base64"):
+        return base64.b64encode(csv_content.encode("utf-8")).decode("utf-8")
+
+def parse_flag(value):
+    """解析JSON布尔值或查询字符串中的开关参数"""
+    if isinstance(value, bool):
+        return value
+    return str(value or "").lower() in ("1", "true", "yes")
+
+def parse_search_options(data):
+    """解析检索选项，返回(retmax, fetch_all, include_abstracts)，参数无效时抛出ValueError"""
+    # fetch_all模式下retmax为获取上限，不传表示获取全部结果
+    fetch_all = parse_flag(data.get("fetch_all"))
+    retmax = parse_retmax(data.get("retmax", None if fetch_all else 100))
+    # 单次ESummary请求的PMID数量有限，超出时改用History Server分批获取
+    if retmax is not None and retmax > ESUMMARY_BATCH_SIZE:
+        fetch_all = True
+    return retmax, fetch_all, parse_flag(data.get("include_abstracts"))
+
+def audit_search(search_strategy, tool, **fields):
+    """将一次检索写入检索日志（PRISMA检索记录）；单次检索、批量检索、已保存检索的更新与导出共用"""
+    search_audit_log.record({
+        "timestamp": datetime.now().isoformat(),
+        "search_strategy": search_strategy,
+        "tool": tool,
+        **fields
+    })
+
+def run_pubmed_search(data, progress=None):
+    """执行PubMed检索并生成响应，返回(响应字典, HTTP状态码)
+    
+    同步接口与后台任务共用；progress(fetched, total)用于报告获取进度。
+    """
+    search_strategy = data.get("search_strategy", "").strip()
+    
+    if not search_strategy:
+        return {"error": "检索策略不能为空"}, 400
+    
+    try:
+        retmax, fetch_all, include_abstracts = parse_search_options(data)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    
+    # 记录检索策略日志
+    search_log = {
+        "timestamp": datetime.now().isoformat(),
+        "search_strategy": search_strategy,
+        "retmax": retmax,
+        "fetch_all": fetch_all,
+        "include_abstracts": include_abstracts,
+        "tool": "literature_search_tool"
+    }
+    
+    # 执行PubMed检索，规范化后相同的策略直接使用缓存结果
+    results, total_count, search_log["cache"] = retrieve_pubmed_results(
+        search_strategy, retmax, fetch_all, include_abstracts, no_cache=parse_flag(data.get("no_cache")), progress=progress
+    )
+    
+    if results is None:
+        search_audit_log.record({**search_log, "error": total_count})
+        return {"error": total_count}, 500
+    
+    # 更新检索日志，由后台线程批量写入数据库
+    search_log["results_count"] = len(results)
+    search_log["total_count"] = total_count
+    search_audit_log.record(search_log)
+    
+    fieldnames = ENRICHED_FIELDNAMES if include_abstracts else RESULT_FIELDNAMES
+    
+    # 将结果转换为CSV格式并编码为base64；大结果集应改用/export_pubmed_search流式下载
+    csv_base64 = None
+    if data.get("include_csv", True):
+        csv_base64 = encode_csv_base64(results, fieldnames)
+    
+    # 结果保存在服务器端，前端可通过/results/<result_id>分页查看与筛选
+    with STAGE_SECONDS.time(stage="result_view"):
+        result_id = result_views.register(results, fieldnames)
+    
+    return {
+        "total_count": total_count,
+        "retrieved_count": len(results),
+        "pubmed_results_csv": csv_base64,
+        "result_id": result_id,
+        "search_strategy_used": search_strategy,
+        "search_timestamp": datetime.now().isoformat(),
+        "search_log": search_log
+    }, 200
+
 @literature_bp.route("/execute_pubmed_search", methods=["POST"])
 def execute_pubmed_search():
     """执行PubMed检索并返回结果"""
     try:
         data = request.get_json()
+        result, status_code = run_pubmed_search(data)
+        return jsonify(result), status_code
+        
+    except Exception as e:
+        logger.exception("PubMed检索失败: %s", e)
+        return jsonify({"error": f"PubMed检索失败: {str(e)}"}), 500
+
+@literature_bp.route("/preview_pubmed_search", methods=["POST"])
+def preview_pubmed_search():
+    """只获取命中数的快速预览：整个策略、各检索块与逐块累加的命中数"""
+    try:
+        data = request.get_json(silent=True) or {}
         search_strategy = data.get("search_strategy", "").strip()
         
         if not search_strategy:
             return jsonify({"error": "检索策略不能为空"}), 400
         
-        # 记录检索策略日志
-        search_log = {
-            "timestamp": datetime.now().isoformat(),
-            "search_strategy": search_strategy,
-            "tool": "literature_search_tool"
-        }
+        result, status_code = preview_search_counts(search_strategy)
+        return jsonify(result), status_code
         
-        # 执行PubMed检索
-        results, total_count = search_pubmed(search_strategy, retmax=100)
+    except Exception as e:
+        logger.exception("命中数预览失败: %s", e)
+        return jsonify({"error": f"命中数预览失败: {str(e)}"}), 500
+
+def run_bulk_search(data, progress=None):
+    """并发执行多个关键词或检索策略的完整流程，返回(响应字典, HTTP状态码)
+    
+    关键词依次经过build_prompt、generate_ai_strategy与检索；检索策略直接检索。
+    所有检索共用E-utilities客户端的限流，合并结果按PMID、DOI与近似标题去重并记录命中的检索。
+    """
+    items = [{"keyword": str(k).strip()} for k in data.get("keywords", []) if str(k).strip()]
+    items += [{"search_strategy": str(s).strip()} for s in data.get("search_strategies", []) if str(s).strip()]
+    
+    if not items:
+        return {"error": "关键词或检索策略不能为空"}, 400
+    if len(items) > BULK_MAX_ITEMS:
+        return {"error": f"单次批量检索最多 {BULK_MAX_ITEMS} 项"}, 400
+    try:
+        retmax, fetch_all, include_abstracts = parse_search_options(data)
+    except ValueError as e:
+        return {"error": str(e)}, 400
+    
+    started = time.perf_counter()
+    completed = []
+    lock = threading.Lock()
+    
+    def run_item(item):
+        label = item.get("keyword") or item["search_strategy"]
+        summary = {"label": label, **item}
+        try:
+            if "keyword" in item:
+                strategy_result, status_code = generate_ai_strategy(build_prompt(item["keyword"]))
+                if status_code != 200:
+                    summary["error"] = strategy_result.get("error", "AI策略生成失败")
+                    return summary, []
+                summary["search_strategy"] = strategy_result["ai_response"]["search_strategy"]
+            
+            results, total_count, cache_status = retrieve_pubmed_results(
+                summary["search_strategy"], retmax, fetch_all, include_abstracts, no_cache=parse_flag(data.get("no_cache"))
+            )
+            options = {"retmax": retmax, "fetch_all": fetch_all, "include_abstracts": include_abstracts, "cache": cache_status}
+            if results is None:
+                summary["error"] = total_count
+                audit_search(summary["search_strategy"], "bulk_search", error=total_count, **options)
+                return summary, []
+            summary.update(total_count=total_count, retrieved_count=len(results), cache=cache_status)
+            audit_search(summary["search_strategy"], "bulk_search", results_count=len(results), total_count=total_count, **options)
+            return summary, results
+        except Exception as e:
+            summary["error"] = f"检索失败: {str(e)}"
+            if "search_strategy" in summary:
+                audit_search(summary["search_strategy"], "bulk_search", error=summary["error"])
+            return summary, []
+        finally:
+            with lock:
+                completed.append(label)
+                if progress:
+                    progress(len(completed), len(items))
+    
+    with ThreadPoolExecutor(max_workers=min(BULK_CONCURRENCY, len(items)), thread_name_prefix="bulk-search") as executor:
+        outcomes = list(executor.map(run_item, items))
+    
+    # 按提交顺序合并，PMID、DOI或标题近似重复的记录归为一簇，合并各自命中的检索
+    records = []
+    labels = []
+    for summary, results in outcomes:
+        records.extend(results)
+        labels.extend([summary["label"]] * len(results))
+    deduplicated = deduplicate(records)
+    cluster_of = {member: cluster for cluster in deduplicated["clusters"] for member in cluster["members"]}
+    merged_results = []
+    for i, record in enumerate(records):
+        cluster = cluster_of.get(i)
+        if cluster is None:
+            matched = [labels[i]]
+        elif cluster["representative"] == i:
+            matched = dict.fromkeys(labels[member] for member in cluster["members"])
+        else:
+            continue
+        merged_results.append({**record, "Matched_Strategies": "; ".join(matched)})
+    
+    base_fieldnames = ENRICHED_FIELDNAMES if include_abstracts else RESULT_FIELDNAMES
+    response = {
+        "searches": [summary for summary, _ in outcomes],
+        "merged_count": len(merged_results),
+        "deduplication": deduplicated["stats"],
+        "result_id": result_views.register(merged_results, base_fieldnames + ["Matched_Strategies"]),
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+        "search_timestamp": datetime.now().isoformat()
+    }
+    if data.get("include_csv", True):
+        response["merged_results_csv"] = encode_csv_base64(merged_results, base_fieldnames + ["Matched_Strategies"])
+    return response, 200
+
+@literature_bp.route("/bulk_search", methods=["POST"])
+def bulk_search():
+    """批量检索多个关键词或检索策略，返回各自数量与去重合并结果"""
+    try:
+        data = request.get_json()
+        result, status_code = run_bulk_search(data)
+        return jsonify(result), status_code
         
-        if results is None:
-            return jsonify({"error": total_count}), 500
+    except Exception as e:
+        logger.exception("批量检索失败: %s", e)
+        return jsonify({"error": f"批量检索失败: {str(e)}"}), 500
+
+@literature_bp.route("/deduplicate", methods=["POST"])
+def deduplicate_records():
+    """对提交的文献记录（如导入的无PMID记录）去重，返回代表记录、重复簇与统计"""
+    try:
+        data = request.get_json(silent=True) or {}
+        records = data.get("records")
+        if not isinstance(records, list) or not all(isinstance(record, dict) for record in records):
+            return jsonify({"error": "records必须是记录对象的列表"}), 400
+        if len(records) > DEDUP_MAX_RECORDS:
+            return jsonify({"error": f"单次去重最多 {DEDUP_MAX_RECORDS} 条记录"}), 400
+        try:
+            title_threshold = float(data.get("title_threshold", TITLE_THRESHOLD))
+        except (TypeError, ValueError):
+            return jsonify({"error": "title_threshold必须是数字"}), 400
+        if not 0 < title_threshold <= 1:
+            return jsonify({"error": "title_threshold必须在0到1之间"}), 400
         
-        # 将结果转换为CSV格式
-        output = io.StringIO()
-        if results:
-            fieldnames = results[0].keys()
-            writer = csv.DictWriter(output, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(results)
-        else:
-            # 如果没有结果，创建空的CSV结构
-            fieldnames = ["PMID", "Title", "Authors", "Journal", "Publication_Date", "DOI", "Abstract", "Study_Type", "URL"]
-            writer = csv.DictWriter(output, fieldnames=fieldnames)
-            writer.writeheader()
+        started = time.perf_counter()
+        result = deduplicate(records, title_threshold)
+        result["stats"]["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        return jsonify(result)
         
-        csv_content = output.getvalue()
-        output.close()
+    except Exception as e:
+        logger.exception("文献去重失败: %s", e)
+        return jsonify({"error": f"文献去重失败: {str(e)}"}), 500
+
+def run_search_update(saved_id, data, progress=None):
+    """增量更新已保存的检索，只返回上次运行以来新增、撤稿或移除的记录
+    
+    新增记录通过ESearch的Entrez日期（datetype=edat）限制获取；check_removed为True时
+    额外获取完整PMID列表（不含详情）以识别不再命中的记录，否则命中数通过rettype=count获取。
+    撤稿记录总是重新请求ESummary，不使用文献库中撤稿前保存的数据。
+    """
+    saved = saved_search_store.get(saved_id, include_pmids=True)
+    if saved is None:
+        return {"error": "已保存的检索不存在"}, 404
+    
+    search_strategy = saved["search_strategy"]
+    previous = set(saved["pmids"])
+    run_at = time.time()
+    # 日期限制按天计算，同一天内重复更新时依靠PMID集合去重
+    since = datetime.fromtimestamp(saved["last_run_at"]).strftime("%Y/%m/%d")
+    date_params = {"mindate": since, "maxdate": "3000/12/31"}
+    
+    added_pmids, _ = collect_pmids(search_strategy, datetype="edat", **date_params)
+    new_pmids = [pmid for pmid in added_pmids if pmid not in previous]
+    
+    # 上次运行后被修改为撤稿的已有记录
+    retracted_candidates, _ = collect_pmids(f"({search_strategy}) AND retracted publication[pt]", datetype="mdat", **date_params)
+    retracted_pmids = [pmid for pmid in retracted_candidates if pmid in previous]
+    
+    removed_pmids = []
+    if parse_flag(data.get("check_removed")):
+        current_pmids, total_count = collect_pmids(search_strategy)
+        current = set(current_pmids)
+        removed_pmids = [pmid for pmid in saved["pmids"] if pmid not in current]
+        new_pmids = [pmid for pmid in current_pmids if pmid not in previous]
+        pmid_set = current_pmids
+    else:
+        # 不检查移除时跟踪的PMID集合只增不减，不能代表PubMed当前的命中数
+        pmid_set = saved["pmids"] + new_pmids
+        total_count = esearch_count(search_strategy)
+    
+    if progress:
+        progress(0, len(new_pmids) + len(retracted_pmids))
+    new_records = fetch_articles(new_pmids)
+    # 文献库中未过期的记录是撤稿前的数据，重新获取后写回文献库
+    retracted_records = esummary_by_ids(retracted_pmids) if retracted_pmids else []
+    article_store.upsert_many(retracted_records)
+    if progress:
+        progress(len(new_records) + len(retracted_records), len(new_pmids) + len(retracted_pmids))
+    
+    saved_search_store.record_run(saved_id, pmid_set, total_count, run_at)
+    audit_search(search_strategy, "saved_search_update", fetch_all=True, results_count=len(new_records), total_count=total_count)
+    logger.info("检索更新 #%s: 新增 %d 篇，撤稿 %d 篇，移除 %d 篇", saved_id, len(new_pmids), len(retracted_pmids), len(removed_pmids))
+    
+    response = {
+        "saved_search": saved_search_store.get(saved_id),
+        "since": since,
+        "new_count": len(new_records),
+        # Record需转为字典后才能序列化为JSON
+        "new_records": [dict(record) for record in new_records],
+        "retracted_pmids": retracted_pmids,
+        "retracted_records": [dict(record) for record in retracted_records],
+        "removed_pmids": removed_pmids,
+        "removed_records": [dict(record) for record in article_store.get_many(removed_pmids).values()],
+        "total_count": total_count,
+        "tracked_count": len(pmid_set),
+        "search_timestamp": datetime.now().isoformat()
+    }
+    if data.get("include_csv", True):
+        response["new_results_csv"] = encode_csv_base64(new_records)
+    return response, 200
+
+@literature_bp.route("/saved_searches", methods=["POST"])
+def create_saved_search():
+    """保存检索策略并记录当前PMID集合，作为后续增量更新的基线"""
+    try:
+        data = request.get_json()
+        search_strategy = data.get("search_strategy", "").strip()
+        if not search_strategy:
+            return jsonify({"error": "检索策略不能为空"}), 400
         
-        # 将CSV内容编码为base64
-        csv_base64 = base64.b64encode(csv_content.encode("utf-8")).decode("utf-8")
+        pmids, total_count = collect_pmids(search_strategy)
+        audit_search(search_strategy, "saved_search", fetch_all=True, results_count=0, total_count=total_count)
+        saved_id = saved_search_store.create(data.get("name", "").strip() or search_strategy[:100], search_strategy, pmids, total_count)
+        return jsonify(saved_search_store.get(saved_id)), 201
         
-        # 更新检索日志
-        search_log["results_count"] = len(results)
-        search_log["total_count"] = total_count
+    except SavedSearchNotConfigured as e:
+        return jsonify({"error": str(e)}), 503
+    except requests.exceptions.RequestException as e:
+        return jsonify({"error": f"网络请求错误: {str(e)}"}), 500
+    except Exception as e:
+        return jsonify({"error": f"保存检索失败: {str(e)}"}), 500
+
+@literature_bp.route("/saved_searches", methods=["GET"])
+def list_saved_searches():
+    """列出已保存的检索"""
+    try:
+        return jsonify({"saved_searches": saved_search_store.list()})
+    except SavedSearchNotConfigured as e:
+        return jsonify({"error": str(e)}), 503
+
+@literature_bp.route("/saved_searches/<int:saved_id>", methods=["GET"])
+def get_saved_search(saved_id):
+    """查询已保存的检索"""
+    try:
+        saved = saved_search_store.get(saved_id)
+    except SavedSearchNotConfigured as e:
+        return jsonify({"error": str(e)}), 503
+    if saved is None:
+        return jsonify({"error": "已保存的检索不存在"}), 404
+    return jsonify(saved)
+
+@literature_bp.route("/saved_searches/<int:saved_id>/update", methods=["POST"])
+def update_saved_search(saved_id):
+    """增量更新已保存的检索"""
+    try:
+        data = request.get_json(silent=True) or {}
+        result, status_code = run_search_update(saved_id, data)
+        return jsonify(result), status_code
         
-        return jsonify({
-            "total_count": total_count,
-            "retrieved_count": len(results),
-            "pubmed_results_csv": csv_base64,
-            "search_strategy_used": search_strategy,
-            "search_timestamp": datetime.now().isoformat(),
-            "search_log": search_log
-        })
+    except SavedSearchNotConfigured as e:
+        return jsonify({"error": str(e)}), 503
+    except requests.exceptions.RequestException as e:
+        return jsonify({"error": f"网络请求错误: {str(e)}"}), 500
+    except Exception as e:
+        logger.exception("检索更新失败: %s", e)
+        return jsonify({"error": f"检索更新失败: {str(e)}"}), 500
+
+# 检索历史每页最多返回的记录数
+HISTORY_PAGE_MAX = 500
+
+def parse_history_time(value, end=False):
+    """解析ISO格式的日期或时间为Unix时间戳；只给日期时，end为True表示当天结束"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"日期格式错误: {value}")
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed.timestamp()
+
+def parse_optional_int(value, name):
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name}必须为整数")
+
+@literature_bp.route("/search_history", methods=["GET"])
+def search_history():
+    """按日期范围、检索策略与命中数筛选检索历史，按时间倒序分页"""
+    try:
+        args = request.args
+        limit = parse_optional_int(args.get("limit"), "limit") or 50
+        entries, next_cursor = search_audit_log.query(
+            start=parse_history_time(args.get("from")),
+            end=parse_history_time(args.get("to"), end=True),
+            strategy=args.get("strategy", "").strip() or None,
+            text=args.get("q", "").strip() or None,
+            min_count=parse_optional_int(args.get("min_count"), "min_count"),
+            max_count=parse_optional_int(args.get("max_count"), "max_count"),
+            limit=max(1, min(limit, HISTORY_PAGE_MAX)),
+            cursor=parse_optional_int(args.get("cursor"), "cursor"),
+        )
+        return jsonify({"items": entries, "next_cursor": next_cursor})
         
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except SearchHistoryNotConfigured as e:
+        return jsonify({"error": str(e)}), 503
     except Exception as e:
-        print(f"PubMed检索失败: {str(e)}")
-        return jsonify({"error": f"PubMed检索失败: {str(e)}"}), 500
+        logger.exception("查询检索历史失败: %s", e)
+        return jsonify({"error": f"查询检索历史失败: {str(e)}"}), 500
+
+@literature_bp.route("/search_history/<int:entry_id>", methods=["GET"])
+def get_search_history_entry(entry_id):
+    """查询一条检索历史"""
+    try:
+        entry = search_audit_log.get(entry_id)
+    except SearchHistoryNotConfigured as e:
+        return jsonify({"error": str(e)}), 503
+    if entry is None:
+        return jsonify({"error": "检索历史不存在"}), 404
+    return jsonify(entry)
+
+@literature_bp.route("/search_history_stats", methods=["GET"])
+def search_history_stats():
+    """返回检索日志写入队列的状态"""
+    return jsonify({**search_audit_log.stats(), "entries": search_audit_log.count()})
+
+# 本地全文检索每页最多返回的记录数
+LOCAL_SEARCH_PAGE_MAX = 200
+
+@literature_bp.route("/local_search", methods=["GET", "POST"])
+def local_search():
+    """在本地全文索引中检索已获取过的文献，按BM25排序，不请求PubMed
+    
+    result_id限制在某次检索的结果中，用于对已有结果进一步筛选。
+    """
+    try:
+        data = request.get_json(silent=True) or request.args
+        query = str(data.get("q", "")).strip()
+        if not query:
+            return jsonify({"error": "检索式不能为空"}), 400
+        limit = parse_optional_int(data.get("limit"), "limit") or 50
+        offset = parse_optional_int(data.get("offset"), "offset") or 0
+        
+        pmids = None
+        result_id = data.get("result_id")
+        if result_id:
+            view = result_views.get(result_id)
+            if view is None:
+                return jsonify({"error": "检索结果不存在或已过期"}), 404
+            pmids = view.columns.get("PMID", [])
+        
+        started = time.perf_counter()
+        with STAGE_SECONDS.time(stage="local_search"):
+            result = fulltext_index.search(query, limit=max(1, min(limit, LOCAL_SEARCH_PAGE_MAX)), offset=max(0, offset), pmids=pmids)
+        result["query"] = query
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return jsonify(result)
+        
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except FulltextIndexNotConfigured as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        logger.exception("本地全文检索失败: %s", e)
+        return jsonify({"error": f"本地全文检索失败: {str(e)}"}), 500
+
+@literature_bp.route("/results/<result_id>", methods=["GET"])
+def query_results(result_id):
+    """分页查询服务器端保存的检索结果，支持按日期或期刊排序、筛选与分面统计
+    
+    查询参数：sort(date|journal)、order(asc|desc)、limit、cursor、facets，
+    以及可重复的筛选参数study_type、year、journal。
+    """
+    view = result_views.get(result_id)
+    if view is None:
+        return jsonify({"error": "检索结果不存在或已过期"}), 404
+    
+    try:
+        limit = request.args.get("limit", 50, type=int)
+        if limit is None or limit <= 0:
+            raise ValueError("limit必须为正整数")
+        limit = min(limit, RESULT_PAGE_MAX)
+        filters = {field: request.args.getlist(field.lower()) for field in FACET_FIELDS}
+        page = view.query(
+            sort=request.args.get("sort", "date"),
+            order=request.args.get("order", "desc"),
+            limit=limit,
+            cursor=request.args.get("cursor"),
+            filters=filters,
+            include_facets=parse_flag(request.args.get("facets", "true"))
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    page["result_id"] = result_id
+    return jsonify(page)
+
+@literature_bp.route("/jobs/search", methods=["POST"])
+def submit_search_job():
+    """提交PubMed检索任务，立即返回任务ID"""
+    try:
+        data = request.get_json()
+        if not data.get("search_strategy", "").strip():
+            return jsonify({"error": "检索策略不能为空"}), 400
+        # 任务结果在内存中保留到过期，默认不附带base64 CSV；完整结果通过result_id或导出接口获取
+        job = job_manager.submit("search", run_pubmed_search, {"include_csv": False, **data})
+        return jsonify(job.to_dict()), 202
+        
+    except JobQueueFull as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": f"提交检索任务失败: {str(e)}"}), 500
+
+@literature_bp.route("/jobs/strategy", methods=["POST"])
+def submit_strategy_job():
+    """提交AI检索策略生成任务，立即返回任务ID"""
+    try:
+        data = request.get_json()
+        prompt = data.get("prompt", "").strip()
+        if not prompt:
+            return jsonify({"error": "Prompt不能为空"}), 400
+        job = job_manager.submit("strategy", lambda progress: generate_ai_strategy(prompt))
+        return jsonify(job.to_dict()), 202
+        
+    except JobQueueFull as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": f"提交策略生成任务失败: {str(e)}"}), 500
+
+@literature_bp.route("/jobs/bulk_search", methods=["POST"])
+def submit_bulk_search_job():
+    """提交批量检索任务，进度按已完成的检索数量报告"""
+    try:
+        data = request.get_json()
+        job = job_manager.submit("bulk_search", run_bulk_search, data)
+        return jsonify(job.to_dict()), 202
+        
+    except JobQueueFull as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        return jsonify({"error": f"提交批量检索任务失败: {str(e)}"}), 500
+
+def find_job(job_id):
+    """返回(任务管理器, 任务)，检索任务与导出任务在不同的线程池中执行"""
+    for manager in (job_manager, export_job_manager):
+        job = manager.get(job_id)
+        if job is not None:
+            return manager, job
+    return job_manager, None
+
+@literature_bp.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """查询任务状态、进度与结果"""
+    _, job = find_job(job_id)
+    if job is None:
+        return jsonify({"error": "任务不存在或已过期"}), 404
+    return jsonify(job.to_dict())
+
+@literature_bp.route("/jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id):
+    """通过Server-Sent Events推送任务进度，任务结束时推送结果"""
+    manager, job = find_job(job_id)
+    if job is None:
+        return jsonify({"error": "任务不存在或已过期"}), 404
+    return Response(manager.iter_events(job), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+def iter_csv_chunks(batches, fieldnames=RESULT_FIELDNAMES):
+    """将结果批次逐批编码为CSV文本块"""
+    header = True
+    for batch in batches:
+        yield encode_csv(batch, fieldnames, header=header).encode("utf-8")
+        header = False
+    if header:
+        yield encode_csv([], fieldnames).encode("utf-8")
+
+def iter_ndjson_chunks(batches, fieldnames=RESULT_FIELDNAMES):
+    """将结果批次逐批编码为NDJSON文本块"""
+    for batch in batches:
+        yield encode_ndjson(batch).encode("utf-8")
+
+def iter_gzip_chunks(chunks):
+    """对字节块进行流式gzip压缩"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv", iter_csv_chunks),
+    "ndjson": ("application/x-ndjson; charset=utf-8", "ndjson", iter_ndjson_chunks)
+}
+
+@literature_bp.route("/export_pubmed_search", methods=["GET", "POST"])
+def export_pubmed_search():
+    """以CSV或NDJSON流式导出PubMed检索结果，随ESummary批次逐块返回"""
+    try:
+        data = request.get_json(silent=True) or request.args
+        search_strategy = data.get("search_strategy", "").strip()
+        
+        if not search_strategy:
+            return jsonify({"error": "检索策略不能为空"}), 400
+        
+        export_format = data.get("format", "csv")
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({"error": f"不支持的导出格式: {export_format}"}), 400
+        mimetype, extension, encode_chunks = EXPORT_FORMATS[export_format]
+        
+        try:
+            retmax = parse_retmax(data.get("retmax"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        include_abstracts = parse_flag(data.get("abstracts"))
+        fieldnames = ENRICHED_FIELDNAMES if include_abstracts else RESULT_FIELDNAMES
+        
+        # 先完成ESearch，检索失败时仍可返回JSON错误
+        webenv, query_key, total_count, pmids = esearch_history(search_strategy)
+        limit = total_count if retmax is None else min(retmax, total_count)
+        logger.info("流式导出 %d/%d 篇文献，格式: %s", limit, total_count, export_format)
+        audit_search(search_strategy, "export_stream", retmax=retmax, fetch_all=True, include_abstracts=include_abstracts,
+                     results_count=limit, total_count=total_count)
+        
+        def generate():
+            try:
+                batches = iter_esummary_batches(webenv, query_key, limit, pmids=pmids)
+                if include_abstracts:
+                    batches = (enrich_with_abstracts(batch) for batch in batches)
+                yield from encode_chunks(batches, fieldnames)
+            except Exception as e:
+                # 响应头已发送，无法再返回错误状态码：NDJSON追加一条错误记录，然后重新抛出，
+                # 由WSGI服务器中断分块响应，客户端可以看出下载不完整
+                logger.exception("流式导出中断: %s", e)
+                if export_format == "ndjson":
+                    yield (json.dumps({"error": f"导出中断: {str(e)}"}, ensure_ascii=False) + "\n").encode("utf-8")
+                raise
+        
+        chunks = generate()
+        headers = {
+            "Content-Disposition": f"attachment; filename=pubmed_results_{datetime.now().strftime('%Y%m%d')}.{extension}",
+            "X-Total-Count": str(total_count),
+            "X-Export-Count": str(limit)
+        }
+        if parse_flag(data.get("gzip")):
+            chunks = iter_gzip_chunks(chunks)
+            headers["Content-Encoding"] = "gzip"
+            headers["Vary"] = "Accept-Encoding"
+        
+        return Response(chunks, content_type=mimetype, headers=headers)
+        
+    except requests.exceptions.RequestException as e:
+        logger.error("网络请求错误: %s", e)
+        return jsonify({"error": f"网络请求错误: {str(e)}"}), 500
+    except Exception as e:
+        logger.exception("PubMed导出失败: %s", e)
+        return jsonify({"error": f"PubMed导出失败: {str(e)}"}), 500
+
+def encode_export_rows(export_format, rows, fieldnames, header=False):
+    """将一批结果编码为导出格式的字节串，CSV可选择带表头"""
+    if export_format == "ndjson":
+        return encode_ndjson(rows).encode("utf-8")
+    return encode_csv(rows, fieldnames, header).encode("utf-8")
+
+def refresh_export_history(state):
+    """重新执行ESearch获取WebEnv/query_key并保存检查点，已导出的偏移量保持不变；返回ESearch带回的PMID列表"""
+    webenv, query_key, total_count, pmids = esearch_history(state["search_strategy"])
+    limit = total_count if state["retmax"] is None else min(state["retmax"], total_count)
+    if state["limit"] is not None and total_count != state["total_count"]:
+        logger.warning("导出 %s 继续时命中数由 %d 变为 %d，后续批次可能与已导出部分有偏差",
+                       state["export_id"], state["total_count"], total_count)
+    state.update(webenv=webenv, query_key=query_key, webenv_at=time.time(), total_count=total_count, limit=limit)
+    export_store.save(state)
+    return pmids
+
+def run_export(export_id, progress=None):
+    """执行或继续导出任务，返回(响应字典, HTTP状态码)
+    
+    从检查点记录的偏移量开始逐批获取，每批追加写入磁盘并更新检查点；中断后再次调用即可继续。
+    过期的WebEnv在开始前重新获取；运行中失效时在同一偏移量最多重新获取一次。
+    """
+    state = export_store.load(export_id)
+    if state is None:
+        return {"error": "导出任务不存在"}, 404
+    if state["offset"] or state["rows_written"]:
+        state["resumes"] += 1
+    state.update(status=RUNNING, error=None)
+    export_store.save(state)
+    fieldnames = ENRICHED_FIELDNAMES if state["include_abstracts"] else RESULT_FIELDNAMES
+    
+    try:
+        pmids = None
+        # 每个偏移量最多重新获取一次WebEnv，刚获取的WebEnv在同一位置失效时不再重试
+        refreshed_at = None
+        if state["webenv"] is None or time.time() - state["webenv_at"] > EXPORT_WEBENV_MAX_AGE:
+            pmids = refresh_export_history(state)
+            refreshed_at = state["offset"]
+        if state["bytes_written"] == 0 and state["format"] == "csv":
+            export_store.append(state, encode_export_rows("csv", [], fieldnames, header=True), 0, state["offset"])
+        if progress:
+            progress(state["offset"], state["limit"])
+        
+        while True:
+            batches = iter_esummary_batches(state["webenv"], state["query_key"], state["limit"],
+                                            state["batch_size"], start=state["offset"], pmids=pmids)
+            try:
+                for batch in batches:
+                    if state["include_abstracts"]:
+                        enrich_with_abstracts(batch)
+                    offset = min(state["offset"] + state["batch_size"], state["limit"])
+                    with STAGE_SECONDS.time(stage="export_write"):
+                        export_store.append(state, encode_export_rows(state["format"], batch, fieldnames), len(batch), offset)
+                    if progress:
+                        progress(state["offset"], state["limit"])
+                break
+            except HistoryInvalid:
+                # WebEnv已失效（如NCBI已清理或运行中过期），重新检索后从当前偏移量继续
+                if refreshed_at == state["offset"]:
+                    raise
+                logger.info("导出 %s 的WebEnv在偏移量 %d 处失效，重新获取", export_id, state["offset"])
+                pmids = refresh_export_history(state)
+                refreshed_at = state["offset"]
+        
+        export_store.finish(state)
+    except Exception as e:
+        logger.exception("导出 %s 在偏移量 %d 处中断: %s", export_id, state["offset"], e)
+        export_store.fail(state, f"导出中断: {str(e)}")
+        audit_search(state["search_strategy"], "export", retmax=state["retmax"], fetch_all=True,
+                     include_abstracts=state["include_abstracts"], results_count=state["rows_written"],
+                     total_count=state["total_count"], error=state["error"])
+        return {"error": state["error"], **export_summary(state)}, 502
+    
+    logger.info("导出 %s 完成，共 %d 条记录", export_id, state["rows_written"])
+    audit_search(state["search_strategy"], "export", retmax=state["retmax"], fetch_all=True,
+                 include_abstracts=state["include_abstracts"], results_count=state["rows_written"],
+                 total_count=state["total_count"])
+    return export_summary(state), 200
+
+def submit_export(state):
+    """将导出任务提交到后台任务队列，任务ID保存在内存中；同一导出正在执行时返回None"""
+    with export_jobs_lock:
+        job = export_jobs.get(state["export_id"])
+        if job is not None and job.status in (QUEUED, RUNNING):
+            return None
+        # 提交前标记为排队，任务开始后检查点只由任务线程写入
+        if state["status"] != QUEUED:
+            state.update(status=QUEUED, error=None)
+            export_store.save(state)
+        job = export_jobs[state["export_id"]] = export_job_manager.submit("export", run_export, state["export_id"])
+        return job
+
+def export_response(state):
+    """导出任务的接口表示，附带本进程中对应的后台任务ID"""
+    job = export_jobs.get(state["export_id"])
+    return {**export_summary(state), "job_id": job.id if job is not None else None}
+
+def resume_interrupted_exports():
+    """服务启动时继续上次进程退出时未完成的导出任务，返回继续的任务数"""
+    if export_store.root is None:
+        return 0
+    states = export_store.interrupted()
+    for state in states:
+        logger.info("继续未完成的导出 %s，已导出 %d 条", state["export_id"], state["rows_written"])
+        submit_export(state)
+    return len(states)
+
+@literature_bp.route("/exports", methods=["POST"])
+def create_export():
+    """创建可断点续传的导出任务，在后台逐批写入磁盘"""
+    try:
+        data = request.get_json(silent=True) or {}
+        search_strategy = data.get("search_strategy", "").strip()
+        if not search_strategy:
+            return jsonify({"error": "检索策略不能为空"}), 400
+        
+        export_format = data.get("format", "csv")
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({"error": f"不支持的导出格式: {export_format}"}), 400
+        try:
+            retmax = parse_retmax(data.get("retmax"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        state = export_store.create(search_strategy, export_format, EXPORT_FORMATS[export_format][1], retmax,
+                                    parse_flag(data.get("abstracts")), ESUMMARY_BATCH_SIZE)
+        submit_export(state)
+        return jsonify(export_response(state)), 202
+        
+    except ExportsNotConfigured as e:
+        return jsonify({"error": str(e)}), 503
+    except JobQueueFull as e:
+        return jsonify({"error": str(e)}), 503
+    except Exception as e:
+        logger.exception("创建导出任务失败: %s", e)
+        return jsonify({"error": f"创建导出任务失败: {str(e)}"}), 500
+
+@literature_bp.route("/exports", methods=["GET"])
+def list_exports():
+    """列出导出任务及其检查点进度"""
+    try:
+        return jsonify({"exports": [export_response(state) for state in export_store.list()]})
+    except ExportsNotConfigured as e:
+        return jsonify({"error": str(e)}), 503
+
+def load_export_or_error(export_id):
+    """返回(检查点, 错误响应)，二者之一为None"""
+    try:
+        state = export_store.load(export_id)
+    except ExportsNotConfigured as e:
+        return None, (jsonify({"error": str(e)}), 503)
+    except ValueError as e:
+        return None, (jsonify({"error": str(e)}), 400)
+    if state is None:
+        return None, (jsonify({"error": "导出任务不存在"}), 404)
+    return state, None
+
+@literature_bp.route("/exports/<export_id>", methods=["GET"])
+def get_export(export_id):
+    """查询导出任务的状态与已写入的行数"""
+    state, error = load_export_or_error(export_id)
+    if error:
+        return error
+    return jsonify(export_response(state))
+
+@literature_bp.route("/exports/<export_id>/resume", methods=["POST"])
+def resume_export(export_id):
+    """从最后一个检查点继续失败或中断的导出任务"""
+    state, error = load_export_or_error(export_id)
+    if error:
+        return error
+    if state["status"] == DONE:
+        return jsonify({"error": "导出任务已完成"}), 409
+    try:
+        if submit_export(state) is None:
+            return jsonify({"error": "导出任务正在进行"}), 409
+    except JobQueueFull as e:
+        return jsonify({"error": str(e)}), 503
+    return jsonify(export_response(state)), 202
+
+@literature_bp.route("/exports/<export_id>/download", methods=["GET"])
+def download_export(export_id):
+    """下载已完成的导出文件"""
+    state, error = load_export_or_error(export_id)
+    if error:
+        return error
+    if state["status"] != DONE:
+        return jsonify({"error": "导出任务尚未完成", **export_summary(state)}), 409
+    mimetype = EXPORT_FORMATS[state["format"]][0]
+    download_name = f"pubmed_results_{datetime.fromtimestamp(state['created_at']).strftime('%Y%m%d')}.{state['extension']}"
+    return send_file(export_store.result_path(state), mimetype=mimetype, as_attachment=True, download_name=download_name)
+
+@literature_bp.route("/eutils_stats", methods=["GET"])
+def eutils_stats():
+    """返回E-utilities调用的耗时统计"""
+    return jsonify(eutils_client.stats())
+
+@literature_bp.route("/cache_stats", methods=["GET"])
+def cache_stats():
+    """返回检索结果缓存、并发合并与检索策略缓存的统计"""
+    return jsonify({
+        **search_cache.stats(),
+        "search_coalescing": search_flight.stats(),
+        "count_cache": count_cache.stats(),
+        "strategy_cache": strategy_cache.stats(),
+        "strategy_streams": strategy_streams.stats()
+    })
+
+@literature_bp.route("/article_store_stats", methods=["GET"])
+def article_store_stats():
+    """返回文献库中保存的记录数量"""
+    return jsonify({
+        "enabled": article_store.enabled,
+        "articles": article_store.count(),
+        "max_age_seconds": article_store.max_age,
+        "fulltext_index": {"enabled": fulltext_index.enabled, "articles": fulltext_index.count()}
+    })
+
+@literature_bp.before_request
+def start_request_metrics():
+    g.metrics_endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+    g.metrics_started = time.perf_counter()
+    HTTP_IN_FLIGHT.inc(endpoint=g.metrics_endpoint)
+
+@literature_bp.after_request
+def record_request_metrics(response):
+    endpoint = g.get("metrics_endpoint")
+    if endpoint is not None:
+        HTTP_REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+        HTTP_SECONDS.observe(time.perf_counter() - g.metrics_started, endpoint=endpoint)
+        if not response.is_streamed and response.content_length is not None:
+            HTTP_RESPONSE_BYTES.observe(response.content_length, endpoint=endpoint)
+    return response
+
+@literature_bp.teardown_request
+def finish_request_metrics(exc):
+    endpoint = g.pop("metrics_endpoint", None)
+    if endpoint is not None:
+        HTTP_IN_FLIGHT.dec(endpoint=endpoint)
+
+@literature_bp.route("/metrics", methods=["GET"])
+def metrics():
+    """以Prometheus文本格式输出指标"""
+    for status, count in job_manager.stats()["jobs"].items():
+        SEARCH_JOBS.set(count, status=status)
+    for status, count in export_job_manager.stats()["jobs"].items():
+        EXPORT_JOBS.set(count, status=status)
+    SEARCH_CACHE_ENTRIES.set(search_cache.stats()["entries"])
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
 
 @literature_bp.route("/health", methods=["GET"])
 def health_check():
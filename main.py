@@ -1,13 +1,21 @@
+import logging
 import os
 import sys
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask
 from flask_cors import CORS
 from src.models.user import db
 from src.routes.user import user_bp
-from src.routes.literature import literature_bp
+from src.routes.literature import literature_bp, search_cache, article_store, saved_search_store, search_audit_log, fulltext_index, export_store, resume_interrupted_exports
+from src.static_assets import StaticAssets
+
+# LOG_LEVEL=DEBUG可输出文献库命中等逐批日志
+logging.basicConfig(
+    level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'asdf#FGSgvasgf$5$WGT'
@@ -24,22 +32,28 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 db.init_app(app)
 with app.app_context():
     db.create_all()
+search_cache.init_app(app)
+article_store.init_app(app)
+saved_search_store.init_app(app)
+# 检索日志由后台线程批量写入，数据库切换为WAL模式
+search_audit_log.init_app(app)
+# 检索过的记录写入SQLite FTS5全文索引，供/api/local_search本地查询
+fulltext_index.init_app(app)
+# 导出检查点保存在EXPORT_DIR（默认为应用目录下的exports），启动时继续上次未完成的导出
+export_store.init_app(app)
+resume_interrupted_exports()
+
+# 启动时扫描静态目录，之后的请求只查内存清单；重新构建前端后需重启服务
+static_assets = StaticAssets()
+static_assets.init_app(app)
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
+    if app.static_folder is None:
             return "Static folder not configured", 404
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
+    return static_assets.serve(path)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,223 @@
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# 本地模拟的PubMed E-utilities服务，用于离线测试
+PUB_TYPES_CYCLE = [
+    ["Journal Article", "Randomized Controlled Trial"],
+    ["Journal Article", "Systematic Review"],
+    ["Journal Article", "Meta-Analysis"],
+    ["Journal Article", "Review"],
+    ["Journal Article"],
+]
+
+
+def make_summary(pmid):
+    """为给定PMID生成确定性的ESummary记录"""
+    n = int(pmid)
+    return {
+        "uid": str(pmid),
+        "pubdate": f"{2015 + n % 10}/{n % 12 + 1:02d}/01",
+        "source": f"J Test {n % 7}",
+        "fulljournalname": f"Journal of Testing {n % 7}",
+        "title": f"Synthetic article {pmid} on health technology assessment",
+        "authors": [{"name": f"Author{i} {chr(65 + (n + i) % 26)}", "authtype": "Author"} for i in range(n % 5 + 1)],
+        "articleids": [
+            {"idtype": "pubmed", "value": str(pmid)},
+            {"idtype": "doi", "value": f"10.1000/test.{pmid}"},
+        ],
+        "pubtype": PUB_TYPES_CYCLE[n % len(PUB_TYPES_CYCLE)],
+    }
+
+
+def make_article_xml(pmid):
+    """为给定PMID生成确定性的EFetch PubmedArticle XML，偶数PMID使用结构化摘要"""
+    n = int(pmid)
+    if n % 2 == 0:
+        abstract = (
+            f'<AbstractText Label="BACKGROUND">Background of <i>{pmid}</i>.</AbstractText>'
+            f'<AbstractText Label="RESULTS">Results of {pmid}.</AbstractText>'
+        )
+    else:
+        abstract = f"<AbstractText>Plain abstract of {pmid}.</AbstractText>"
+    pub_types = "".join(f"<PublicationType>{pt}</PublicationType>" for pt in PUB_TYPES_CYCLE[n % len(PUB_TYPES_CYCLE)])
+    return (
+        "<PubmedArticle><MedlineCitation>"
+        f"<PMID Version=\"1\">{pmid}</PMID>"
+        f"<Article><ArticleTitle>Synthetic article {pmid}</ArticleTitle>"
+        f"<Abstract>{abstract}</Abstract>"
+        f"<PublicationTypeList>{pub_types}</PublicationTypeList></Article>"
+        "<MeshHeadingList>"
+        '<MeshHeading><DescriptorName MajorTopicYN="Y">Technology Assessment, Biomedical</DescriptorName></MeshHeading>'
+        '<MeshHeading><DescriptorName MajorTopicYN="N">Humans</DescriptorName>'
+        '<QualifierName MajorTopicYN="N">economics</QualifierName></MeshHeading>'
+        "</MeshHeadingList>"
+        "</MedlineCitation></PubmedArticle>"
+    )
+
+
+class MockEutilsServer:
+    """在后台线程中运行的E-utilities替身服务
+
+    corpus_size为检索命中的文献总数，PMID从first_pmid开始连续编号；
+    requests记录每次请求的路径与参数，便于测试断言；failures中的状态码会依次返回给后续请求。
+    latency为每次响应前的延迟（秒），error_rate为随机返回503的比例，用于基准测试模拟真实网络。
+    """
+
+    def __init__(self, corpus_size=1000, first_pmid=10000000, latency=0.0, error_rate=0.0, seed=None):
+        self.corpus_size = corpus_size
+        self.first_pmid = first_pmid
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = []
+        self.histories = {}
+        self.failures = []
+        # Entrez日期（edat）与修改日期（mdat），未列出的PMID视为2000/01/01
+        self.entrez_dates = {}
+        self.modified_dates = {}
+        self.retracted = set()
+        self._lock = threading.Lock()
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def pmids(self):
+        return [str(self.first_pmid + i) for i in range(self.corpus_size)]
+
+    def pmids_for(self, term):
+        """检索词命中的PMID列表，测试可以替换此方法模拟不同检索的结果"""
+        return self.pmids()
+
+    def start(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                self.respond(parsed.path, {k: v[-1] for k, v in parse_qs(parsed.query).items()})
+
+            def do_POST(self):
+                parsed = urlparse(self.path)
+                length = int(self.headers.get("Content-Length", 0))
+                form = parse_qs(self.rfile.read(length).decode("utf-8"))
+                params = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+                params.update({k: v[-1] for k, v in form.items()})
+                self.respond(parsed.path, params)
+
+            def respond(self, path, params):
+                with server._lock:
+                    server.requests.append((path, params))
+                status, body = server.handle(path.rsplit("/", 1)[-1], params)
+                if isinstance(body, str):
+                    payload = body.encode("utf-8")
+                    content_type = "text/plain"
+                else:
+                    payload = json.dumps(body).encode("utf-8")
+                    content_type = "application/json"
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def handle(self, endpoint, params):
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            failure = self.failures.pop(0) if self.failures else None
+            if failure is None and self.error_rate and self.random.random() < self.error_rate:
+                failure = 503
+        if failure is not None:
+            return failure, {"error": "simulated failure"}
+        if endpoint == "esearch.fcgi":
+            return self.esearch(params)
+        if endpoint == "esummary.fcgi":
+            return self.esummary(params)
+        if endpoint == "efetch.fcgi":
+            return self.efetch(params)
+        return 404, {"error": f"unknown endpoint {endpoint}"}
+
+    def esearch(self, params):
+        term = params.get("term", "")
+        pmids = self.pmids_for(term)
+        if "retracted publication[pt]" in term:
+            pmids = [pmid for pmid in pmids if pmid in self.retracted]
+        if "mindate" in params:
+            dates = self.modified_dates if params.get("datetype") == "mdat" else self.entrez_dates
+            pmids = [pmid for pmid in pmids if params["mindate"] <= dates.get(pmid, "2000/01/01") <= params.get("maxdate", "3000/12/31")]
+        if params.get("rettype") == "count":
+            return 200, {"esearchresult": {"count": str(len(pmids))}}
+        retstart = int(params.get("retstart", 0))
+        retmax = int(params.get("retmax", 20))
+        result = {
+            "count": str(len(pmids)),
+            "retmax": str(min(retmax, max(len(pmids) - retstart, 0))),
+            "retstart": str(retstart),
+            "idlist": pmids[retstart:retstart + retmax],
+        }
+        if params.get("usehistory") == "y":
+            webenv = uuid.uuid4().hex
+            with self._lock:
+                self.histories[webenv] = pmids
+            result["webenv"] = webenv
+            result["querykey"] = "1"
+        return 200, {"esearchresult": result}
+
+    def history_ids(self, params):
+        """按WebEnv/query_key或id参数解析本次请求涉及的PMID，无效时返回None"""
+        if "WebEnv" in params:
+            pmids = self.histories.get(params["WebEnv"])
+            if pmids is None or params.get("query_key") != "1":
+                return None
+            retstart = int(params.get("retstart", 0))
+            retmax = int(params.get("retmax", 20))
+            return pmids[retstart:retstart + retmax]
+        return [pmid for pmid in params.get("id", "").split(",") if pmid]
+
+    def esummary(self, params):
+        ids = self.history_ids(params)
+        if ids is None:
+            return 200, {"error": "Invalid query_key or WebEnv"}
+        result = {"uids": ids}
+        for pmid in ids:
+            result[pmid] = make_summary(pmid)
+        return 200, {"result": result}
+
+    def efetch(self, params):
+        ids = self.history_ids(params)
+        if ids is None:
+            return 400, "Invalid query_key or WebEnv"
+        if params.get("rettype") == "uilist":
+            return 200, "".join(f"{pmid}\n" for pmid in ids)
+        if params.get("rettype") == "abstract":
+            return 200, "<?xml version=\"1.0\"?><PubmedArticleSet>" + "".join(make_article_xml(pmid) for pmid in ids) + "</PubmedArticleSet>"
+        return 400, f"unsupported rettype {params.get('rettype')}"
@@ -0,0 +1,214 @@
+import csv
+import io
+import json
+import sys
+from collections.abc import MutableMapping
+from operator import attrgetter
+
+# 结果字段，顺序与导出列一致；URL由PMID计算，不单独保存
+FIELDS = ("PMID", "Title", "Authors", "Journal", "Publication_Date", "DOI", "Abstract", "Study_Type", "URL",
+          "MeSH_Terms", "Publication_Types")
+STORED_FIELDS = tuple(field for field in FIELDS if field != "URL")
+
+# 只有EFetch补充后才有的字段，未补充时不出现在keys()中（与原来的字典记录一致）
+OPTIONAL_FIELDS = frozenset(("MeSH_Terms", "Publication_Types"))
+
+FIELD_SET = frozenset(FIELDS)
+
+# PubMed出版类型到研究类型的对照表：(优先级, 研究类型)，多个出版类型时取优先级最高者
+STUDY_TYPE_BY_PUBTYPE = {
+    "Randomized Controlled Trial": (0, "RCT"),
+    "Systematic Review": (1, "Systematic Review"),
+    "Meta-Analysis": (2, "Meta-Analysis"),
+    "Review": (3, "Review"),
+}
+DEFAULT_STUDY_TYPE = (4, "Original Research")
+
+# 大量记录共用的期刊名与日期字符串只保留一份
+intern = sys.intern
+
+# ESummary的作者列表只保留前几位
+MAX_AUTHORS = 3
+
+
+class Record(MutableMapping):
+    """一篇文献的检索结果
+
+    使用__slots__保存字段，比字典占用的内存小得多；同时实现映射接口（record["Title"]、get、
+    keys、{**record}等），可以直接替代原来的结果字典。可选字段为None时视为不存在。
+    """
+
+    __slots__ = STORED_FIELDS
+
+    def __init__(self, PMID, Title="", Authors="", Journal="", Publication_Date="", DOI="", Abstract="",
+                 Study_Type="", MeSH_Terms=None, Publication_Types=None):
+        self.PMID = PMID
+        self.Title = Title
+        self.Authors = Authors
+        self.Journal = Journal
+        self.Publication_Date = Publication_Date
+        self.DOI = DOI
+        self.Abstract = Abstract
+        self.Study_Type = Study_Type
+        self.MeSH_Terms = MeSH_Terms
+        self.Publication_Types = Publication_Types
+
+    @classmethod
+    def from_mapping(cls, mapping):
+        """由字典（如缓存中的JSON）构造记录，忽略URL等不保存的字段"""
+        return cls(**{field: mapping[field] for field in STORED_FIELDS if field in mapping})
+
+    @property
+    def URL(self):
+        return f"https://pubmed.ncbi.nlm.nih.gov/{self.PMID}/"
+
+    def __getitem__(self, key):
+        if key not in FIELD_SET:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        if key not in FIELD_SET:
+            return default
+        value = getattr(self, key)
+        return default if value is None else value
+
+    def __setitem__(self, key, value):
+        if key not in FIELD_SET or key == "URL":
+            raise KeyError(f"记录不支持设置字段: {key}")
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        if key not in OPTIONAL_FIELDS or getattr(self, key) is None:
+            raise KeyError(key)
+        setattr(self, key, None)
+
+    def __iter__(self):
+        for field in FIELDS:
+            if field not in OPTIONAL_FIELDS or getattr(self, field) is not None:
+                yield field
+
+    def __len__(self):
+        return len(FIELDS) - sum(1 for field in OPTIONAL_FIELDS if getattr(self, field) is None)
+
+    def __repr__(self):
+        return f"Record({dict(self)!r})"
+
+    def __reduce__(self):
+        return Record, tuple(getattr(self, field) for field in STORED_FIELDS)
+
+
+def parse_esummary_article(pmid, article):
+    """单次遍历ESummary记录生成Record：作者只取前3位，DOI找到即停，研究类型查表确定"""
+    get = article.get
+
+    authors = get("authors")
+    if authors:
+        author_str = ", ".join([author.get("name", "") for author in authors[:MAX_AUTHORS]])
+        if len(authors) > MAX_AUTHORS:
+            author_str += " et al"
+    else:
+        author_str = ""
+
+    doi = ""
+    for article_id in get("articleids", ()):
+        if article_id.get("idtype") == "doi":
+            doi = article_id.get("value", "")
+            break
+
+    study_type = ""
+    pub_types = get("pubtype")
+    if pub_types is not None:
+        best = DEFAULT_STUDY_TYPE
+        for pub_type in pub_types:
+            candidate = STUDY_TYPE_BY_PUBTYPE.get(pub_type)
+            if candidate is not None and candidate < best:
+                best = candidate
+        study_type = best[1]
+
+    journal = get("fulljournalname")
+    if journal is None:
+        journal = get("source", "")
+
+    return Record(
+        pmid,
+        get("title", ""),
+        author_str,
+        intern(journal),
+        intern(get("pubdate", "")),
+        doi,
+        "",  # ESummary不包含摘要，需要EFetch获取
+        study_type,
+        None,
+        None,
+    )
+
+
+def row_getter(fieldnames):
+    """返回按fieldnames取出一行值的函数；Record直接读属性，字典记录（如附加了字段的合并结果）按键读取"""
+    fieldnames = tuple(fieldnames)
+    direct = all(field in FIELD_SET for field in fieldnames)
+    attributes = attrgetter(*fieldnames) if direct else None
+
+    def values(row):
+        if attributes is not None and type(row) is Record:
+            result = attributes(row)
+            return result if len(fieldnames) > 1 else (result,)
+        return tuple(row.get(field, "") for field in fieldnames)
+
+    return values
+
+
+def write_csv(output, rows, fieldnames, header=True):
+    """将记录写入文本流，Record不经过中间字典；缺失的可选字段输出为空"""
+    writer = csv.writer(output, lineterminator="\r\n")
+    if header:
+        writer.writerow(fieldnames)
+    writer.writerows(map(row_getter(fieldnames), rows))
+
+
+def encode_csv(rows, fieldnames, header=True):
+    buffer = io.StringIO()
+    write_csv(buffer, rows, fieldnames, header)
+    return buffer.getvalue()
+
+
+def encode_ndjson(rows):
+    """逐行编码JSON，与json.dumps(dict(record))的输出相同；Record只输出存在的字段"""
+    encode = JSON_ENCODER.encode
+    lines = []
+    for row in rows:
+        if type(row) is Record:
+            row = dict(record_items(row))
+        lines.append(encode(row))
+    lines.append("")
+    return "\n".join(lines) if len(lines) > 1 else ""
+
+
+STORED_GETTER = attrgetter(*FIELDS)
+REQUIRED_FIELDS = tuple(field for field in FIELDS if field not in OPTIONAL_FIELDS)
+REQUIRED_GETTER = attrgetter(*REQUIRED_FIELDS)
+
+# 复用同一个编码器：json.dumps带参数调用时每次都会新建JSONEncoder
+JSON_ENCODER = json.JSONEncoder(ensure_ascii=False)
+
+
+def record_items(record):
+    """按导出列顺序返回记录中存在的(字段, 值)"""
+    mesh_terms, publication_types = record.MeSH_Terms, record.Publication_Types
+    if mesh_terms is None and publication_types is None:
+        return zip(REQUIRED_FIELDS, REQUIRED_GETTER(record))
+    items = zip(FIELDS, STORED_GETTER(record))
+    if mesh_terms is None or publication_types is None:
+        return [(field, value) for field, value in items if value is not None]
+    return items
+
+
+def to_jsonable(value):
+    """json.dumps的default参数：Record转为字典"""
+    if isinstance(value, Record):
+        return dict(record_items(value))
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,196 @@
+import base64
+import re
+import threading
+import time
+import uuid
+from array import array
+from collections import OrderedDict
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+    "spring": 3, "summer": 6, "fall": 9, "autumn": 9, "winter": 12,
+}
+
+DATE_PATTERN = re.compile(r"(\d{4})(?:[ /-]([A-Za-z]+|\d{1,2}))?(?:[ /-](\d{1,2}))?")
+
+# 可用于分面统计与筛选的字段
+FACET_FIELDS = ("Study_Type", "Year", "Journal")
+
+SORT_KEYS = ("date", "journal")
+
+
+def date_key(pub_date):
+    """将PubMed发表日期（如 2019 Mar 5、2019/03/05、2018 Winter）转换为可排序的整数YYYYMMDD"""
+    match = DATE_PATTERN.match(pub_date or "")
+    if not match:
+        return 0
+    year, month, day = match.groups()
+    if month is None:
+        month_number = 0
+    elif month.isdigit():
+        month_number = int(month)
+    else:
+        month_number = MONTHS.get(month[:3].lower(), MONTHS.get(month.lower(), 0))
+    return int(year) * 10000 + month_number * 100 + (int(day) if day else 0)
+
+
+def encode_cursor(sort, order, position):
+    return base64.urlsafe_b64encode(f"{sort}:{order}:{position}".encode("ascii")).decode("ascii")
+
+
+def decode_cursor(cursor, sort, order):
+    """解析游标，排序方式不一致时抛出ValueError"""
+    try:
+        cursor_sort, cursor_order, position = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii").split(":")
+        position = int(position)
+    except Exception:
+        raise ValueError("无效的分页游标")
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise ValueError("分页游标与排序方式不一致")
+    return position
+
+
+class FacetColumn:
+    """字典编码的列：每行保存取值编号，另存取值表与每个取值的行号集合"""
+
+    def __init__(self, values):
+        self.labels = []
+        self.codes = array("I")
+        self.rows = []
+        index = {}
+        for row, value in enumerate(values):
+            code = index.get(value)
+            if code is None:
+                code = index[value] = len(self.labels)
+                self.labels.append(value)
+                self.rows.append(array("I"))
+            self.codes.append(code)
+            self.rows[code].append(row)
+        self.index = index
+
+    def counts(self, rows=None):
+        """统计各取值的行数，rows为None时统计全部行"""
+        if rows is None:
+            return {self.labels[code]: len(code_rows) for code, code_rows in enumerate(self.rows)}
+        tally = [0] * len(self.labels)
+        codes = self.codes
+        for row in rows:
+            tally[codes[row]] += 1
+        return {self.labels[code]: count for code, count in enumerate(tally) if count}
+
+
+class ResultView:
+    """服务器端保存的检索结果，支持游标分页、排序、筛选与分面统计
+
+    记录按列保存；期刊、研究类型和年份字典编码，排序顺序在创建时预先计算。
+    """
+
+    def __init__(self, results, fieldnames):
+        self.fieldnames = list(fieldnames)
+        self.size = len(results)
+        self.columns = {field: [record.get(field, "") for record in results] for field in self.fieldnames}
+        self.date_keys = array("I", (date_key(date) for date in self.columns.get("Publication_Date", [""] * self.size)))
+        years = [str(key // 10000) if key else "" for key in self.date_keys]
+        self.facets = {
+            "Study_Type": FacetColumn(self.columns.get("Study_Type", [""] * self.size)),
+            "Year": FacetColumn(years),
+            "Journal": FacetColumn(self.columns.get("Journal", [""] * self.size)),
+        }
+        journal_codes = self.facets["Journal"]
+        journal_rank = {code: rank for rank, code in enumerate(sorted(range(len(journal_codes.labels)), key=lambda c: journal_codes.labels[c].lower()))}
+        ascending = {
+            "date": array("I", sorted(range(self.size), key=lambda row: (self.date_keys[row], row))),
+            "journal": array("I", sorted(range(self.size), key=lambda row: (journal_rank[journal_codes.codes[row]], self.date_keys[row], row))),
+        }
+        self.orders = {}
+        for sort, sequence in ascending.items():
+            self.orders[(sort, "asc")] = sequence
+            self.orders[(sort, "desc")] = sequence[::-1]
+        self.created_at = time.time()
+
+    def record(self, row):
+        return {field: self.columns[field][row] for field in self.fieldnames}
+
+    def matching_rows(self, filters):
+        """返回满足全部筛选条件的行号集合，无筛选时返回None"""
+        matched = None
+        for field, values in filters.items():
+            column = self.facets[field]
+            rows = set()
+            for value in values:
+                code = column.index.get(value)
+                if code is not None:
+                    rows.update(column.rows[code])
+            matched = rows if matched is None else matched & rows
+        return matched
+
+    def query(self, sort="date", order="desc", limit=50, cursor=None, filters=None, include_facets=True, facet_limit=20):
+        if sort not in SORT_KEYS:
+            raise ValueError(f"不支持的排序字段: {sort}")
+        if order not in ("asc", "desc"):
+            raise ValueError(f"不支持的排序方向: {order}")
+        filters = {field: values for field, values in (filters or {}).items() if values}
+        unknown = set(filters) - set(FACET_FIELDS)
+        if unknown:
+            raise ValueError(f"不支持的筛选字段: {', '.join(sorted(unknown))}")
+        position = decode_cursor(cursor, sort, order) if cursor else 0
+
+        matched = self.matching_rows(filters)
+        sequence = self.orders[(sort, order)]
+
+        # 从游标位置沿排序顺序扫描，跳过不满足筛选的行；多找到一行即说明还有下一页
+        items = []
+        next_position = None
+        while position < self.size:
+            row = sequence[position]
+            if matched is None or row in matched:
+                if len(items) == limit:
+                    next_position = position
+                    break
+                items.append(self.record(row))
+            position += 1
+
+        response = {
+            "total": self.size,
+            "matched": self.size if matched is None else len(matched),
+            "items": items,
+            "next_cursor": encode_cursor(sort, order, next_position) if next_position is not None else None,
+        }
+        if include_facets:
+            response["facets"] = {}
+            for field in FACET_FIELDS:
+                counts = self.facets[field].counts(matched)
+                top = sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:facet_limit]
+                response["facets"][field] = dict(top)
+        return response
+
+
+class ResultViewRegistry:
+    """按result_id保存ResultView，数量与保存时间有上限（LRU淘汰）"""
+
+    def __init__(self, max_views=32, ttl=3600):
+        self.max_views = max_views
+        self.ttl = ttl
+        self.views = OrderedDict()
+        self.lock = threading.Lock()
+
+    def register(self, results, fieldnames):
+        view = ResultView(results, fieldnames)
+        result_id = uuid.uuid4().hex
+        with self.lock:
+            self.views[result_id] = view
+            while len(self.views) > self.max_views:
+                self.views.popitem(last=False)
+        return result_id
+
+    def get(self, result_id):
+        with self.lock:
+            view = self.views.get(result_id)
+            if view is None:
+                return None
+            if view.created_at + self.ttl < time.time():
+                del self.views[result_id]
+                return None
+            self.views.move_to_end(result_id)
+            return view
@@ -0,0 +1,91 @@
+import time
+
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, Text, insert, select, update
+
+metadata = MetaData()
+
+saved_searches_table = Table(
+    "saved_searches",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("name", String(255), nullable=False),
+    Column("search_strategy", Text, nullable=False),
+    Column("created_at", Float, nullable=False),
+    Column("last_run_at", Float, nullable=False),
+    Column("total_count", Integer, nullable=False, default=0),
+    # 上次运行时的PMID集合，以空格分隔保存
+    Column("pmids", Text, nullable=False, default=""),
+)
+
+
+class SavedSearchNotConfigured(Exception):
+    """未通过init_app配置数据库"""
+
+
+def row_to_dict(row, include_pmids=False):
+    data = {
+        "id": row.id,
+        "name": row.name,
+        "search_strategy": row.search_strategy,
+        "created_at": row.created_at,
+        "last_run_at": row.last_run_at,
+        "total_count": row.total_count,
+    }
+    if include_pmids:
+        data["pmids"] = row.pmids.split() if row.pmids else []
+    return data
+
+
+class SavedSearchStore:
+    """保存定期重跑的检索策略及其上次运行时间与PMID集合
+
+    通过init_app使用应用已配置的SQLAlchemy数据库。
+    """
+
+    def __init__(self):
+        self.engine = None
+
+    def init_app(self, app):
+        """创建saved_searches表，需在db.init_app(app)之后调用"""
+        if "sqlalchemy" not in app.extensions:
+            return
+        with app.app_context():
+            self.engine = app.extensions["sqlalchemy"].engine
+        metadata.create_all(self.engine)
+
+    def require_engine(self):
+        if self.engine is None:
+            raise SavedSearchNotConfigured("保存检索需要配置数据库")
+        return self.engine
+
+    def create(self, name, search_strategy, pmids, total_count, run_at=None):
+        run_at = run_at or time.time()
+        with self.require_engine().begin() as conn:
+            result = conn.execute(insert(saved_searches_table).values(
+                name=name,
+                search_strategy=search_strategy,
+                created_at=run_at,
+                last_run_at=run_at,
+                total_count=total_count,
+                pmids=" ".join(pmids),
+            ))
+            return result.inserted_primary_key[0]
+
+    def get(self, saved_id, include_pmids=False):
+        with self.require_engine().connect() as conn:
+            row = conn.execute(select(saved_searches_table).where(saved_searches_table.c.id == saved_id)).first()
+        return row_to_dict(row, include_pmids) if row is not None else None
+
+    def list(self):
+        columns = [c for c in saved_searches_table.c if c.name != "pmids"]
+        with self.require_engine().connect() as conn:
+            rows = conn.execute(select(*columns).order_by(saved_searches_table.c.id)).all()
+        return [dict(row._mapping) for row in rows]
+
+    def record_run(self, saved_id, pmids, total_count, run_at=None):
+        with self.require_engine().begin() as conn:
+            conn.execute(update(saved_searches_table).where(saved_searches_table.c.id == saved_id).values(
+                last_run_at=run_at or time.time(),
+                total_count=total_count,
+                pmids=" ".join(pmids),
+            ))
@@ -0,0 +1,273 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+
+from sqlalchemy import Boolean, Column, Float, Index, Integer, MetaData, String, Table, Text, column, func, insert, inspect, select
+from sqlalchemy import table as table_clause
+from sqlalchemy import text as text_clause
+from sqlalchemy.exc import OperationalError
+
+from metrics import REGISTRY
+from search_cache import normalize_strategy
+
+logger = logging.getLogger(__name__)
+
+metadata = MetaData()
+
+search_audit_table = Table(
+    "search_audit_log",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("logged_at", Float, nullable=False, index=True),
+    Column("timestamp", String(32), nullable=False),
+    Column("search_strategy", Text, nullable=False),
+    # 规范化后的策略，相同检索的精确查找走索引
+    Column("normalized_strategy", Text, nullable=False, index=True),
+    Column("retmax", Integer),
+    Column("fetch_all", Boolean, nullable=False, default=False),
+    Column("include_abstracts", Boolean, nullable=False, default=False),
+    Column("cache", String(16), nullable=False, default=""),
+    Column("results_count", Integer),
+    Column("total_count", Integer),
+    Column("error", Text),
+    Column("tool", String(64), nullable=False, default=""),
+    Index("ix_search_audit_log_total_count_logged_at", "total_count", "logged_at"),
+)
+
+# 策略文本的trigram全文索引（SQLite FTS5外部内容表），由触发器与日志表保持同步
+STRATEGY_INDEX_TABLE = "search_audit_fts"
+
+strategy_index_table = table_clause(STRATEGY_INDEX_TABLE, column("rowid"))
+
+# trigram索引只能匹配至少3个字符的子串，更短的检索词按日期范围扫描
+MIN_INDEXED_TEXT = 3
+
+AUDIT_COLUMNS = ("timestamp", "search_strategy", "retmax", "fetch_all", "include_abstracts", "cache",
+                 "results_count", "total_count", "error", "tool")
+
+AUDIT_WRITES = REGISTRY.counter("search_audit_writes_total", "写入检索日志的记录数")
+AUDIT_DROPPED = REGISTRY.counter("search_audit_dropped_total", "队列已满或写入失败而丢弃的检索日志数")
+AUDIT_BATCHES = REGISTRY.histogram("search_audit_batch_size", "每次提交的检索日志条数", buckets=(1, 10, 50, 100, 500, 1000))
+
+
+class SearchHistoryNotConfigured(Exception):
+    """未通过init_app配置数据库"""
+
+
+def row_to_entry(row):
+    entry = {"id": row.id, "logged_at": row.logged_at}
+    for column in AUDIT_COLUMNS:
+        entry[column] = getattr(row, column)
+    return entry
+
+
+def enable_wal(engine):
+    """SQLite数据库切换为WAL模式：写入不阻塞读取，日志批量提交时开销更小；设置保存在数据库文件中"""
+    if engine.dialect.name != "sqlite":
+        return None
+    with engine.connect() as conn:
+        mode = conn.exec_driver_sql("PRAGMA journal_mode=WAL").scalar()
+        conn.commit()
+    return mode
+
+
+def create_strategy_index(engine):
+    """创建策略文本的trigram索引与同步触发器，新建时补入已有日志；SQLite不支持FTS5 trigram时返回False"""
+    if engine.dialect.name != "sqlite":
+        return False
+    table = search_audit_table.name
+    created = not inspect(engine).has_table(STRATEGY_INDEX_TABLE)
+    try:
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {STRATEGY_INDEX_TABLE} USING fts5("
+                f"search_strategy, content='{table}', content_rowid='id', tokenize='trigram')"
+            )
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER IF NOT EXISTS {STRATEGY_INDEX_TABLE}_insert AFTER INSERT ON {table} BEGIN "
+                f"INSERT INTO {STRATEGY_INDEX_TABLE}(rowid, search_strategy) VALUES (new.id, new.search_strategy); END"
+            )
+            conn.exec_driver_sql(
+                f"CREATE TRIGGER IF NOT EXISTS {STRATEGY_INDEX_TABLE}_delete AFTER DELETE ON {table} BEGIN "
+                f"INSERT INTO {STRATEGY_INDEX_TABLE}({STRATEGY_INDEX_TABLE}, rowid, search_strategy) "
+                f"VALUES ('delete', old.id, old.search_strategy); END"
+            )
+            if created:
+                conn.exec_driver_sql(f"INSERT INTO {STRATEGY_INDEX_TABLE}({STRATEGY_INDEX_TABLE}) VALUES ('rebuild')")
+    except OperationalError as e:
+        logger.warning("SQLite不支持FTS5 trigram，检索历史的策略文本筛选将扫描日期范围内的日志: %s", e)
+        return False
+    return True
+
+
+class SearchAuditLog:
+    """检索日志的后写式（write-behind）持久化
+
+    record()只把日志放入有界队列，由后台线程攒批后在一个事务中写入search_audit_log表，
+    请求线程不等待数据库。队列已满时丢弃新日志并计数，不阻塞检索。
+    通过init_app使用应用已配置的SQLAlchemy数据库；未初始化时record()不做任何事。
+    """
+
+    def __init__(self, batch_size=200, flush_interval=1.0, max_queue=10000):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.engine = None
+        self.text_index = False
+        self.thread = None
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+
+    @property
+    def enabled(self):
+        return self.engine is not None
+
+    def init_app(self, app):
+        """创建search_audit_log表、启用WAL并启动写入线程，需在db.init_app(app)之后调用"""
+        self.batch_size = app.config.get("SEARCH_AUDIT_BATCH_SIZE", self.batch_size)
+        self.flush_interval = app.config.get("SEARCH_AUDIT_FLUSH_INTERVAL", self.flush_interval)
+        if not app.config.get("SEARCH_AUDIT_ENABLED", True) or "sqlalchemy" not in app.extensions:
+            return
+        with app.app_context():
+            self.engine = app.extensions["sqlalchemy"].engine
+        metadata.create_all(self.engine)
+        enable_wal(self.engine)
+        self.text_index = create_strategy_index(self.engine)
+        self.start()
+        # 进程正常退出时写入队列中剩余的日志
+        atexit.register(self.flush)
+
+    def require_engine(self):
+        if self.engine is None:
+            raise SearchHistoryNotConfigured("检索历史需要配置数据库")
+        return self.engine
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.run, name="search-audit-writer", daemon=True)
+            self.thread.start()
+
+    def record(self, search_log):
+        """将一条检索日志放入写入队列，不等待数据库"""
+        if self.engine is None:
+            return False
+        entry = {column: search_log.get(column) for column in AUDIT_COLUMNS}
+        entry["logged_at"] = time.time()
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+            AUDIT_DROPPED.inc()
+            return False
+        return True
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            # 在flush_interval内攒够一批再提交，空闲时单条日志最多延迟flush_interval秒
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            try:
+                self.write(batch)
+            except Exception as e:
+                self.dropped += len(batch)
+                AUDIT_DROPPED.inc(len(batch))
+                logger.exception("写入检索日志失败，丢弃 %d 条: %s", len(batch), e)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    def write(self, batch):
+        rows = []
+        for entry in batch:
+            rows.append({
+                **entry,
+                "normalized_strategy": normalize_strategy(entry["search_strategy"] or ""),
+                "search_strategy": entry["search_strategy"] or "",
+                "timestamp": entry["timestamp"] or "",
+                "fetch_all": bool(entry["fetch_all"]),
+                "include_abstracts": bool(entry["include_abstracts"]),
+                "cache": entry["cache"] or "",
+                "tool": entry["tool"] or "",
+            })
+        with self.engine.begin() as conn:
+            conn.execute(insert(search_audit_table), rows)
+        self.written += len(rows)
+        self.batches += 1
+        AUDIT_WRITES.inc(len(rows))
+        AUDIT_BATCHES.observe(len(rows))
+
+    def flush(self):
+        """等待队列中已有的日志全部写入"""
+        if self.thread is not None and self.thread.is_alive():
+            self.queue.join()
+
+    def query(self, start=None, end=None, strategy=None, text=None, min_count=None, max_count=None,
+              limit=50, cursor=None):
+        """按时间倒序查询检索日志，返回(日志列表, 下一页游标)
+
+        start/end为Unix时间戳；strategy按规范化后的策略精确匹配，text为策略中的子串（不区分大小写），
+        至少3个字符时通过trigram索引查找，否则在start/end限定的范围内扫描；
+        min_count/max_count限制命中总数。cursor为上一页最后一条日志的id。
+        """
+        table = search_audit_table
+        statement = select(table)
+        if start is not None:
+            statement = statement.where(table.c.logged_at >= start)
+        if end is not None:
+            statement = statement.where(table.c.logged_at < end)
+        if strategy:
+            statement = statement.where(table.c.normalized_strategy == normalize_strategy(strategy))
+        if text and self.text_index and len(text) >= MIN_INDEXED_TEXT:
+            matches = select(strategy_index_table.c.rowid).where(
+                text_clause(f"{STRATEGY_INDEX_TABLE} MATCH :pattern").bindparams(pattern='"' + text.replace('"', '""') + '"')
+            )
+            statement = statement.where(table.c.id.in_(matches))
+        elif text:
+            escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            statement = statement.where(table.c.search_strategy.ilike(f"%{escaped}%", escape="\\"))
+        if min_count is not None:
+            statement = statement.where(table.c.total_count >= min_count)
+        if max_count is not None:
+            statement = statement.where(table.c.total_count <= max_count)
+        if cursor is not None:
+            statement = statement.where(table.c.id < cursor)
+        statement = statement.order_by(table.c.id.desc()).limit(limit + 1)
+
+        with self.require_engine().connect() as conn:
+            rows = conn.execute(statement).all()
+        entries = [row_to_entry(row) for row in rows[:limit]]
+        next_cursor = entries[-1]["id"] if len(rows) > limit else None
+        return entries, next_cursor
+
+    def get(self, entry_id):
+        with self.require_engine().connect() as conn:
+            row = conn.execute(select(search_audit_table).where(search_audit_table.c.id == entry_id)).first()
+        return row_to_entry(row) if row is not None else None
+
+    def count(self):
+        if self.engine is None:
+            return 0
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(search_audit_table)).scalar()
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "queued": self.queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+        }
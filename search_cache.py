@@ -0,0 +1,263 @@
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, Text, delete, insert, select
+
+from records import FIELD_SET, OPTIONAL_FIELDS, Record, to_jsonable
+
+metadata = MetaData()
+
+search_cache_table = Table(
+    "search_cache",
+    metadata,
+    Column("cache_key", String(2048), primary_key=True),
+    Column("created_at", Float, nullable=False, index=True),
+    Column("total_count", Integer, nullable=False),
+    Column("results", Text, nullable=False),
+)
+
+# 完整的检索结果记录必有的字段
+REQUIRED_FIELDS = FIELD_SET - OPTIONAL_FIELDS
+
+# 检索策略中的引号短语、字段标签与括号
+TOKEN_PATTERN = re.compile(r'"[^"]*"|\[[^\]]*\]|\(|\)|[^\s()\["]+')
+
+
+def restore_record(item):
+    """将持久层JSON中的结果字典还原为Record，与内存层保存的对象一致；字段不完整或含额外字段的字典原样返回"""
+    if isinstance(item, dict) and REQUIRED_FIELDS <= item.keys() <= FIELD_SET:
+        return Record.from_mapping(item)
+    return item
+
+
+def normalize_field_tag(tag):
+    """统一字段标签的大小写与空白，如 [ MeSH  Terms] -> [mesh terms]"""
+    return "[" + " ".join(tag[1:-1].split()).lower() + "]"
+
+
+def strip_redundant_parentheses(tokens):
+    """去除包裹整个表达式、重复嵌套或只包裹单个检索词的括号"""
+    changed = True
+    while changed:
+        changed = False
+        pairs = {}
+        stack = []
+        for i, token in enumerate(tokens):
+            if token == "(":
+                stack.append(i)
+            elif token == ")" and stack:
+                pairs[stack.pop()] = i
+        if stack:
+            # 括号不匹配时保持原样
+            return tokens
+        for start, end in pairs.items():
+            inner = tokens[start + 1:end]
+            whole = start == 0 and end == len(tokens) - 1
+            doubled = pairs.get(start + 1) == end - 1
+            # 单个检索词可以带字段标签，如 (diabetes [mesh])
+            single = len(inner) == 1 or (len(inner) == 2 and inner[1].startswith("["))
+            if whole or doubled or single:
+                tokens = tokens[:start] + inner + tokens[end + 1:]
+                changed = True
+                break
+    return tokens
+
+
+def normalize_strategy(query):
+    """规范化检索策略，使仅有格式差异的策略得到相同的缓存键"""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(query):
+        if token.startswith("["):
+            token = normalize_field_tag(token)
+        elif token.startswith('"'):
+            token = '"' + " ".join(token[1:-1].split()) + '"'
+        tokens.append(token)
+    tokens = strip_redundant_parentheses(tokens)
+    text = " ".join(tokens)
+    # 字段标签紧跟检索词，括号内外不留空格
+    text = text.replace(" [", "[").replace("( ", "(").replace(" )", ")")
+    return text
+
+
+def matching_parentheses(tokens):
+    """返回{左括号位置: 右括号位置}，括号不匹配时返回None"""
+    pairs = {}
+    stack = []
+    for i, token in enumerate(tokens):
+        if token == "(":
+            stack.append(i)
+        elif token == ")":
+            if not stack:
+                return None
+            pairs[stack.pop()] = i
+    return pairs if not stack else None
+
+
+def split_and_blocks(query):
+    """将检索策略按顶层AND拆分为若干检索块，返回各块的原文
+
+    包裹整个策略的括号先去掉；顶层含OR时PubMed按从左到右的顺序组合，拆分会改变含义，此时不拆分。
+    括号不匹配时同样返回整个策略。
+    """
+    matches = list(TOKEN_PATTERN.finditer(query))
+    while True:
+        tokens = [m.group() for m in matches]
+        pairs = matching_parentheses(tokens)
+        if pairs is None:
+            return [query.strip()] if query.strip() else []
+        if tokens and pairs.get(0) == len(tokens) - 1:
+            matches = matches[1:-1]
+            continue
+        break
+
+    blocks = []
+    block_start = 0
+    depth = 0
+    for i, token in enumerate(tokens):
+        if token == "(":
+            depth += 1
+        elif token == ")":
+            depth -= 1
+        elif depth == 0 and token == "OR":
+            return [query[matches[0].start():matches[-1].end()].strip()]
+        elif depth == 0 and token == "AND":
+            blocks.append((block_start, i))
+            block_start = i + 1
+    blocks.append((block_start, len(tokens)))
+    return [query[matches[start].start():matches[end - 1].end()] for start, end in blocks if end > start]
+
+
+class SearchCache:
+    """检索结果缓存：带TTL的内存LRU层，加上可选的SQLite持久层
+
+    内存层同时按条目数与记录总数限制，超过max_records的单个结果不缓存；
+    超过max_persist_records的结果只保存在内存层，避免在请求线程中序列化整个结果集。
+    持久层通过init_app使用应用已配置的SQLAlchemy数据库。
+    """
+
+    def __init__(self, max_entries=128, ttl=3600, max_records=200000, max_persist_records=10000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_records = max_records
+        self.max_persist_records = max_persist_records
+        self.entries = OrderedDict()
+        self.records = 0
+        self.engine = None
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def init_app(self, app):
+        """启用持久层，需在db.init_app(app)之后调用"""
+        self.max_entries = app.config.get("SEARCH_CACHE_MAX_ENTRIES", self.max_entries)
+        self.ttl = app.config.get("SEARCH_CACHE_TTL", self.ttl)
+        self.max_records = app.config.get("SEARCH_CACHE_MAX_RECORDS", self.max_records)
+        self.max_persist_records = app.config.get("SEARCH_CACHE_MAX_PERSIST_RECORDS", self.max_persist_records)
+        if not app.config.get("SEARCH_CACHE_PERSISTENT", True) or "sqlalchemy" not in app.extensions:
+            return
+        with app.app_context():
+            self.engine = app.extensions["sqlalchemy"].engine
+        metadata.create_all(self.engine)
+
+    @staticmethod
+    def make_key(query, retmax, fetch_all=False, include_abstracts=False):
+        return f"{normalize_strategy(query)}|retmax={retmax}|all={int(bool(fetch_all))}|abstracts={int(bool(include_abstracts))}"
+
+    def get(self, key):
+        """返回缓存的(results, total_count)，未命中返回None"""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                self.discard(key)
+
+        value = self.get_persistent(key, now)
+        with self.lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.persistent_hits += 1
+        self.put(key, value, persist=False)
+        return value
+
+    def put(self, key, value, persist=True):
+        size = len(value[0])
+        with self.lock:
+            self.discard(key)
+            if size <= self.max_records:
+                self.entries[key] = (time.time() + self.ttl, value, size)
+                self.records += size
+                while len(self.entries) > self.max_entries or self.records > self.max_records:
+                    _, (_, _, evicted) = self.entries.popitem(last=False)
+                    self.records -= evicted
+        if persist and size <= self.max_persist_records:
+            self.put_persistent(key, value)
+
+    def discard(self, key):
+        """移除内存层中的条目，调用方需持有lock"""
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.records -= entry[2]
+
+    def get_persistent(self, key, now):
+        if self.engine is None:
+            return None
+        with self.engine.connect() as conn:
+            row = conn.execute(
+                select(search_cache_table.c.total_count, search_cache_table.c.results)
+                .where(search_cache_table.c.cache_key == key)
+                .where(search_cache_table.c.created_at > now - self.ttl)
+            ).first()
+        if row is None:
+            return None
+        return [restore_record(item) for item in json.loads(row.results)], row.total_count
+
+    def put_persistent(self, key, value):
+        if self.engine is None:
+            return
+        results, total_count = value
+        now = time.time()
+        with self.engine.begin() as conn:
+            conn.execute(delete(search_cache_table).where(
+                (search_cache_table.c.cache_key == key) | (search_cache_table.c.created_at <= now - self.ttl)
+            ))
+            conn.execute(insert(search_cache_table).values(
+                cache_key=key,
+                created_at=now,
+                total_count=total_count,
+                results=json.dumps(results, ensure_ascii=False, default=to_jsonable),
+            ))
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.records = 0
+            self.hits = self.persistent_hits = self.misses = 0
+        if self.engine is not None:
+            with self.engine.begin() as conn:
+                conn.execute(delete(search_cache_table))
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.persistent_hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "records": self.records,
+                "max_records": self.max_records,
+                "max_persist_records": self.max_persist_records,
+                "ttl_seconds": self.ttl,
+                "persistent": self.engine is not None,
+                "hits": self.hits,
+                "persistent_hits": self.persistent_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.persistent_hits) / lookups, 4) if lookups else 0.0,
+            }
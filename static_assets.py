@@ -0,0 +1,178 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from flask import Response, request, send_file
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Vite构建产物的文件名带8位内容哈希，如 assets/index-BqJ3kZ1a.js，可以长期缓存；
+# 构建目录中有清单（build.manifest）时以清单列出的文件为准
+HASHED_ASSET_PATTERN = re.compile(r"(^|/)assets/[^/]+-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$")
+
+# Vite 5 将清单写入.vite/manifest.json，更早的版本写入manifest.json
+MANIFEST_PATHS = (".vite/manifest.json", "manifest.json")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# 未带哈希的文件（包括index.html）每次使用前向服务器验证ETag
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+COMPRESSIBLE_TYPES = re.compile(r"^(text/|application/(javascript|json|xml|manifest\+json|wasm)|image/svg\+xml)")
+
+# 小文件压缩收益不明显
+MIN_COMPRESS_SIZE = 1024
+
+# 超过此大小的文件不读入内存，直接从磁盘发送
+MAX_MEMORY_SIZE = 10 * 1024 * 1024
+
+# 按优先顺序排列的压缩编码及磁盘上预压缩文件的扩展名
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class StaticAsset:
+    __slots__ = ("path", "content_type", "etag", "cache_control", "last_modified", "variants")
+
+    def __init__(self, path, content_type, etag, cache_control, last_modified, variants):
+        self.path = path
+        self.content_type = content_type
+        self.etag = etag
+        self.cache_control = cache_control
+        self.last_modified = last_modified
+        # {编码: 内容}，identity为原始内容；大文件为None，表示从磁盘发送
+        self.variants = variants
+
+
+def compress(data, encoding):
+    if encoding == "gzip":
+        # mtime固定为0，保证同一内容每次启动压缩结果一致
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data)
+    return None
+
+
+def read_manifest(root):
+    """读取Vite构建清单，返回其中列出的带哈希的文件路径集合；没有清单时返回None"""
+    for name in MANIFEST_PATHS:
+        try:
+            with open(os.path.join(root, name), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            continue
+        files = set()
+        for chunk in manifest.values():
+            files.add(chunk.get("file"))
+            files.update(chunk.get("css", ()))
+            files.update(chunk.get("assets", ()))
+        files.discard(None)
+        return files
+    return None
+
+
+class StaticAssets:
+    """启动时扫描静态目录生成内存清单，按Accept-Encoding返回预压缩内容
+
+    目录中已有的.br/.gz文件直接使用，否则在扫描时压缩（brotli需安装brotli包）。
+    带哈希的构建产物设置一年的immutable缓存，其余文件（包括index.html）通过ETag协商缓存；
+    无扩展名的未知路径返回index.html，供前端路由使用。
+    """
+
+    def __init__(self, root=None):
+        self.root = None
+        self.assets = {}
+        self.hashed = None
+        if root is not None:
+            self.scan(root)
+
+    def init_app(self, app):
+        if app.static_folder:
+            self.scan(app.static_folder)
+
+    def scan(self, root):
+        assets = {}
+        self.hashed = read_manifest(root)
+        if os.path.isdir(root):
+            for directory, _, filenames in os.walk(root):
+                names = set(filenames)
+                for filename in filenames:
+                    # 预压缩文件作为原文件的变体，不单独提供
+                    if any(filename.endswith(suffix) and filename[:-len(suffix)] in names for _, suffix in ENCODINGS):
+                        continue
+                    full_path = os.path.join(directory, filename)
+                    relative = os.path.relpath(full_path, root).replace(os.sep, "/")
+                    assets[relative] = self.load(full_path, relative, names)
+        self.root = root
+        self.assets = assets
+        return self
+
+    def is_hashed(self, relative):
+        if self.hashed is not None:
+            return relative in self.hashed
+        return HASHED_ASSET_PATTERN.search(relative) is not None
+
+    def load(self, full_path, relative, names):
+        stat = os.stat(full_path)
+        content_type = mimetypes.guess_type(relative)[0] or "application/octet-stream"
+        cache_control = IMMUTABLE_CACHE_CONTROL if self.is_hashed(relative) else REVALIDATE_CACHE_CONTROL
+        if stat.st_size > MAX_MEMORY_SIZE:
+            etag = f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+            return StaticAsset(full_path, content_type, etag, cache_control, stat.st_mtime, None)
+
+        with open(full_path, "rb") as f:
+            data = f.read()
+        variants = {"identity": data}
+        filename = os.path.basename(full_path)
+        for encoding, suffix in ENCODINGS:
+            if filename + suffix in names:
+                with open(full_path + suffix, "rb") as f:
+                    variants[encoding] = f.read()
+            elif len(data) >= MIN_COMPRESS_SIZE and COMPRESSIBLE_TYPES.match(content_type):
+                compressed = compress(data, encoding)
+                if compressed is not None and len(compressed) < len(data):
+                    variants[encoding] = compressed
+        etag = hashlib.sha1(data).hexdigest()[:20]
+        return StaticAsset(full_path, content_type, etag, cache_control, stat.st_mtime, variants)
+
+    def lookup(self, path):
+        """返回路径对应的资源；无扩展名的未知路径返回index.html，其余未知路径返回None"""
+        path = path.strip("/")
+        asset = self.assets.get(path or "index.html")
+        if asset is None and "." not in path.rsplit("/", 1)[-1]:
+            asset = self.assets.get("index.html")
+        return asset
+
+    def choose_encoding(self, asset):
+        for encoding, _ in ENCODINGS:
+            if encoding in asset.variants and request.accept_encodings[encoding]:
+                return encoding
+        return "identity"
+
+    def serve(self, path):
+        asset = self.lookup(path)
+        if asset is None:
+            return ("Not Found", 404) if "index.html" in self.assets else ("index.html not found", 404)
+
+        if asset.variants is None:
+            response = send_file(asset.path, mimetype=asset.content_type, etag=asset.etag,
+                                 last_modified=asset.last_modified, conditional=True)
+            response.headers["Cache-Control"] = asset.cache_control
+            return response
+
+        encoding = self.choose_encoding(asset)
+        response = Response(asset.variants[encoding], mimetype=asset.content_type)
+        # 不同编码的内容不同，ETag需要区分
+        response.set_etag(asset.etag if encoding == "identity" else f"{asset.etag}-{encoding}")
+        response.last_modified = asset.last_modified
+        response.headers["Cache-Control"] = asset.cache_control
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+        if len(asset.variants) > 1:
+            response.vary.add("Accept-Encoding")
+        return response.make_conditional(request)
@@ -0,0 +1,222 @@
+import json
+import os
+import re
+import time
+
+import requests
+
+# 模型输出中search_strategy字段的完整JSON字符串（含结束引号）
+STRATEGY_FIELD_PATTERN = re.compile(r'"search_strategy"\s*:\s*"((?:[^"\\]|\\.)*)"', re.S)
+
+# 模型常把JSON包在```json代码块中
+CODE_FENCE_PATTERN = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def keyword_span(prompt):
+    """返回build_prompt生成的Prompt中关键词的(起, 止)位置，格式不符时返回None"""
+    marker = "疾病或干预方式："
+    keyword_start = prompt.find(marker)
+    if keyword_start < 0:
+        return None
+    keyword_start += len(marker)
+    keyword_end = prompt.find(" 为主题", keyword_start)
+    if keyword_end < 0:
+        return None
+    return keyword_start, keyword_end
+
+
+def extract_keyword(prompt):
+    """从build_prompt生成的Prompt中提取关键词，格式不符时返回None"""
+    span = keyword_span(prompt)
+    return prompt[span[0]:span[1]].strip() if span else None
+
+
+def validate_strategy(strategy):
+    """检查检索策略的基本语法，返回问题列表，为空表示通过"""
+    problems = []
+    if not strategy.strip():
+        return ["检索策略为空"]
+    if "\n" in strategy or "\r" in strategy:
+        problems.append("检索策略包含换行符")
+    if strategy.count('"') % 2:
+        problems.append("引号不匹配")
+
+    # 引号内的括号不计入
+    depth = 0
+    bracket_depth = 0
+    in_quote = False
+    for char in strategy:
+        if char == '"':
+            in_quote = not in_quote
+        elif in_quote:
+            continue
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth < 0:
+                break
+        elif char == "[":
+            bracket_depth += 1
+        elif char == "]":
+            bracket_depth -= 1
+    if depth != 0:
+        problems.append("圆括号不匹配")
+    if bracket_depth != 0:
+        problems.append("字段标签方括号不匹配")
+    return problems
+
+
+def parse_strategy_response(text):
+    """解析模型输出的JSON，缺少search_strategy或格式错误时抛出ValueError"""
+    text = CODE_FENCE_PATTERN.sub("", text.strip())
+    start = text.find("{")
+    end = text.rfind("}")
+    if start < 0 or end < start:
+        raise ValueError("模型输出中没有JSON对象")
+    try:
+        data = json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise ValueError(f"模型输出不是有效的JSON: {e}")
+    if not isinstance(data, dict) or not isinstance(data.get("search_strategy"), str):
+        raise ValueError("模型输出缺少search_strategy字段")
+    return data
+
+
+class StrategyStreamParser:
+    """逐块接收模型输出，search_strategy字段的字符串完整后立即提取"""
+
+    FIELD = '"search_strategy"'
+
+    def __init__(self):
+        self.chunks = []
+        self.search_strategy = None
+        self.field_start = None
+        # 尚未找到字段名时，下次从此位置查找，避免每次从头扫描
+        self.scan_from = 0
+
+    @property
+    def text(self):
+        return "".join(self.chunks)
+
+    def feed(self, chunk):
+        """追加一块输出，search_strategy首次完整时返回其值，否则返回None"""
+        self.chunks.append(chunk)
+        if self.search_strategy is not None:
+            return None
+        text = self.text
+        if self.field_start is None:
+            index = text.find(self.FIELD, self.scan_from)
+            if index < 0:
+                # 字段名可能被截断在块末尾
+                self.scan_from = max(0, len(text) - len(self.FIELD))
+                return None
+            self.field_start = index
+        match = STRATEGY_FIELD_PATTERN.match(text, self.field_start)
+        if match is None:
+            return None
+        self.search_strategy = json.loads(f'"{match.group(1)}"')
+        return self.search_strategy
+
+
+class StrategyBackend:
+    """检索策略生成后端：stream(prompt)逐块产出模型输出的文本，输出整体为JSON"""
+
+    name = "base"
+
+    def stream(self, prompt):
+        raise NotImplementedError
+
+    def generate(self, prompt):
+        return "".join(self.stream(prompt))
+
+
+def build_stub_response(keyword):
+    """模拟AI生成的JSON结果"""
+    return {
+        "search_strategy": f"(\"{keyword}\" [MeSH Terms] OR {keyword} [Text Word]) AND (health technology assessment [MeSH Terms] OR HTA [Text Word]) AND (clinical trial [pt] OR randomized controlled trial [pt] OR systematic review [pt] OR meta-analysis [pt] OR cohort studies [pt] OR real world evidence [Text Word]) AND ((\"2015/01/01\"[Date - Publication] : \"3000/12/31\"[Date - Publication])) AND (English [Language])",
+        "explanation": f"本检索策略针对关键词 \"{keyword}\" 设计，结合了疾病相关术语、卫生技术评估相关术语、高质量研究类型限制、时间限制和语言限制。策略包含了临床有效性、安全性、经济性评价以及生命质量相关的结局指标，同时涵盖了流行病学和卫生经济学评价的关键要素。",
+        "keywords_analysis": {
+            "disease": keyword,
+            "intervention": "相关干预措施（药物治疗、非药物治疗、医疗器械等）",
+            "population": "成年患者群体",
+            "study_type": "随机对照试验、系统评价、Meta分析、队列研究、真实世界研究"
+        },
+        "estimated_results": "500-2000篇文献",
+        "mesh_terms": [keyword, "Health Technology Assessment", "Cost-Effectiveness Analysis", "Quality of Life", "Clinical Effectiveness", "Safety", "Economic Evaluation"],
+        "search_tips": "建议根据实际检索结果调整检索词的组合方式，如果结果过多可以增加更具体的限制条件，如果结果过少可以减少部分限制或使用更广泛的同义词。可以考虑分步检索，先检索核心概念，再逐步添加限制条件。"
+    }
+
+
+class StubStrategyBackend(StrategyBackend):
+    """本地确定性后端：按模板生成结果，在duration秒内分块输出，模拟模型逐词生成"""
+
+    name = "stub"
+
+    def __init__(self, duration=2.0, chunk_size=16, sleep=time.sleep):
+        self.duration = duration
+        self.chunk_size = chunk_size
+        self.sleep = sleep
+
+    def stream(self, prompt):
+        text = json.dumps(build_stub_response(extract_keyword(prompt) or ""), ensure_ascii=False, indent=2)
+        chunks = [text[start:start + self.chunk_size] for start in range(0, len(text), self.chunk_size)]
+        delay = self.duration / len(chunks)
+        for chunk in chunks:
+            if delay:
+                self.sleep(delay)
+            yield chunk
+
+
+class OpenAICompatibleBackend(StrategyBackend):
+    """调用兼容OpenAI Chat Completions流式接口的模型服务"""
+
+    name = "openai"
+
+    def __init__(self, base_url, model, api_key=None, timeout=120, session=None):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.api_key = api_key
+        self.timeout = timeout
+        self.session = session or requests.Session()
+
+    def stream(self, prompt):
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        response = self.session.post(
+            f"{self.base_url}/chat/completions",
+            json={"model": self.model, "messages": [{"role": "user", "content": prompt}], "stream": True},
+            headers=headers,
+            timeout=self.timeout,
+            stream=True,
+        )
+        try:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                payload = line[len("data:"):].strip()
+                if payload == "[DONE]":
+                    break
+                choices = json.loads(payload).get("choices") or [{}]
+                content = (choices[0].get("delta") or {}).get("content")
+                if content:
+                    yield content
+        finally:
+            response.close()
+
+
+def backend_from_env():
+    """根据环境变量STRATEGY_BACKEND选择后端，默认使用本地stub
+
+    openai后端需要STRATEGY_MODEL_URL与STRATEGY_MODEL，可选STRATEGY_MODEL_API_KEY。
+    """
+    kind = os.environ.get("STRATEGY_BACKEND", "stub")
+    if kind == "stub":
+        return StubStrategyBackend()
+    if kind == "openai":
+        return OpenAICompatibleBackend(
+            os.environ["STRATEGY_MODEL_URL"],
+            os.environ["STRATEGY_MODEL"],
+            api_key=os.environ.get("STRATEGY_MODEL_API_KEY") or None,
+        )
+    raise ValueError(f"不支持的检索策略后端: {kind}")
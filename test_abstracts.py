@@ -0,0 +1,73 @@
+import csv
+import io
+import threading
+
+import pytest
+
+import literature
+from abstracts import fetch_abstracts, iter_efetch_articles
+from mock_eutils import make_article_xml
+
+
+pytestmark = pytest.mark.corpus_size(450)
+
+
+def test_iterparse_extracts_sections_mesh_and_pubtypes():
+    xml = "<PubmedArticleSet>" + make_article_xml("10") + make_article_xml("11") + "</PubmedArticleSet>"
+
+    articles = dict(iter_efetch_articles(io.BytesIO(xml.encode("utf-8"))))
+
+    assert articles["10"]["abstract"] == "BACKGROUND: Background of 10. RESULTS: Results of 10."
+    assert [s["label"] for s in articles["10"]["abstract_sections"]] == ["BACKGROUND", "RESULTS"]
+    assert articles["11"]["abstract"] == "Plain abstract of 11."
+    assert articles["10"]["mesh_terms"] == ["Technology Assessment, Biomedical*", "Humans/economics"]
+    assert articles["11"]["publication_types"] == ["Journal Article", "Systematic Review"]
+
+
+def test_fetch_abstracts_batches_concurrently(eutils, fast_eutils_client):
+    in_flight = []
+    peak = [0]
+    lock = threading.Lock()
+    original = eutils.efetch
+
+    def tracking_efetch(params):
+        with lock:
+            in_flight.append(1)
+            peak[0] = max(peak[0], len(in_flight))
+        try:
+            threading.Event().wait(0.05)
+            return original(params)
+        finally:
+            with lock:
+                in_flight.pop()
+
+    eutils.efetch = tracking_efetch
+    pmids = eutils.pmids()
+
+    details = fetch_abstracts(fast_eutils_client, eutils.base_url, pmids, batch_size=100, concurrency=3)
+
+    assert set(details) == set(pmids)
+    efetch_calls = [params for path, params in eutils.requests if path.endswith("efetch.fcgi")]
+    assert len(efetch_calls) == 5
+    assert all(len(params["id"].split(",")) <= 100 for params in efetch_calls)
+    assert 1 < peak[0] <= 3
+
+
+def test_search_with_abstracts(eutils, client):
+    response = client.post("/api/execute_pubmed_search", json={"search_strategy": "hta", "retmax": 20, "include_abstracts": True})
+
+    data = response.get_json()
+    rows = list(csv.DictReader(io.StringIO(literature.base64.b64decode(data["pubmed_results_csv"]).decode("utf-8"))))
+    assert list(rows[0].keys()) == literature.ENRICHED_FIELDNAMES
+    assert all(row["Abstract"] for row in rows)
+    assert rows[0]["MeSH_Terms"] == "Technology Assessment, Biomedical*; Humans/economics"
+    assert data["search_log"]["include_abstracts"] is True
+
+
+def test_streaming_export_with_abstracts(eutils, client):
+    response = client.get("/api/export_pubmed_search", query_string={"search_strategy": "hta", "abstracts": "true"})
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(rows) == 450
+    assert rows[1]["Abstract"] == f"Plain abstract of {rows[1]['PMID']}."
+    assert "Randomized Controlled Trial" in {row["Publication_Types"].split("; ")[-1] for row in rows}
@@ -0,0 +1,133 @@
+import sqlite3
+
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+import literature
+from article_store import ArticleStore
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'app.db'}"
+    SQLAlchemy().init_app(app)
+    store = ArticleStore()
+    store.init_app(app)
+    monkeypatch.setattr(literature, "article_store", store)
+    return store
+
+
+def summarized_ids(server):
+    ids = []
+    for path, params in server.requests:
+        if path.endswith("esummary.fcgi"):
+            ids.extend(params["id"].split(","))
+    return ids
+
+
+def test_overlapping_search_only_fetches_missing_records(store, eutils):
+    first, _ = literature.search_pubmed("hta", retmax=300)
+    eutils.requests.clear()
+
+    second, total_count = literature.search_pubmed("hta", retmax=400)
+
+    assert total_count == 1000
+    assert [r["PMID"] for r in second] == eutils.pmids()[:400]
+    assert second[:300] == first
+    assert summarized_ids(eutils) == eutils.pmids()[300:400]
+    assert store.count() == 400
+
+
+def test_history_mode_skips_stored_records(store, eutils):
+    literature.search_pubmed("hta", retmax=250)
+    eutils.requests.clear()
+
+    results, _ = literature.search_pubmed("hta", retmax=None, fetch_all=True, batch_size=500)
+
+    assert [r["PMID"] for r in results] == eutils.pmids()
+    assert summarized_ids(eutils) == eutils.pmids()[250:]
+    assert store.count() == 1000
+
+
+def test_history_mode_takes_pmids_from_esearch_pages(store, eutils, monkeypatch):
+    monkeypatch.setattr(literature, "ESEARCH_ID_PAGE_SIZE", 600)
+
+    results, _ = literature.search_pubmed("hta", retmax=None, fetch_all=True, batch_size=250)
+
+    assert [r["PMID"] for r in results] == eutils.pmids()
+    esearch = [params for path, params in eutils.requests if path.endswith("esearch.fcgi")]
+    uilist = [params for path, params in eutils.requests if path.endswith("efetch.fcgi")]
+    assert [int(params["retmax"]) for params in esearch] == [600]
+    # 600个PMID来自ESearch，其余400个一次EFetch取回，而不是每批250个请求一次
+    assert [(int(params["retstart"]), int(params["retmax"])) for params in uilist] == [(600, 400)]
+
+
+def test_stale_records_are_refetched(store, eutils):
+    literature.search_pubmed("hta", retmax=50)
+    store.max_age = -1
+    eutils.requests.clear()
+
+    literature.search_pubmed("hta", retmax=50)
+
+    assert len(summarized_ids(eutils)) == 50
+
+
+def test_upsert_keeps_existing_abstract(store):
+    record = {"PMID": "1", "Title": "t", "Abstract": "Background: something"}
+    store.upsert_many([record])
+    store.upsert_many([{"PMID": "1", "Title": "t2", "Abstract": ""}])
+
+    stored = store.get_many(["1"])["1"]
+
+    assert stored["Title"] == "t2"
+    assert stored["Abstract"] == "Background: something"
+    assert list(stored) == literature.RESULT_FIELDNAMES
+
+
+def test_enriched_records_are_not_fetched_again(store, eutils):
+    literature.search_pubmed("hta", retmax=30)
+    first = literature.enrich_with_abstracts(literature.search_pubmed("hta", retmax=20)[0])
+    eutils.requests.clear()
+
+    results, _ = literature.search_pubmed("hta", retmax=40)
+    literature.enrich_with_abstracts(results)
+
+    fetched = [params["id"].split(",") for path, params in eutils.requests if path.endswith("efetch.fcgi")]
+    assert sum(fetched, []) == eutils.pmids()[20:40]
+    assert [dict(record) for record in results[:20]] == [dict(record) for record in first]
+    assert results[0]["MeSH_Terms"] == "Technology Assessment, Biomedical*; Humans/economics"
+    # ESummary重新获取的记录不会清除已保存的补充字段
+    store.max_age = -1
+    literature.search_pubmed("hta", retmax=5)
+    store.max_age = 3600
+    assert store.get_many([results[0]["PMID"]])[results[0]["PMID"]]["Publication_Types"] == results[0]["Publication_Types"]
+
+
+def test_init_app_adds_enrichment_columns_to_old_table(tmp_path):
+    path = tmp_path / "old.db"
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "CREATE TABLE articles (pmid VARCHAR(16) PRIMARY KEY, title TEXT NOT NULL, authors TEXT NOT NULL, "
+            "journal TEXT NOT NULL, publication_date VARCHAR(64) NOT NULL, doi VARCHAR(255) NOT NULL, "
+            "abstract TEXT NOT NULL, study_type VARCHAR(64) NOT NULL, fetched_at FLOAT NOT NULL)"
+        )
+        conn.execute("INSERT INTO articles VALUES ('1', 't', '', '', '', '', 'a', '', 9e9)")
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    SQLAlchemy().init_app(app)
+    store = ArticleStore()
+    store.init_app(app)
+
+    assert "MeSH_Terms" not in store.get_many(["1"])["1"]
+    store.upsert_many([{"PMID": "1", "Title": "t", "MeSH_Terms": "Humans", "Publication_Types": "Review"}])
+    assert store.get_many(["1"])["1"]["MeSH_Terms"] == "Humans"
+
+
+def test_disabled_store_is_transparent(eutils):
+    assert not literature.article_store.enabled
+
+    results, _ = literature.search_pubmed("hta", retmax=20)
+
+    assert len(results) == 20
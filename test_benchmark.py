@@ -0,0 +1,50 @@
+import json
+
+import pytest
+import requests
+
+import benchmark
+from mock_eutils import MockEutilsServer
+
+
+def test_percentile_interpolates():
+    values = [1.0, 2.0, 3.0, 4.0]
+
+    assert benchmark.percentile(values, 0.5) == 2.5
+    assert benchmark.percentile(values, 0.99) == pytest.approx(3.97)
+    assert benchmark.percentile([], 0.5) == 0.0
+
+
+def test_mock_server_injects_errors_and_latency():
+    with MockEutilsServer(corpus_size=10, error_rate=1.0, latency=0.01) as server:
+        response = requests.get(f"{server.base_url}esearch.fcgi", params={"term": "x"})
+
+    assert response.status_code == 503
+
+
+def test_run_benchmarks_reports_all_combinations(tmp_path):
+    output = tmp_path / "bench.json"
+
+    exit_code = benchmark.main([
+        "--sizes", "20,600", "--concurrency", "1,2", "--iterations", "2",
+        "--error-rate", "0.05", "--output", str(output),
+    ])
+    report = json.loads(output.read_text(encoding="utf-8"))
+
+    assert exit_code == 0
+    assert len(report["runs"]) == len(benchmark.SCENARIOS) * 4
+    for run in report["runs"]:
+        assert run["errors"] == 0
+        assert run["latency_p99_ms"] >= run["latency_p50_ms"] > 0
+        assert run["throughput_records"] > 0
+        assert run["rss_peak_mb"] > 0
+
+
+def test_compare_reports_flags_slower_runs():
+    baseline = {"runs": [{"scenario": "csv", "size": 100, "concurrency": 1, "latency_p50_ms": 10.0, "latency_p99_ms": 20.0}]}
+    current = {"runs": [{"scenario": "csv", "size": 100, "concurrency": 1, "latency_p50_ms": 11.0, "latency_p99_ms": 30.0}]}
+
+    regressions = benchmark.compare_reports(baseline, current, threshold=0.2)
+
+    assert [item["metric"] for item in regressions] == ["latency_p99_ms"]
+    assert regressions[0]["ratio"] == 1.5
@@ -0,0 +1,73 @@
+import base64
+import csv
+import io
+import time
+
+import pytest
+
+import literature
+from strategy_backends import StubStrategyBackend
+
+# 每个检索词对应的PMID区间，相邻区间有重叠
+TERM_RANGES = {"diabetes": range(0, 60), "insomnia": range(40, 100), "asthma": range(90, 120)}
+
+
+@pytest.fixture
+def eutils(eutils_server):
+    server = eutils_server(200)
+
+    def pmids_for(term):
+        for keyword, pmid_range in TERM_RANGES.items():
+            if keyword in term:
+                return [str(server.first_pmid + i) for i in pmid_range]
+        return []
+    server.pmids_for = pmids_for
+    return server
+
+
+def merged_rows(data):
+    return list(csv.DictReader(io.StringIO(base64.b64decode(data["merged_results_csv"]).decode("utf-8"))))
+
+
+def test_strategies_are_merged_and_deduplicated(eutils, client):
+    response = client.post("/api/bulk_search", json={"search_strategies": ["diabetes[mesh]", "insomnia[mesh]", "asthma[mesh]"]})
+
+    data = response.get_json()
+    assert response.status_code == 200
+    assert [s["total_count"] for s in data["searches"]] == [60, 60, 30]
+    assert data["merged_count"] == 120
+    rows = {row["PMID"]: row for row in merged_rows(data)}
+    assert rows[str(eutils.first_pmid + 45)]["Matched_Strategies"] == "diabetes[mesh]; insomnia[mesh]"
+    assert rows[str(eutils.first_pmid + 5)]["Matched_Strategies"] == "diabetes[mesh]"
+
+
+def test_keyword_pipelines_run_concurrently(eutils, client, monkeypatch):
+    # 缩短模拟AI调用的2秒延迟
+    monkeypatch.setattr(literature, "strategy_backend", StubStrategyBackend(duration=0.3))
+
+    started = time.perf_counter()
+    response = client.post("/api/bulk_search", json={"keywords": ["diabetes", "insomnia", "asthma", "gout"], "include_csv": False})
+    elapsed = time.perf_counter() - started
+
+    data = response.get_json()
+    assert [s["label"] for s in data["searches"]] == ["diabetes", "insomnia", "asthma", "gout"]
+    assert data["searches"][3]["total_count"] == 0
+    assert "diabetes" in data["searches"][0]["search_strategy"]
+    assert data["merged_count"] == 120
+    assert "merged_results_csv" not in data
+    assert elapsed < 0.3 * 4
+
+
+def test_failed_search_is_reported_per_item(eutils, client):
+    eutils.failures = [400]
+
+    data = client.post("/api/bulk_search", json={"search_strategies": ["diabetes[mesh]"]}).get_json()
+
+    assert "error" in data["searches"][0]
+    assert data["merged_count"] == 0
+
+
+def test_bulk_search_validates_input(client):
+    assert client.post("/api/bulk_search", json={"keywords": []}).status_code == 400
+    too_many = {"search_strategies": [f"term{i}" for i in range(literature.BULK_MAX_ITEMS + 1)]}
+    assert client.post("/api/bulk_search", json=too_many).status_code == 400
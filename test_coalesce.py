@@ -0,0 +1,158 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from flask import Flask
+
+import literature
+from coalesce import MemoizedSingleFlight, SingleFlight, StreamFlight
+from strategy_backends import StubStrategyBackend
+
+
+def run_concurrently(count, func):
+    barrier = threading.Barrier(count)
+
+    def call(_):
+        barrier.wait()
+        return func()
+
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        return list(executor.map(call, range(count)))
+
+
+def test_single_flight_shares_one_execution():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    threading.Timer(0.2, release.set).start()
+    outcomes = run_concurrently(5, lambda: flight.do("key", slow))
+
+    assert len(calls) == 1
+    assert [value for value, _ in outcomes] == ["value"] * 5
+    assert sorted(shared for _, shared in outcomes) == [False, True, True, True, True]
+    assert flight.stats() == {"in_flight": 0, "executed": 1, "shared": 4}
+
+
+def test_single_flight_propagates_errors():
+    flight = SingleFlight()
+
+    def failing():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        flight.do("key", failing)
+    assert flight.do("key", lambda: 1) == (1, False)
+
+
+def test_memo_evicts_least_recently_used_and_skips_uncacheable():
+    memo = MemoizedSingleFlight(max_entries=2)
+
+    memo.get_or_compute("a", lambda: 1)
+    memo.get_or_compute("b", lambda: 2)
+    memo.get_or_compute("a", lambda: 0)
+    memo.get_or_compute("c", lambda: 3)
+
+    assert memo.get("a") == 1
+    assert memo.get("b") is None
+    assert memo.get_or_compute("err", lambda: -1, cacheable=lambda value: value > 0) == (-1, "miss")
+    assert memo.get("err") is None
+
+
+def test_strategy_generation_is_coalesced_and_memoized(monkeypatch):
+    model_calls = []
+    release = threading.Event()
+
+    def slow_model(seconds):
+        model_calls.append(seconds)
+        release.wait(5)
+
+    monkeypatch.setattr(literature, "strategy_backend", StubStrategyBackend(duration=1, chunk_size=10000, sleep=slow_model))
+    threading.Timer(0.2, release.set).start()
+
+    prompts = [literature.build_prompt("Diabetes"), literature.build_prompt("diabetes"), literature.build_prompt("DIABETES")]
+    outcomes = run_concurrently(6, lambda: literature.generate_ai_strategy(prompts[threading.get_ident() % 3]))
+
+    assert len(model_calls) == 1
+    assert all(status == 200 for _, status in outcomes)
+    assert sorted(result["cache"] for result, _ in outcomes) == ["coalesced"] * 5 + ["miss"]
+    assert len({result["ai_response"]["search_strategy"] for result, _ in outcomes}) == 1
+
+    result, _ = literature.generate_ai_strategy(literature.build_prompt("  diabetes "))
+    assert result["cache"] == "hit"
+    assert len(model_calls) == 1
+
+
+def test_stream_flight_replays_chunks_to_late_readers():
+    flight = StreamFlight()
+    release = threading.Event()
+
+    def produce(emit, count):
+        emit(0)
+        release.wait(5)
+        for i in range(1, count):
+            emit(i)
+
+    first, shared_first = flight.open("key", produce, 3)
+    second, shared_second = flight.open("key", produce, 3)
+    release.set()
+
+    assert (shared_first, shared_second) == (False, True)
+    assert list(first) == list(second) == [0, 1, 2]
+    assert flight.stats() == {"in_flight": 0, "executed": 1, "shared": 1}
+
+    def failing(emit):
+        emit("partial")
+        raise RuntimeError("boom")
+
+    stream, _ = flight.open("key", failing)
+    with pytest.raises(RuntimeError):
+        list(stream)
+
+
+def test_concurrent_strategy_streams_share_one_generation(monkeypatch):
+    model_calls = []
+    release = threading.Event()
+
+    class CountingBackend(StubStrategyBackend):
+        def stream(self, prompt):
+            model_calls.append(prompt)
+            release.wait(5)
+            yield from super().stream(prompt)
+
+    monkeypatch.setattr(literature, "strategy_backend", CountingBackend(duration=0, chunk_size=32))
+    app = Flask(__name__)
+    app.register_blueprint(literature.literature_bp, url_prefix="/api")
+    threading.Timer(0.2, release.set).start()
+
+    def stream():
+        with app.test_client() as client:
+            return client.post("/api/stream_ai_strategy", json={"prompt": literature.build_prompt("asthma")}).get_data(as_text=True)
+
+    bodies = run_concurrently(4, stream)
+
+    assert len(model_calls) == 1
+    results = [body.rsplit("event: result\ndata: ", 1)[1] for body in bodies]
+    assert sorted('"cache": "coalesced"' in result for result in results) == [False, True, True, True]
+    assert len({body.split("event: result")[0] for body in bodies}) == 1
+    assert literature.strategy_cache.get(literature.strategy_cache_key(literature.build_prompt("asthma"))) is not None
+
+
+def test_identical_concurrent_searches_share_one_upstream_search(eutils_server):
+    app = Flask(__name__)
+    app.register_blueprint(literature.literature_bp, url_prefix="/api")
+
+    server = eutils_server(30, latency=0.2)
+    responses = run_concurrently(4, lambda: app.test_client().post(
+        "/api/execute_pubmed_search", json={"search_strategy": "hta", "retmax": 30, "include_csv": False}
+    ).get_json())
+    esearch_calls = [path for path, _ in server.requests if path.endswith("esearch.fcgi")]
+
+    assert len(esearch_calls) == 1
+    assert all(response["retrieved_count"] == 30 for response in responses)
+    assert sorted(response["search_log"]["cache"] for response in responses) == ["coalesced"] * 3 + ["miss"]
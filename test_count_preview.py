@@ -0,0 +1,84 @@
+import pytest
+
+import literature
+from coalesce import MemoizedSingleFlight
+from mock_eutils import MockEutilsServer
+from search_cache import split_and_blocks
+
+# 模拟各检索词命中的文献序号
+CLAUSE_HITS = {
+    "diabetes": range(0, 600),
+    "hta": range(300, 900),
+    "english": range(0, 1000, 2),
+}
+
+
+class BooleanEutilsServer(MockEutilsServer):
+    """按顶层AND块求交集的模拟服务"""
+
+    def pmids_for(self, term):
+        hits = set(range(self.corpus_size))
+        for block in split_and_blocks(term):
+            hits &= set(CLAUSE_HITS[block.strip("() ").split("[")[0].strip().lower()])
+        return [str(self.first_pmid + i) for i in sorted(hits)]
+
+
+@pytest.fixture(autouse=True)
+def fresh_count_cache(monkeypatch):
+    monkeypatch.setattr(literature, "count_cache", MemoizedSingleFlight())
+
+
+@pytest.fixture
+def eutils(eutils_server):
+    return eutils_server(1000, BooleanEutilsServer)
+
+
+def count_requests(server):
+    return [params for path, params in server.requests if params.get("rettype") == "count"]
+
+
+def test_split_and_blocks():
+    assert split_and_blocks('((a OR b) AND (c[mesh] OR "d e"[tiab]) AND English [Language])') == [
+        "(a OR b)", '(c[mesh] OR "d e"[tiab])', "English [Language]"
+    ]
+    assert split_and_blocks('("2015"[dp] : "3000"[dp]) AND x') == ['("2015"[dp] : "3000"[dp])', "x"]
+    # 顶层OR或括号不匹配时不拆分
+    assert split_and_blocks("a AND b OR c") == ["a AND b OR c"]
+    assert split_and_blocks("(a AND (b") == ["(a AND (b"]
+    assert split_and_blocks("  ") == []
+
+
+def test_preview_reports_block_and_cumulative_counts(eutils, client):
+    response = client.post("/api/preview_pubmed_search", json={"search_strategy": "diabetes[mesh] AND (hta[tiab]) AND english[la]"})
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert data["total_count"] == 150
+    assert [b["clause"] for b in data["blocks"]] == ["diabetes[mesh]", "(hta[tiab])", "english[la]"]
+    assert [b["count"] for b in data["blocks"]] == [600, 600, 500]
+    assert [b["cumulative_count"] for b in data["blocks"]] == [600, 300, 150]
+    assert [b.get("retained_ratio") for b in data["blocks"]] == [None, 0.5, 0.5]
+    # 整个策略、3个检索块与第2个前缀，等价的查询只请求一次
+    assert len(count_requests(eutils)) == data["queries"] == 5
+    assert not any(path.endswith("esummary.fcgi") for path, _ in eutils.requests)
+
+
+def test_preview_counts_are_cached(eutils, client):
+    client.post("/api/preview_pubmed_search", json={"search_strategy": "diabetes[mesh] AND hta[tiab]"})
+    before = len(count_requests(eutils))
+
+    data = client.post("/api/preview_pubmed_search", json={"search_strategy": "(diabetes [MeSH]) AND hta[tiab] AND english[la]"}).get_json()
+
+    # 只有新增的english块与新的前缀需要请求
+    assert len(count_requests(eutils)) - before == 2
+    assert data["cache_hits"] == 3
+    assert data["total_count"] == 150
+
+
+def test_preview_errors(eutils, client):
+    assert client.post("/api/preview_pubmed_search", json={"search_strategy": " "}).status_code == 400
+
+    eutils.failures = [400]
+    response = client.post("/api/preview_pubmed_search", json={"search_strategy": "diabetes[mesh]"})
+    assert response.status_code == 500
+    assert "error" in response.get_json()
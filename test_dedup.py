@@ -0,0 +1,127 @@
+import random
+import time
+
+from dedup import deduplicate, minhash_signature, normalize_doi, title_tokens
+
+
+def record(pmid="", title="", doi="", **extra):
+    return {"PMID": pmid, "Title": title, "DOI": doi, **extra}
+
+
+def test_normalization():
+    assert normalize_doi("https://doi.org/10.1000/ABC") == "10.1000/abc"
+    assert normalize_doi(" doi: 10.1000/abc ") == "10.1000/abc"
+    assert normalize_doi(None) == ""
+    assert title_tokens("Éffet du Café: a Randomised-Trial.") == ["effet", "du", "cafe", "a", "randomised", "trial"]
+
+
+def test_signature_is_stable_and_similar_for_similar_titles():
+    a = [t.encode() for t in title_tokens("effect of metformin on glycaemic control in older adults with diabetes")]
+    b = [t.encode() for t in title_tokens("effect of metformin on glycaemic control in elderly adults with diabetes")]
+    assert minhash_signature(a) == minhash_signature(list(reversed(a)))
+    same = sum(x == y for x, y in zip(minhash_signature(a), minhash_signature(b)))
+    assert same >= len(minhash_signature(a)) // 2
+
+
+def test_clusters_by_pmid_doi_and_title():
+    records = [
+        record("1", "Metformin and cardiovascular outcomes in type 2 diabetes", "10.1/a"),
+        record("", "METFORMIN and cardiovascular outcomes in type 2 diabetes.", ""),
+        record("2", "Sleep hygiene education for chronic insomnia in adults", "10.1/b"),
+        record("", "A different title entirely about hypertension screening", "https://doi.org/10.1/B"),
+        record("2", "Sleep hygiene education for chronic insomnia in adults", "10.1/b"),
+        record("3", "Cost effectiveness of bariatric surgery compared with usual care in patients with severe obesity", ""),
+        record("", "Cost effectiveness of bariatric surgery compared with usual care in patients with morbid obesity", ""),
+        record("4", "Unrelated study of vitamin D supplementation during pregnancy", ""),
+    ]
+    result = deduplicate(records)
+    clusters = {tuple(c["members"]): c for c in result["clusters"]}
+    assert set(clusters) == {(0, 1), (2, 3, 4), (5, 6)}
+    assert clusters[(0, 1)]["match"] == ["title"]
+    assert clusters[(2, 3, 4)]["match"] == ["doi", "pmid"]
+    assert clusters[(5, 6)]["match"] == ["similar_title"]
+    assert [r["PMID"] for r in result["records"]] == ["1", "2", "3", "4"]
+    assert result["stats"]["input"] == 8
+    assert result["stats"]["unique"] == 4
+    assert result["stats"]["duplicates"] == 4
+
+
+def test_representative_prefers_complete_record():
+    records = [
+        record("", "Exercise training improves quality of life in heart failure"),
+        record("9", "Exercise training improves quality of life in heart failure", "10.1/x", Abstract="text"),
+    ]
+    result = deduplicate(records)
+    assert result["clusters"][0]["representative"] == 1
+    assert result["records"] == [records[1]]
+
+
+def test_conflicting_identifiers_block_title_merge():
+    title = "Annual report of the national cancer registry program"
+    records = [record("1", title), record("2", title), record("", title, "10.1/c"), record("", title, "10.1/d")]
+    result = deduplicate(records)
+    # 无PMID的记录各自可与一条有PMID的记录合并，但不同PMID或不同DOI之间不会因此合并
+    for cluster in result["clusters"]:
+        pmids = {records[i]["PMID"] for i in cluster["members"] if records[i]["PMID"]}
+        dois = {records[i]["DOI"] for i in cluster["members"] if records[i]["DOI"]}
+        assert len(pmids) <= 1 and len(dois) <= 1
+    assert result["stats"]["unique"] == 2
+
+
+def test_short_titles_and_threshold():
+    records = [record("", "Erratum"), record("", "Erratum")]
+    assert deduplicate(records)["stats"]["unique"] == 2
+
+    records = [
+        record("", "Cost effectiveness of bariatric surgery compared with usual care in patients with severe obesity"),
+        record("", "Cost effectiveness of bariatric surgery compared with usual care in patients with morbid obesity"),
+    ]
+    assert deduplicate(records)["stats"]["unique"] == 1
+    assert deduplicate(records, title_threshold=0.9)["stats"]["unique"] == 2
+
+
+def test_large_input_is_fast():
+    rnd = random.Random(7)
+    words = [f"term{i}" for i in range(3000)]
+    records = [record(str(i), " ".join(rnd.choice(words) for _ in range(12)), f"10.1/{i}") for i in range(20000)]
+    for j in range(2000):
+        source = records[rnd.randrange(20000)]
+        tokens = source["Title"].split()
+        tokens[j % 12] = "changed"
+        records.append(record("", " ".join(tokens)))
+
+    started = time.perf_counter()
+    result = deduplicate(records)
+    elapsed = time.perf_counter() - started
+
+    assert result["stats"]["duplicates"] >= 1900
+    assert result["stats"]["unique"] >= 20000
+    assert elapsed < 10
+
+
+def test_shared_title_with_distinct_pmids_is_linear():
+    title = "Annual report of the national cancer registry program"
+    records = [record(str(i), title) for i in range(20000)]
+    records += [record("", title, "10.1/x"), record("", title)]
+
+    started = time.perf_counter()
+    result = deduplicate(records)
+    elapsed = time.perf_counter() - started
+
+    assert result["stats"]["unique"] == 20000
+    assert elapsed < 2
+
+
+def test_deduplicate_endpoint(client):
+    records = [
+        record("", "Metformin and cardiovascular outcomes in type 2 diabetes", "10.1/a"),
+        record("", "Different title", "10.1/A"),
+    ]
+    response = client.post("/api/deduplicate", json={"records": records})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["stats"]["unique"] == 1
+    assert data["clusters"] == [{"representative": 0, "members": [0, 1], "match": ["doi"]}]
+
+    assert client.post("/api/deduplicate", json={"records": "x"}).status_code == 400
+    assert client.post("/api/deduplicate", json={"records": [], "title_threshold": 2}).status_code == 400
@@ -0,0 +1,76 @@
+import pytest
+import requests
+
+import literature
+from eutils import EutilsClient, TokenBucket
+
+pytestmark = pytest.mark.corpus_size(50)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_token_bucket_limits_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(3, clock=clock, sleep=clock.sleep)
+
+    times = []
+    for _ in range(9):
+        bucket.acquire()
+        times.append(clock.now)
+
+    # 不允许突发：请求间隔1/3秒，任意1秒窗口内最多3个请求
+    assert times == pytest.approx([i / 3 for i in range(9)])
+    assert all(sum(start <= t < start + 1 - 1e-9 for t in times) <= 3 for start in times)
+
+
+def test_retries_429_and_5xx_then_succeeds(eutils):
+    eutils.failures = [429, 503]
+    client = EutilsClient(rate=100, backoff_base=0.001)
+
+    response = client.get(f"{eutils.base_url}esearch.fcgi", params={"term": "hta", "retmode": "json"})
+
+    assert response.json()["esearchresult"]["count"] == "50"
+    assert len(eutils.requests) == 3
+    assert client.timings[-1]["attempts"] == 3
+
+
+def test_gives_up_after_max_retries(eutils):
+    eutils.failures = [500] * 3
+    client = EutilsClient(rate=100, max_retries=2, backoff_base=0.001)
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.get(f"{eutils.base_url}esearch.fcgi")
+
+    assert client.stats()["endpoints"]["esearch.fcgi"]["errors"] == 1
+
+
+def test_api_key_is_sent_and_raises_rate(eutils):
+    client = EutilsClient(api_key="secret")
+
+    client.get(f"{eutils.base_url}esearch.fcgi", params={"term": "hta"})
+
+    assert eutils.requests[-1][1]["api_key"] == "secret"
+    assert client.limiter.rate == 10
+
+
+def test_search_pubmed_uses_shared_client(eutils, monkeypatch, fast_eutils_client):
+    client = fast_eutils_client
+    monkeypatch.setattr(literature, "PUBMED_BASE_URL", eutils.base_url)
+    eutils.failures = [429]
+
+    results, total_count = literature.search_pubmed("hta", retmax=10)
+
+    assert total_count == 50
+    assert len(results) == 10
+    stats = client.stats()["endpoints"]
+    assert stats["esearch.fcgi"]["retries"] == 1
+    assert stats["esummary.fcgi"]["calls"] == 1
@@ -0,0 +1,175 @@
+import csv
+import io
+import json
+import os
+import time
+
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+import literature
+from article_store import ArticleStore
+from export_jobs import CHECKPOINT_FILE, PARTIAL_FILE, ExportStore
+from jobs import DONE, FAILED, JobManager
+from mock_eutils import MockEutilsServer
+
+
+class FlakyEutilsServer(MockEutilsServer):
+    """从fail_from偏移量开始的ESummary请求返回400，模拟导出中途的网络错误"""
+
+    fail_from = None
+
+    def esummary(self, params):
+        if self.fail_from is not None and int(params.get("retstart", 0)) >= self.fail_from:
+            return 400, {"error": "simulated failure"}
+        return super().esummary(params)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = ExportStore(str(tmp_path))
+    monkeypatch.setattr(literature, "export_store", store)
+    return store
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = JobManager(max_workers=2)
+    monkeypatch.setattr(literature, "export_job_manager", manager)
+    return manager
+
+
+@pytest.fixture
+def eutils(eutils_server, monkeypatch):
+    monkeypatch.setattr(literature, "ESUMMARY_BATCH_SIZE", 500)
+    return eutils_server(2300, FlakyEutilsServer)
+
+
+def wait_for_export(client, export_id, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        data = client.get(f"/api/exports/{export_id}").get_json()
+        if data["status"] in (DONE, FAILED):
+            return data
+        time.sleep(0.01)
+    raise AssertionError("export did not finish")
+
+
+def esummary_offsets(server):
+    return [int(params["retstart"]) for path, params in server.requests if path.endswith("esummary.fcgi")]
+
+
+def test_export_job_writes_file_in_batches(eutils, store, manager, client):
+    response = client.post("/api/exports", json={"search_strategy": "hta"})
+    assert response.status_code == 202
+    export_id = response.get_json()["export_id"]
+
+    data = wait_for_export(client, export_id)
+    assert data["status"] == DONE
+    assert data["rows_written"] == 2300
+    assert "webenv" not in data
+
+    response = client.get(f"/api/exports/{export_id}/download")
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row["PMID"] for row in rows] == [str(eutils.first_pmid + i) for i in range(2300)]
+    assert not os.path.exists(os.path.join(store.root, export_id, PARTIAL_FILE))
+
+
+def test_failed_export_resumes_from_checkpoint(eutils, store, manager, client):
+    eutils.fail_from = 1500
+    export_id = client.post("/api/exports", json={"search_strategy": "hta", "format": "ndjson"}).get_json()["export_id"]
+
+    data = wait_for_export(client, export_id)
+    assert data["status"] == FAILED
+    assert data["offset"] == 1500
+    assert data["rows_written"] == 1500
+    assert client.get(f"/api/exports/{export_id}/download").status_code == 409
+
+    eutils.fail_from = None
+    eutils.requests.clear()
+    assert client.post(f"/api/exports/{export_id}/resume").status_code == 202
+    data = wait_for_export(client, export_id)
+
+    assert data["status"] == DONE
+    assert data["resumes"] == 1
+    # 只请求检查点之后的批次
+    assert esummary_offsets(eutils) == [1500, 2000]
+    lines = client.get(f"/api/exports/{export_id}/download").get_data(as_text=True).splitlines()
+    assert [json.loads(line)["PMID"] for line in lines] == [str(eutils.first_pmid + i) for i in range(2300)]
+    assert client.post(f"/api/exports/{export_id}/resume").status_code == 409
+
+
+def test_interrupted_export_resumes_after_restart(eutils, eutils_server, store, manager, client, monkeypatch):
+    state = store.create("hta", "csv", "csv", 1800, False, 500)
+    literature.refresh_export_history(state)
+    fieldnames = literature.RESULT_FIELDNAMES
+    first = literature.fetch_articles([str(eutils.first_pmid + i) for i in range(500)])
+    store.append(state, literature.encode_export_rows("csv", first, fieldnames, header=True), 500, 500)
+    # 进程在写入下一批的途中退出：数据文件有未记录的残留内容，检查点仍为running
+    with open(os.path.join(store.root, state["export_id"], PARTIAL_FILE), "ab") as f:
+        f.write(b"12345,partial row")
+    state["status"] = "running"
+    store.save(state)
+
+    # 重启后使用新的模拟服务，旧WebEnv已失效
+    server = eutils_server(2300, FlakyEutilsServer)
+    restarted = ExportStore(store.root)
+    monkeypatch.setattr(literature, "export_store", restarted)
+    assert literature.resume_interrupted_exports() == 1
+    data = wait_for_export(client, state["export_id"])
+
+    assert data["status"] == DONE
+    assert data["rows_written"] == 1800
+    assert esummary_offsets(server)[0] == 500
+    rows = list(csv.DictReader(io.StringIO(client.get(f"/api/exports/{state['export_id']}/download").get_data(as_text=True))))
+    assert [row["PMID"] for row in rows] == [str(eutils.first_pmid + i) for i in range(1800)]
+
+
+def test_stale_webenv_is_refreshed_with_article_store(eutils, eutils_server, store, manager, client, tmp_path, monkeypatch):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'app.db'}"
+    SQLAlchemy().init_app(app)
+    articles = ArticleStore()
+    articles.init_app(app)
+    monkeypatch.setattr(literature, "article_store", articles)
+
+    state = store.create("hta", "csv", "csv", 1200, False, 500)
+    literature.refresh_export_history(state)
+    state["status"] = "failed"
+    store.save(state)
+
+    # 新的模拟服务不认识旧WebEnv：EFetch uilist返回400，应重新检索后完成导出
+    server = eutils_server(2300, FlakyEutilsServer)
+    assert client.post(f"/api/exports/{state['export_id']}/resume").status_code == 202
+    data = wait_for_export(client, state["export_id"])
+    esearches = [path for path, _ in server.requests if path.endswith("esearch.fcgi")]
+
+    assert data["status"] == DONE
+    assert data["rows_written"] == 1200
+    assert len(esearches) == 1
+    rows = list(csv.DictReader(io.StringIO(client.get(f"/api/exports/{state['export_id']}/download").get_data(as_text=True))))
+    assert [row["PMID"] for row in rows] == [str(server.first_pmid + i) for i in range(1200)]
+
+
+def test_checkpoint_is_replaced_atomically(store):
+    state = store.create("hta", "csv", "csv", None, False, 500)
+    store.append(state, b"a,b\n", 0, 0)
+    store.append(state, b"1,2\n", 1, 500)
+    directory = os.path.join(store.root, state["export_id"])
+    assert sorted(os.listdir(directory)) == [CHECKPOINT_FILE, PARTIAL_FILE]
+    assert store.load(state["export_id"])["bytes_written"] == 8
+    assert [s["export_id"] for s in store.interrupted()] == [state["export_id"]]
+
+
+def test_export_validation(store, client):
+    assert client.post("/api/exports", json={}).status_code == 400
+    assert client.post("/api/exports", json={"search_strategy": "x", "format": "xml"}).status_code == 400
+    assert client.get("/api/exports/..%2Fetc").status_code in (400, 404)
+    assert client.get(f"/api/exports/{'0' * 32}").status_code == 404
+
+
+def test_exports_require_directory(monkeypatch, client):
+    monkeypatch.setattr(literature, "export_store", ExportStore())
+    assert client.get("/api/exports").status_code == 503
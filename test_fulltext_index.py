@@ -0,0 +1,137 @@
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+import literature
+from article_store import ArticleStore
+from fulltext_index import FulltextIndex, to_fts_query
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'app.db'}"
+    SQLAlchemy().init_app(app)
+    index = FulltextIndex()
+    index.init_app(app)
+    monkeypatch.setattr(literature, "fulltext_index", index)
+    app.register_blueprint(literature.literature_bp, url_prefix="/api")
+    return app
+
+
+@pytest.fixture
+def index(app):
+    return literature.fulltext_index
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def record(pmid, title, abstract="", **extra):
+    return {"PMID": str(pmid), "Title": title, "Abstract": abstract, "Journal": "J Test", **extra}
+
+
+def pmids(result):
+    return [item["PMID"] for item in result["items"]]
+
+
+def test_query_translation():
+    assert to_fts_query('"cost effectiveness"[tiab] AND markov*[ti]') == \
+        '{title abstract} : "cost effectiveness" AND {title} : "markov"*'
+    assert to_fts_query("(diabetes OR insulin) cost-effectiveness NOT review[pt]") == \
+        '( "diabetes" OR "insulin" ) AND "cost-effectiveness" NOT {publication_types study_type} : "review"'
+    for query in ["", "AND x", "x[zz]", "(x", "x)", "[ti]", "x OR"]:
+        with pytest.raises(ValueError):
+            to_fts_query(query)
+
+
+def test_boolean_phrase_field_and_ranking(index):
+    index.add([
+        record(1, "Cost-effectiveness of insulin pumps", "A Markov model of type 1 diabetes."),
+        record(2, "Quality of life in diabetes", "We report cost effectiveness ratios."),
+        record(3, "Insulin safety review", "No economic outcomes.", Study_Type="Review"),
+        record(4, "Effectiveness of cost sharing", "Cost and effectiveness were unrelated."),
+    ])
+    assert index.count() == 4
+
+    # 标题命中的权重高于摘要
+    assert pmids(index.search('"cost effectiveness"')) == ["1", "2"]
+    assert pmids(index.search('"cost effectiveness"[ab]')) == ["2"]
+    assert pmids(index.search("insulin NOT review[pt]")) == ["1"]
+    assert set(pmids(index.search("(markov OR ratios) diabetes"))) == {"1", "2"}
+    assert set(pmids(index.search("effect*[ti]"))) == {"1", "4"}
+    assert len(index.search("effect*[ti]", limit=1, offset=1)["items"]) == 1
+    assert index.search("insulin", pmids=["3", "99"])["total"] == 1
+
+    result = index.search("markov")
+    assert result["items"][0]["snippet"] == "A <mark>Markov</mark> model of type 1 diabetes."
+    assert result["items"][0]["URL"] == "https://pubmed.ncbi.nlm.nih.gov/1/"
+    assert result["items"][0]["score"] > 0
+
+
+def test_replacing_record_keeps_enriched_fields(index):
+    index.add([record(5, "Old title", "Stored abstract", MeSH_Terms="Humans")])
+    index.add([record(5, "New title"), record("not-a-pmid", "Ignored")])
+    assert index.count() == 1
+    item = index.search("stored")["items"][0]
+    assert item["Title"] == "New title"
+    assert item["MeSH_Terms"] == "Humans"
+
+
+def test_retrieved_records_are_searchable_locally(client, index, eutils_server):
+    server = eutils_server(1200)
+    response = client.post("/api/execute_pubmed_search", json={
+        "search_strategy": "hta", "fetch_all": True, "include_abstracts": True, "include_csv": False
+    })
+    assert response.status_code == 200
+    result_id = response.get_json()["result_id"]
+    assert index.count() == 1200
+
+    server.requests.clear()
+    first_pmid = server.first_pmid
+    data = client.get("/api/local_search", query_string={"q": f'"plain abstract"[ab] AND {first_pmid + 1}'}).get_json()
+    assert pmids(data) == [str(first_pmid + 1)]
+    assert "Plain abstract" in data["items"][0]["Abstract"]
+
+    data = client.post("/api/local_search", json={"q": '"meta analysis"[pt]', "result_id": result_id, "limit": 5}).get_json()
+    assert data["total"] == 240
+    assert len(data["items"]) == 5
+    assert server.requests == []
+
+    assert client.get("/api/local_search", query_string={"q": "x[zz]"}).status_code == 400
+    assert client.get("/api/local_search").status_code == 400
+    assert client.get("/api/local_search", query_string={"q": "x", "result_id": "missing"}).status_code == 404
+
+
+def test_stored_articles_are_backfilled_at_startup(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'app.db'}"
+    SQLAlchemy().init_app(app)
+    store = ArticleStore()
+    store.init_app(app)
+    store.upsert_many([
+        record(11, "Budget impact of biosimilars", "Stored before the index existed", MeSH_Terms="Humans"),
+        record(12, "Markov cohort model"),
+        record("not-a-pmid", "Ignored"),
+    ])
+
+    index = FulltextIndex()
+    index.init_app(app)
+    assert index.count() == 2
+    item = index.search("biosimilars")["items"][0]
+    assert item["PMID"] == "11" and item["MeSH_Terms"] == "Humans"
+    assert pmids(index.search('"markov cohort"[ti]')) == ["12"]
+
+    # 已索引的记录不会重复写入
+    index.add([record(12, "Markov cohort model", "Indexed later")])
+    assert index.backfill() == 0
+    assert index.count() == 2 and index.search("indexed")["total"] == 1
+
+
+def test_local_search_requires_index(monkeypatch):
+    monkeypatch.setattr(literature, "fulltext_index", FulltextIndex())
+    app = Flask(__name__)
+    app.register_blueprint(literature.literature_bp, url_prefix="/api")
+    assert app.test_client().get("/api/local_search", query_string={"q": "x"}).status_code == 503
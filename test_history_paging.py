@@ -0,0 +1,72 @@
+import base64
+import csv
+import io
+
+import pytest
+
+import literature
+
+
+pytestmark = pytest.mark.corpus_size(1234)
+
+
+def esummary_calls(server):
+    return [params for path, params in server.requests if path.endswith("esummary.fcgi")]
+
+
+def test_fetch_all_pages_through_history_server(eutils):
+    results, total_count = literature.search_pubmed("hta", retmax=None, fetch_all=True, batch_size=500)
+
+    assert total_count == 1234
+    assert [r["PMID"] for r in results] == eutils.pmids()
+    calls = esummary_calls(eutils)
+    assert [int(c["retmax"]) for c in calls] == [500, 500, 234]
+    assert all("id" not in c and c["query_key"] == "1" for c in calls)
+
+
+def test_fetch_all_respects_caller_maximum(eutils):
+    results, total_count = literature.search_pubmed("hta", retmax=700, fetch_all=True, batch_size=300)
+
+    assert total_count == 1234
+    assert len(results) == 700
+    assert [int(c["retmax"]) for c in esummary_calls(eutils)] == [300, 300, 100]
+
+
+def test_default_mode_still_uses_single_request(eutils):
+    results, total_count = literature.search_pubmed("hta", retmax=20)
+
+    assert total_count == 1234
+    assert len(results) == 20
+    assert results[0]["DOI"] == f"10.1000/test.{results[0]['PMID']}"
+    assert len(esummary_calls(eutils)) == 1
+
+
+def test_invalid_webenv_is_reported(eutils, monkeypatch):
+    monkeypatch.setattr(literature, "esearch_history", lambda query: ("missing", "1", 10, []))
+
+    results, error = literature.search_pubmed("hta", fetch_all=True)
+
+    assert results is None
+    assert "摘要结果格式错误" in error
+
+
+def test_endpoint_fetch_all(eutils, client):
+    response = client.post("/api/execute_pubmed_search", json={"search_strategy": "hta", "fetch_all": True, "retmax": 1000})
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data["total_count"] == 1234
+    assert data["retrieved_count"] == 1000
+    rows = list(csv.DictReader(io.StringIO(base64.b64decode(data["pubmed_results_csv"]).decode("utf-8"))))
+    assert len(rows) == 1000
+
+
+def test_endpoint_rejects_invalid_retmax(client):
+    response = client.post("/api/execute_pubmed_search", json={"search_strategy": "hta", "retmax": "abc"})
+
+    assert response.status_code == 400
+
+
+def test_parse_search_options_reads_string_flags():
+    assert literature.parse_search_options({"fetch_all": "false"}) == (100, False, False)
+    assert literature.parse_search_options({"fetch_all": "true", "include_abstracts": "1"}) == (None, True, True)
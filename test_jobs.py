@@ -0,0 +1,112 @@
+import json
+import threading
+import time
+
+import pytest
+
+import literature
+from jobs import DONE, FAILED, JobManager, JobQueueFull
+from strategy_backends import StubStrategyBackend
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    manager = JobManager(max_workers=2, max_pending=4)
+    monkeypatch.setattr(literature, "job_manager", manager)
+    return manager
+
+
+def wait_for(manager, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = manager.get(job_id)
+        if job.status in (DONE, FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n") if not line.startswith(":"))
+        if fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_search_job_reports_progress_and_result(manager, client, eutils_server):
+    eutils_server(1200)
+    response = client.post("/api/jobs/search", json={"search_strategy": "hta", "fetch_all": True})
+
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+    events = parse_events(client.get(f"/api/jobs/{job_id}/events").get_data(as_text=True))
+
+    kind, final = events[-1]
+    assert kind == "result"
+    assert final["status"] == DONE
+    assert final["result"]["retrieved_count"] == 1200
+    assert final["result"]["pubmed_results_csv"] is None
+    assert final["progress"] == {"fetched": 1200, "total": 1200}
+    polled = client.get(f"/api/jobs/{job_id}").get_json()
+    assert polled["result"]["total_count"] == 1200
+
+
+def test_strategy_job_does_not_block_request(manager, client, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(literature, "strategy_backend", StubStrategyBackend(sleep=lambda seconds: release.wait(5)))
+
+    response = client.post("/api/jobs/strategy", json={"prompt": "请为疾病或干预方式：insomnia 为主题生成"})
+    job_id = response.get_json()["job_id"]
+    assert response.status_code == 202
+    assert client.get(f"/api/jobs/{job_id}").get_json()["status"] in ("queued", "running")
+
+    release.set()
+    job = wait_for(manager, job_id)
+    assert job.result["ai_response"]["keywords_analysis"]["disease"] == "insomnia"
+
+
+def test_failed_job_keeps_error(manager):
+    job = manager.submit("search", literature.run_pubmed_search, {"search_strategy": "hta", "retmax": "x"})
+
+    job = wait_for(manager, job.id)
+
+    assert job.status == FAILED
+    assert job.error == "retmax必须为正整数"
+
+
+def test_queue_is_bounded(manager):
+    release = threading.Event()
+    for _ in range(4):
+        manager.submit("search", lambda progress: (release.wait(5), ({}, 200))[1])
+
+    with pytest.raises(JobQueueFull):
+        manager.submit("search", lambda progress: ({}, 200))
+    release.set()
+
+
+def test_finished_jobs_expire(manager):
+    job = manager.submit("search", lambda progress: ({}, 200))
+    wait_for(manager, job.id)
+    manager.result_ttl = 0
+    time.sleep(0.01)
+
+    assert manager.get(job.id) is None
+
+
+def test_finished_jobs_are_capped(manager):
+    manager.max_finished = 2
+    jobs = []
+    for _ in range(3):
+        job = manager.submit("search", lambda progress: ({}, 200))
+        wait_for(manager, job.id)
+        jobs.append(job)
+
+    # 超出保留数量时删除最早完成的任务，不等到下次提交或查询
+    assert set(manager.jobs) == {jobs[1].id, jobs[2].id}
+    assert manager.stats()["jobs"]["done"] == 2
+
+
+def test_unknown_job_returns_404(manager, client):
+    assert client.get("/api/jobs/missing").status_code == 404
@@ -0,0 +1,78 @@
+import pytest
+from flask import Flask
+
+import literature
+from metrics import MetricsRegistry
+
+
+def sample(text, name):
+    """返回指标文本中某一行的数值"""
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    requests_total = registry.counter("demo_requests_total", "Requests", ("status",))
+    latency = registry.histogram("demo_seconds", "Latency", buckets=(0.1, 1.0))
+    in_flight = registry.gauge("demo_in_flight", "In flight")
+
+    requests_total.inc(status=200)
+    requests_total.inc(2, status=200)
+    latency.observe(0.05)
+    latency.observe(0.5)
+    with in_flight.track():
+        assert in_flight.value() == 1
+    text = registry.render()
+
+    assert "# TYPE demo_requests_total counter" in text
+    assert sample(text, 'demo_requests_total{status="200"}') == 3
+    assert sample(text, 'demo_seconds_bucket{le="0.1"}') == 1
+    assert sample(text, 'demo_seconds_bucket{le="1"}') == 2
+    assert sample(text, 'demo_seconds_bucket{le="+Inf"}') == 2
+    assert sample(text, "demo_seconds_count") == 2
+    assert sample(text, "demo_in_flight") == 0
+
+
+def test_registry_rejects_wrong_labels_and_conflicting_definitions():
+    registry = MetricsRegistry()
+    counter = registry.counter("demo_total", "Demo", ("endpoint",))
+
+    with pytest.raises(ValueError):
+        counter.inc(status=200)
+    assert registry.counter("demo_total", "Demo", ("endpoint",)) is counter
+    with pytest.raises(ValueError):
+        registry.gauge("demo_total", "Demo", ("endpoint",))
+
+
+def test_search_records_stage_and_upstream_metrics(client, eutils_server):
+    csv_before = literature.STAGE_SECONDS.snapshot(stage="csv_write")["count"]
+
+    server = eutils_server(50)
+    server.failures.append(503)
+    response = client.post("/api/execute_pubmed_search", json={"search_strategy": "hta", "retmax": 50})
+    text = client.get("/api/metrics").get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert literature.STAGE_SECONDS.snapshot(stage="csv_write")["count"] == csv_before + 1
+    for stage in ("esearch", "esummary", "parse", "csv_write", "base64", "result_view"):
+        assert f'search_stage_seconds_count{{stage="{stage}"}}' in text
+    assert sample(text, 'eutils_requests_total{endpoint="esearch.fcgi",status="200"}') >= 1
+    assert sample(text, 'eutils_retries_total{endpoint="esearch.fcgi"}') >= 1
+    assert sample(text, 'http_requests_total{endpoint="/api/execute_pubmed_search",method="POST",status="200"}') >= 1
+    assert sample(text, 'http_requests_in_flight{endpoint="/api/execute_pubmed_search"}') == 0
+    assert sample(text, 'http_requests_in_flight{endpoint="/api/metrics"}') == 1
+    assert 'http_response_bytes_count{endpoint="/api/execute_pubmed_search"}' in text
+
+
+def test_metrics_endpoint_content_type():
+    app = Flask(__name__)
+    app.register_blueprint(literature.literature_bp, url_prefix="/api")
+
+    response = app.test_client().get("/api/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    assert "search_jobs" in response.get_data(as_text=True)
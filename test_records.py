@@ -0,0 +1,99 @@
+import csv
+import io
+import json
+import pickle
+
+import literature
+from mock_eutils import PUB_TYPES_CYCLE, make_summary
+from records import Record, encode_csv, encode_ndjson, parse_esummary_article, to_jsonable
+
+
+def expected_record(pmid, article):
+    """原来按字典构造的解析结果"""
+    authors = [author.get("name", "") for author in article.get("authors", [])[:3]]
+    author_str = ", ".join(authors) + (" et al" if len(article.get("authors", [])) > 3 else "")
+    doi = next((item.get("value", "") for item in article.get("articleids", []) if item.get("idtype") == "doi"), "")
+    study_type = ""
+    if "pubtype" in article:
+        for pub_type, name in (("Randomized Controlled Trial", "RCT"), ("Systematic Review", "Systematic Review"),
+                               ("Meta-Analysis", "Meta-Analysis"), ("Review", "Review")):
+            if pub_type in article["pubtype"]:
+                study_type = name
+                break
+        else:
+            study_type = "Original Research"
+    return {
+        "PMID": pmid,
+        "Title": article.get("title", ""),
+        "Authors": author_str,
+        "Journal": article.get("fulljournalname", article.get("source", "")),
+        "Publication_Date": article.get("pubdate", ""),
+        "DOI": doi,
+        "Abstract": "",
+        "Study_Type": study_type,
+        "URL": f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/",
+    }
+
+
+def test_single_pass_parse_matches_dict_records():
+    articles = [(str(pmid), make_summary(pmid)) for pmid in range(1, 21)]
+    articles += [
+        ("101", {"title": "No metadata"}),
+        ("102", {"source": "J Abbr", "pubtype": [], "authors": [], "articleids": [{"idtype": "pubmed", "value": "102"}]}),
+        ("103", {"fulljournalname": "", "source": "J Abbr", "pubtype": ["Review", "Meta-Analysis"]}),
+    ]
+    for pmid, article in articles:
+        record = parse_esummary_article(pmid, article)
+        assert isinstance(record, Record)
+        assert dict(record) == expected_record(pmid, article)
+    assert {parse_esummary_article(str(n), make_summary(n)).Study_Type for n in range(len(PUB_TYPES_CYCLE))} == {
+        "RCT", "Systematic Review", "Meta-Analysis", "Review", "Original Research"}
+
+
+def test_record_behaves_like_result_dict():
+    record = parse_esummary_article("7", make_summary(7))
+    plain = dict(record)
+
+    assert list(record) == literature.RESULT_FIELDNAMES
+    assert record == plain and {**record} == plain
+    assert "MeSH_Terms" not in record and record.get("MeSH_Terms", "-") == "-"
+    assert record["URL"] == "https://pubmed.ncbi.nlm.nih.gov/7/"
+    assert record.get("unknown") is None
+
+    record.setdefault("MeSH_Terms", "")
+    record["Publication_Types"] = "Review"
+    record["Abstract"] = "Text"
+    assert list(record) == literature.ENRICHED_FIELDNAMES
+    assert record["MeSH_Terms"] == "" and len(record) == 11
+    del record["MeSH_Terms"]
+    assert "MeSH_Terms" not in record
+
+    try:
+        record["score"] = 1
+    except KeyError:
+        pass
+    else:
+        raise AssertionError("不应允许设置未定义的字段")
+
+    restored = pickle.loads(pickle.dumps(record))
+    assert restored == record
+    assert json.loads(json.dumps([record], default=to_jsonable)) == [dict(record)]
+
+
+def test_encoders_match_dict_based_output():
+    records = [parse_esummary_article(str(n), make_summary(n)) for n in range(1, 6)]
+    records[1]["Abstract"] = 'Quoted "text", with comma\nand newline'
+    records[1].setdefault("MeSH_Terms", "Humans; Aged")
+    records[1].setdefault("Publication_Types", "Review")
+    records[2]["Title"] = "Ünïcode title"
+    rows = records + [{**dict(records[0]), "PMID": "99", "score": 0.5}]
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=literature.RESULT_FIELDNAMES, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(dict(row) for row in rows)
+    assert encode_csv(rows, literature.RESULT_FIELDNAMES) == buffer.getvalue()
+
+    expected = "".join(json.dumps(dict(row), ensure_ascii=False) + "\n" for row in rows)
+    assert encode_ndjson(rows) == expected
+    assert encode_ndjson([]) == ""
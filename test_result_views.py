@@ -0,0 +1,96 @@
+import time
+
+import pytest
+
+from result_views import ResultView, date_key
+
+
+def make_records(count):
+    study_types = ["RCT", "Review", "Original Research"]
+    return [
+        {
+            "PMID": str(i),
+            "Title": f"Title {i}",
+            "Journal": f"Journal {i % 7}",
+            "Publication_Date": f"{2010 + i % 12} {['Jan', 'Mar', 'Dec'][i % 3]} {i % 28 + 1}",
+            "Study_Type": study_types[i % 3],
+        }
+        for i in range(count)
+    ]
+
+
+FIELDNAMES = ["PMID", "Title", "Journal", "Publication_Date", "Study_Type"]
+
+
+def test_date_key_handles_pubmed_formats():
+    assert date_key("2019 Mar 5") == 20190305
+    assert date_key("2019/03/05") == 20190305
+    assert date_key("2018 Winter") == 20181200
+    assert date_key("2020") == 20200000
+    assert date_key("") == 0
+
+
+def test_cursor_pages_cover_filtered_set_in_order():
+    view = ResultView(make_records(1000), FIELDNAMES)
+
+    seen = []
+    cursor = None
+    while True:
+        page = view.query(sort="date", order="desc", limit=70, cursor=cursor, filters={"Study_Type": ["RCT"]}, include_facets=False)
+        seen.extend(page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == page["matched"] == 334
+    assert all(item["Study_Type"] == "RCT" for item in seen)
+    keys = [date_key(item["Publication_Date"]) for item in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_facets_reflect_filters():
+    view = ResultView(make_records(1200), FIELDNAMES)
+
+    page = view.query(filters={"Year": ["2015"]}, limit=5)
+
+    assert page["matched"] == 100
+    assert page["facets"]["Year"] == {"2015": 100}
+    assert sum(page["facets"]["Study_Type"].values()) == 100
+    assert len(page["facets"]["Journal"]) == 7
+
+
+def test_journal_sort_and_bad_cursor():
+    view = ResultView(make_records(50), FIELDNAMES)
+
+    page = view.query(sort="journal", order="asc", limit=50, include_facets=False)
+    journals = [item["Journal"] for item in page["items"]]
+
+    assert journals == sorted(journals)
+    with pytest.raises(ValueError):
+        view.query(sort="date", cursor=view.query(sort="journal", limit=1)["next_cursor"])
+
+
+def test_queries_are_fast_for_large_sets():
+    view = ResultView(make_records(50000), FIELDNAMES)
+
+    started = time.perf_counter()
+    page = view.query(sort="journal", limit=100, filters={"Study_Type": ["Review"], "Year": ["2011", "2014"]})
+    elapsed = time.perf_counter() - started
+
+    assert len(page["items"]) == 100
+    assert elapsed < 0.2
+
+
+def test_results_endpoint_after_search(client, eutils_server):
+    eutils_server(300)
+    search = client.post("/api/execute_pubmed_search", json={"search_strategy": "hta", "retmax": 300, "include_csv": False}).get_json()
+
+    result_id = search["result_id"]
+    first = client.get(f"/api/results/{result_id}", query_string={"limit": 20, "study_type": "RCT"}).get_json()
+    second = client.get(f"/api/results/{result_id}", query_string={"limit": 20, "study_type": "RCT", "cursor": first["next_cursor"]}).get_json()
+
+    assert first["matched"] == 60
+    assert {item["PMID"] for item in first["items"]}.isdisjoint(item["PMID"] for item in second["items"])
+    assert first["facets"]["Study_Type"] == {"RCT": 60}
+    assert client.get(f"/api/results/{result_id}", query_string={"sort": "title"}).status_code == 400
+    assert client.get("/api/results/missing").status_code == 404
@@ -0,0 +1,129 @@
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+import literature
+from article_store import ArticleStore
+from saved_searches import SavedSearchStore
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'app.db'}"
+    SQLAlchemy().init_app(app)
+    store = SavedSearchStore()
+    store.init_app(app)
+    monkeypatch.setattr(literature, "saved_search_store", store)
+    app.register_blueprint(literature.literature_bp, url_prefix="/api")
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def eutils(eutils_server, monkeypatch):
+    monkeypatch.setattr(literature, "ESEARCH_ID_PAGE_SIZE", 200)
+    return eutils_server(500)
+
+
+def esummary_ids(server):
+    ids = []
+    for path, params in server.requests:
+        if path.endswith("esummary.fcgi"):
+            ids.extend(params["id"].split(","))
+    return ids
+
+
+def test_create_records_baseline_without_summaries(eutils, client):
+    response = client.post("/api/saved_searches", json={"name": "HTA", "search_strategy": "hta"})
+
+    assert response.status_code == 201
+    saved = response.get_json()
+    assert saved["total_count"] == 500
+    assert len(literature.saved_search_store.get(saved["id"], include_pmids=True)["pmids"]) == 500
+    assert esummary_ids(eutils) == []
+    assert client.get("/api/saved_searches").get_json()["saved_searches"][0]["name"] == "HTA"
+
+
+def test_update_returns_only_new_and_retracted_records(eutils, client):
+    saved = client.post("/api/saved_searches", json={"search_strategy": "hta"}).get_json()
+    pmids = eutils.pmids()
+    eutils.corpus_size = 503
+    for pmid in eutils.pmids()[500:]:
+        eutils.entrez_dates[pmid] = "2999/01/01"
+    eutils.retracted.add(pmids[10])
+    eutils.modified_dates[pmids[10]] = "2999/01/01"
+    eutils.requests.clear()
+
+    data = client.post(f"/api/saved_searches/{saved['id']}/update", json={}).get_json()
+
+    assert [r["PMID"] for r in data["new_records"]] == eutils.pmids()[500:]
+    assert data["retracted_pmids"] == [pmids[10]]
+    assert data["removed_pmids"] == []
+    assert data["total_count"] == 503
+    assert sorted(esummary_ids(eutils)) == sorted(eutils.pmids()[500:] + [pmids[10]])
+    # 再次更新时已记录的PMID不会重复返回
+    again = client.post(f"/api/saved_searches/{saved['id']}/update", json={}).get_json()
+    assert again["new_count"] == 0
+
+
+def test_update_with_removed_check(eutils, client):
+    saved = client.post("/api/saved_searches", json={"search_strategy": "hta"}).get_json()
+    original = eutils.pmids()
+    eutils.pmids_for = lambda term: original[5:]
+
+    data = client.post(f"/api/saved_searches/{saved['id']}/update", json={"check_removed": True}).get_json()
+
+    assert data["removed_pmids"] == original[:5]
+    assert data["total_count"] == 495
+    assert literature.saved_search_store.get(saved["id"])["total_count"] == 495
+
+
+def test_retracted_records_bypass_article_store(app, eutils, client, monkeypatch):
+    articles = ArticleStore()
+    articles.init_app(app)
+    monkeypatch.setattr(literature, "article_store", articles)
+    saved = client.post("/api/saved_searches", json={"search_strategy": "hta"}).get_json()
+    pmid = eutils.pmids()[10]
+    stale = literature.fetch_articles([pmid])[0]
+    stale["Title"] = "Before retraction"
+    articles.upsert_many([stale])
+    eutils.retracted.add(pmid)
+    eutils.modified_dates[pmid] = "2999/01/01"
+    eutils.requests.clear()
+
+    data = client.post(f"/api/saved_searches/{saved['id']}/update", json={}).get_json()
+
+    assert esummary_ids(eutils) == [pmid]
+    assert data["retracted_records"][0]["Title"] != "Before retraction"
+    assert articles.get_many([pmid])[pmid]["Title"] == data["retracted_records"][0]["Title"]
+
+
+def test_update_reports_pubmed_count_without_removed_check(eutils, client):
+    saved = client.post("/api/saved_searches", json={"search_strategy": "hta"}).get_json()
+    original = eutils.pmids()
+    eutils.pmids_for = lambda term: original[5:]
+
+    data = client.post(f"/api/saved_searches/{saved['id']}/update", json={}).get_json()
+
+    assert data["removed_pmids"] == []
+    assert data["total_count"] == 495
+    assert data["tracked_count"] == 500
+
+
+def test_missing_saved_search(client):
+    assert client.post("/api/saved_searches/99/update", json={}).status_code == 404
+
+
+def test_requires_database(monkeypatch, eutils):
+    monkeypatch.setattr(literature, "saved_search_store", SavedSearchStore())
+    app = Flask(__name__)
+    app.register_blueprint(literature.literature_bp, url_prefix="/api")
+
+    response = app.test_client().post("/api/saved_searches", json={"search_strategy": "hta"})
+
+    assert response.status_code == 503
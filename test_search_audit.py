@@ -0,0 +1,172 @@
+import time
+from datetime import datetime
+
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+import literature
+from search_audit import SearchAuditLog
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'app.db'}"
+    app.config["SEARCH_AUDIT_FLUSH_INTERVAL"] = 0.05
+    SQLAlchemy().init_app(app)
+    audit_log = SearchAuditLog()
+    audit_log.init_app(app)
+    monkeypatch.setattr(literature, "search_audit_log", audit_log)
+    app.register_blueprint(literature.literature_bp, url_prefix="/api")
+    return app
+
+
+@pytest.fixture
+def audit_log(app):
+    return literature.search_audit_log
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_log(strategy, total_count, **extra):
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "search_strategy": strategy,
+        "retmax": 100,
+        "fetch_all": False,
+        "include_abstracts": False,
+        "cache": "miss",
+        "results_count": min(total_count, 100),
+        "total_count": total_count,
+        "tool": "literature_search_tool",
+        **extra,
+    }
+
+
+def test_database_uses_wal(audit_log):
+    with audit_log.engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+
+
+def test_searches_are_logged_in_background(client, audit_log, eutils_server):
+    eutils_server(300)
+    for strategy in ["diabetes[mesh]", "diabetes [MeSH]", "insomnia"]:
+        response = client.post("/api/execute_pubmed_search", json={"search_strategy": strategy, "include_csv": False})
+        assert response.status_code == 200
+    audit_log.flush()
+
+    items = client.get("/api/search_history").get_json()["items"]
+    assert [item["search_strategy"] for item in items] == ["insomnia", "diabetes [MeSH]", "diabetes[mesh]"]
+    assert items[0]["total_count"] == 300
+    assert items[0]["results_count"] == 100
+    assert items[1]["cache"] == "hit"
+
+    items = client.get("/api/search_history", query_string={"strategy": "(diabetes[Mesh])"}).get_json()["items"]
+    assert len(items) == 2
+    assert client.get(f"/api/search_history/{items[0]['id']}").get_json()["search_strategy"] == "diabetes [MeSH]"
+    assert client.get("/api/search_history/9999").status_code == 404
+
+
+def test_bulk_searches_and_exports_are_logged(client, audit_log, eutils_server):
+    eutils_server(300)
+    response = client.post("/api/bulk_search", json={"search_strategies": ["asthma", "copd"], "include_csv": False})
+    assert response.status_code == 200
+    response = client.get("/api/export_pubmed_search", query_string={"search_strategy": "insomnia", "retmax": 50})
+    assert response.status_code == 200
+    response.get_data()
+    audit_log.flush()
+
+    entries = {entry["search_strategy"]: entry for entry in audit_log.query()[0]}
+    assert {name: entries[name]["tool"] for name in entries} == {
+        "asthma": "bulk_search", "copd": "bulk_search", "insomnia": "export_stream"}
+    assert entries["asthma"]["total_count"] == 300
+    assert entries["insomnia"]["results_count"] == 50
+
+
+def test_writes_are_batched(audit_log):
+    for i in range(450):
+        audit_log.record(make_log(f"term{i}", i))
+    audit_log.flush()
+    assert audit_log.count() == 450
+    assert audit_log.written == 450
+    # 默认每批最多200条
+    assert audit_log.batches <= 5
+
+
+def test_filters_and_paging(client, audit_log):
+    audit_log.record(make_log("hta AND diabetes", 1200))
+    audit_log.record(make_log("hta AND 100%_coverage", 40))
+    audit_log.record(make_log("insomnia", 5, error="检索失败"))
+    audit_log.flush()
+
+    def strategies(**params):
+        return [item["search_strategy"] for item in client.get("/api/search_history", query_string=params).get_json()["items"]]
+
+    assert strategies(q="HTA") == ["hta AND 100%_coverage", "hta AND diabetes"]
+    assert strategies(q="100%_") == ["hta AND 100%_coverage"]
+    assert strategies(q="0%x") == []
+    assert strategies(min_count=10, max_count=1000) == ["hta AND 100%_coverage"]
+    today = datetime.now().date().isoformat()
+    assert len(strategies(**{"from": today, "to": today})) == 3
+    assert strategies(to="2000-01-01") == []
+
+    page = client.get("/api/search_history", query_string={"limit": 2}).get_json()
+    assert len(page["items"]) == 2
+    rest = client.get("/api/search_history", query_string={"limit": 2, "cursor": page["next_cursor"]}).get_json()
+    assert [item["search_strategy"] for item in rest["items"]] == ["hta AND diabetes"]
+    assert rest["next_cursor"] is None
+    assert rest["items"][0]["error"] is None
+
+    assert client.get("/api/search_history", query_string={"from": "yesterday"}).status_code == 400
+    assert client.get("/api/search_history", query_string={"min_count": "x"}).status_code == 400
+
+
+def test_record_does_not_block_and_drops_when_full():
+    audit_log = SearchAuditLog(max_queue=1000)
+    audit_log.engine = object()  # 不启动写入线程，队列只进不出
+    log = make_log("diabetes", 10)
+
+    started = time.perf_counter()
+    for _ in range(1200):
+        audit_log.record(log)
+    elapsed = time.perf_counter() - started
+
+    assert audit_log.queue.qsize() == 1000
+    assert audit_log.dropped == 200
+    assert elapsed < 0.5
+
+
+def test_history_requires_database(monkeypatch):
+    monkeypatch.setattr(literature, "search_audit_log", SearchAuditLog())
+    app = Flask(__name__)
+    app.register_blueprint(literature.literature_bp, url_prefix="/api")
+    assert app.test_client().get("/api/search_history").status_code == 503
+    assert literature.search_audit_log.record(make_log("x", 1)) is False
+
+
+def test_strategy_text_uses_trigram_index(app, audit_log):
+    audit_log.record(make_log("hta AND diabetes", 1200))
+    audit_log.record(make_log("insomnia", 5))
+    audit_log.flush()
+    assert audit_log.text_index
+
+    with audit_log.engine.connect() as conn:
+        plan = " ".join(row[-1] for row in conn.exec_driver_sql(
+            "EXPLAIN QUERY PLAN SELECT id FROM search_audit_log WHERE id IN "
+            "(SELECT rowid FROM search_audit_fts WHERE search_audit_fts MATCH '\"diab\"')"
+        ))
+    assert "VIRTUAL TABLE INDEX" in plan
+    assert [entry["search_strategy"] for entry in audit_log.query(text="DIAB")[0]] == ["hta AND diabetes"]
+    # 少于3个字符时按扫描匹配
+    assert [entry["search_strategy"] for entry in audit_log.query(text="om")[0]] == ["insomnia"]
+
+    # 索引建立前已有的日志在init_app时补入
+    with audit_log.engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE search_audit_fts")
+    restarted = SearchAuditLog()
+    restarted.init_app(app)
+    assert [entry["search_strategy"] for entry in restarted.query(text="somn")[0]] == ["insomnia"]
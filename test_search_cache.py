@@ -0,0 +1,122 @@
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+from mock_eutils import make_summary
+from records import Record, parse_esummary_article
+from search_cache import SearchCache, normalize_strategy
+
+
+pytestmark = pytest.mark.corpus_size(300)
+
+
+def make_app(tmp_path):
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'app.db'}"
+    SQLAlchemy().init_app(app)
+    return app
+
+
+def test_normalization_ignores_formatting():
+    a = '(("diabetes" [MeSH Terms] OR diabetes [Text Word]))  AND  (HTA [tiab])'
+    b = '("diabetes"[mesh terms] OR diabetes[text word]) AND HTA[TIAB]'
+
+    assert normalize_strategy(a) == normalize_strategy(b)
+    assert normalize_strategy("(a OR b) AND c") != normalize_strategy("a OR b AND c")
+
+
+def test_normalization_keeps_date_range_parentheses():
+    query = 'x AND ("2015/01/01"[Date - Publication] : "3000/12/31"[Date - Publication])'
+
+    assert normalize_strategy(query) == 'x AND ("2015/01/01"[date - publication] : "3000/12/31"[date - publication])'
+
+
+def test_lru_eviction_and_ttl(monkeypatch):
+    cache = SearchCache(max_entries=2, ttl=10)
+    now = [1000.0]
+    monkeypatch.setattr("search_cache.time.time", lambda: now[0])
+
+    cache.put("a", ([], 1))
+    cache.put("b", ([], 2))
+    assert cache.get("a") == ([], 1)
+    cache.put("c", ([], 3))
+
+    assert cache.get("b") is None
+    assert cache.get("c") == ([], 3)
+    now[0] += 11
+    assert cache.get("a") is None
+    assert cache.stats()["hits"] == 2
+    assert cache.stats()["misses"] == 2
+
+
+def test_memory_tier_is_bounded_by_records(tmp_path):
+    app = make_app(tmp_path)
+    cache = SearchCache(max_records=10, max_persist_records=4)
+    cache.init_app(app)
+
+    cache.put("small", ([{"PMID": "1"}] * 3, 3))
+    cache.put("medium", ([{"PMID": "2"}] * 6, 6))
+    cache.put("large", ([{"PMID": "3"}] * 11, 11))
+    assert cache.stats()["records"] == 9
+    assert cache.get("large") is None
+
+    # 记录总数超过上限时淘汰最久未使用的条目
+    cache.put("more", ([{"PMID": "4"}] * 2, 2))
+    assert cache.stats()["records"] == 8
+    assert list(cache.entries) == ["medium", "more"]
+
+    # 超过max_persist_records的结果不写入持久层
+    fresh = SearchCache()
+    fresh.init_app(app)
+    assert fresh.get("more") == ([{"PMID": "4"}] * 2, 2)
+    assert fresh.get("medium") is None
+
+
+def test_persistent_tier_survives_new_instance(tmp_path):
+    app = make_app(tmp_path)
+    first = SearchCache()
+    first.init_app(app)
+    first.put("key", ([{"PMID": "1"}], 5))
+
+    second = SearchCache()
+    second.init_app(app)
+
+    assert second.get("key") == ([{"PMID": "1"}], 5)
+    assert second.stats()["persistent_hits"] == 1
+    assert second.get("key") == ([{"PMID": "1"}], 5)
+    assert second.stats()["hits"] == 1
+
+
+def test_persistent_tier_restores_records(tmp_path):
+    app = make_app(tmp_path)
+    records = [parse_esummary_article(str(n), make_summary(n)) for n in range(1, 4)]
+    records[1].setdefault("MeSH_Terms", "Humans")
+    records[1].setdefault("Publication_Types", "Review")
+    first = SearchCache()
+    first.init_app(app)
+    first.put("key", (records, 3))
+
+    second = SearchCache()
+    second.init_app(app)
+    results, total_count = second.get("key")
+
+    assert total_count == 3
+    assert all(isinstance(record, Record) for record in results)
+    assert results == records
+    assert "MeSH_Terms" not in results[0] and results[1]["MeSH_Terms"] == "Humans"
+
+
+def test_endpoint_hits_cache_for_reformatted_strategy(eutils, client):
+    first = client.post("/api/execute_pubmed_search", json={"search_strategy": "(hta [MeSH Terms])"}).get_json()
+    second = client.post("/api/execute_pubmed_search", json={"search_strategy": "hta[mesh terms]"}).get_json()
+    bypass = client.post("/api/execute_pubmed_search", json={"search_strategy": "hta[mesh terms]", "no_cache": True}).get_json()
+
+    assert first["search_log"]["cache"] == "miss"
+    assert second["search_log"]["cache"] == "hit"
+    assert bypass["search_log"]["cache"] == "bypass"
+    not_bypassed = client.post("/api/execute_pubmed_search", json={"search_strategy": "hta[mesh terms]", "no_cache": "false"}).get_json()
+    assert not_bypassed["search_log"]["cache"] == "hit"
+    assert second["retrieved_count"] == first["retrieved_count"] == 100
+    assert sum(path.endswith("esearch.fcgi") for path, _ in eutils.requests) == 2
+    stats = client.get("/api/cache_stats").get_json()
+    assert stats["hits"] == 2 and stats["misses"] == 1
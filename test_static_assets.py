@@ -0,0 +1,124 @@
+import gzip
+import os
+
+import pytest
+from flask import Flask
+
+from static_assets import IMMUTABLE_CACHE_CONTROL, StaticAssets
+
+BUNDLE = "export function render() { return 'literature search'; }\n" * 200
+
+
+@pytest.fixture
+def static_dir(tmp_path):
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "index.html").write_text("<!doctype html><div id=root></div>" + " " * 2000, encoding="utf-8")
+    (tmp_path / "assets" / "index-BqJ3kZ1a.js").write_text(BUNDLE, encoding="utf-8")
+    (tmp_path / "assets" / "index-C9xY2wQe.css").write_text("body{margin:0}\n" * 200, encoding="utf-8")
+    # 构建时生成的brotli文件直接使用
+    (tmp_path / "assets" / "index-C9xY2wQe.css.br").write_bytes(b"fake-brotli")
+    (tmp_path / "vite.svg").write_text("<svg/>", encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture
+def client(static_dir):
+    app = Flask(__name__, static_folder=None)
+    assets = StaticAssets(str(static_dir))
+
+    @app.route("/", defaults={"path": ""})
+    @app.route("/<path:path>")
+    def serve(path):
+        return assets.serve(path)
+
+    return app.test_client()
+
+
+def test_hashed_asset_served_gzip_with_immutable_cache(client):
+    response = client.get("/assets/index-BqJ3kZ1a.js", headers={"Accept-Encoding": "gzip, deflate"})
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert gzip.decompress(response.data).decode("utf-8") == BUNDLE
+    assert len(response.data) < len(BUNDLE)
+
+
+def test_identity_when_client_does_not_accept_compression(client):
+    response = client.get("/assets/index-BqJ3kZ1a.js", headers={"Accept-Encoding": "identity"})
+
+    assert "Content-Encoding" not in response.headers
+    assert response.get_data(as_text=True) == BUNDLE
+
+
+def test_precompressed_file_on_disk_is_preferred(client):
+    response = client.get("/assets/index-C9xY2wQe.css", headers={"Accept-Encoding": "gzip, br"})
+
+    assert response.headers["Content-Encoding"] == "br"
+    assert response.data == b"fake-brotli"
+    assert client.get("/assets/index-C9xY2wQe.css.br").status_code == 404
+
+
+def test_index_etag_revalidation(client):
+    first = client.get("/", headers={"Accept-Encoding": "gzip"})
+    etag = first.headers["ETag"]
+    second = client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+
+    assert first.headers["Cache-Control"] == "no-cache"
+    assert second.status_code == 304
+    assert second.data == b""
+    # 不同编码的ETag不同
+    assert client.get("/", headers={"Accept-Encoding": "identity", "If-None-Match": etag}).status_code == 200
+
+
+def test_spa_fallback_and_missing_files(client):
+    route = client.get("/reports/42")
+    small = client.get("/vite.svg", headers={"Accept-Encoding": "gzip"})
+
+    assert route.status_code == 200
+    assert b"id=root" in route.data
+    assert small.status_code == 200
+    assert "Content-Encoding" not in small.headers
+    assert client.get("/assets/index-missing1.js").status_code == 404
+
+
+def test_requests_do_not_touch_disk(client, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("请求期间不应访问磁盘")
+
+    monkeypatch.setattr(os.path, "exists", fail)
+    monkeypatch.setattr(os, "stat", fail)
+
+    assert client.get("/assets/index-BqJ3kZ1a.js").status_code == 200
+
+
+def test_missing_static_folder():
+    app = Flask(__name__, static_folder=None)
+    assets = StaticAssets("/nonexistent/static")
+
+    with app.test_request_context("/"):
+        assert assets.serve("") == ("index.html not found", 404)
+
+
+def test_only_vite_hash_segments_are_immutable(static_dir):
+    (static_dir / "assets" / "my-background.png").write_bytes(b"png")
+    (static_dir / "assets" / "logo-a1B2_c3-.svg").write_text("<svg/>", encoding="utf-8")
+    assets = StaticAssets(str(static_dir))
+
+    assert assets.assets["assets/index-BqJ3kZ1a.js"].cache_control == IMMUTABLE_CACHE_CONTROL
+    assert assets.assets["assets/logo-a1B2_c3-.svg"].cache_control == IMMUTABLE_CACHE_CONTROL
+    assert assets.assets["assets/my-background.png"].cache_control != IMMUTABLE_CACHE_CONTROL
+
+
+def test_build_manifest_decides_hashed_files(static_dir):
+    (static_dir / ".vite").mkdir()
+    (static_dir / ".vite" / "manifest.json").write_text(
+        '{"index.html": {"file": "assets/index-BqJ3kZ1a.js", "css": ["assets/index-C9xY2wQe.css"]}}', encoding="utf-8"
+    )
+    (static_dir / "assets" / "chart-D4e5F6g7.js").write_text("old chunk", encoding="utf-8")
+    assets = StaticAssets(str(static_dir))
+
+    assert assets.assets["assets/index-BqJ3kZ1a.js"].cache_control == IMMUTABLE_CACHE_CONTROL
+    assert assets.assets["assets/index-C9xY2wQe.css"].cache_control == IMMUTABLE_CACHE_CONTROL
+    assert assets.assets["assets/chart-D4e5F6g7.js"].cache_control != IMMUTABLE_CACHE_CONTROL
@@ -0,0 +1,143 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import literature
+from strategy_backends import (
+    OpenAICompatibleBackend, StrategyBackend, StrategyStreamParser, StubStrategyBackend, build_stub_response,
+    parse_strategy_response, validate_strategy
+)
+
+
+def parse_events(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_parser_extracts_strategy_before_output_ends():
+    text = json.dumps({"search_strategy": 'a "quoted \\\\ term" AND b', "explanation": "x" * 500}, ensure_ascii=False)
+    parser = StrategyStreamParser()
+
+    found_at = None
+    for start in range(0, len(text), 3):
+        if parser.feed(text[start:start + 3]) is not None:
+            found_at = start
+    assert parser.search_strategy == 'a "quoted \\\\ term" AND b'
+    assert found_at < len(text) / 4
+    assert parser.text == text
+
+
+def test_validate_strategy():
+    assert validate_strategy(build_stub_response("diabetes")["search_strategy"]) == []
+    assert validate_strategy("(diabetes[mesh] OR insulin") == ["圆括号不匹配"]
+    assert validate_strategy('"heart attack[tiab]') == ["引号不匹配"]
+    assert validate_strategy("diabetes[mesh\nOR x") == ["检索策略包含换行符", "字段标签方括号不匹配"]
+    assert validate_strategy("  ") == ["检索策略为空"]
+
+
+def test_parse_strategy_response_accepts_code_fence():
+    assert parse_strategy_response('```json\n{"search_strategy": "a"}\n```') == {"search_strategy": "a"}
+    with pytest.raises(ValueError):
+        parse_strategy_response('{"explanation": "no strategy"}')
+    with pytest.raises(ValueError):
+        parse_strategy_response("not json")
+
+
+def test_stub_backend_is_deterministic():
+    backend = StubStrategyBackend(duration=0)
+    prompt = literature.build_prompt("asthma")
+
+    assert backend.generate(prompt) == backend.generate(prompt)
+    assert json.loads(backend.generate(prompt)) == build_stub_response("asthma")
+
+
+def test_get_ai_strategy_reports_validation(client):
+    data = client.post("/api/get_ai_strategy", json={"prompt": literature.build_prompt("gout")}).get_json()
+
+    assert data["ai_response"]["keywords_analysis"]["disease"] == "gout"
+    assert data["validation"] == {"valid": True, "problems": []}
+    assert data["cache"] == "miss"
+
+
+def test_stream_sends_strategy_early_then_result(client, monkeypatch):
+    monkeypatch.setattr(literature, "strategy_backend", StubStrategyBackend(duration=1.0, chunk_size=16))
+
+    started = time.perf_counter()
+    response = client.post("/api/stream_ai_strategy", json={"prompt": literature.build_prompt("insomnia")}, buffered=False)
+    strategy_at = None
+    body = []
+    for chunk in response.response:
+        chunk = chunk.decode("utf-8") if isinstance(chunk, bytes) else chunk
+        body.append(chunk)
+        if strategy_at is None and chunk.startswith("event: search_strategy"):
+            strategy_at = time.perf_counter() - started
+    total = time.perf_counter() - started
+    events = parse_events("".join(body))
+
+    assert response.content_type.startswith("text/event-stream")
+    assert strategy_at < total / 2
+    names = [name for name, _ in events]
+    assert names[0] == "token"
+    assert names.count("search_strategy") == 1
+    assert names[-1] == "result"
+    strategy_event = events[names.index("search_strategy")][1]
+    result = events[-1][1]
+    assert strategy_event["search_strategy"] == result["ai_response"]["search_strategy"]
+    assert strategy_event["valid"] is True
+    assert result["cache"] == "miss"
+
+    # 相同关键词再次请求直接返回缓存结果
+    cached = parse_events(client.post("/api/stream_ai_strategy", json={"prompt": literature.build_prompt("Insomnia")}).get_data(as_text=True))
+    assert [name for name, _ in cached] == ["search_strategy", "result"]
+    assert cached[-1][1]["cache"] == "hit"
+
+
+def test_stream_reports_invalid_model_output(client, monkeypatch):
+    class BrokenBackend(StrategyBackend):
+        def stream(self, prompt):
+            yield '{"search_strategy": "(diabetes", '
+            yield '"explanation": '
+
+    monkeypatch.setattr(literature, "strategy_backend", BrokenBackend())
+
+    events = parse_events(client.post("/api/stream_ai_strategy", json={"prompt": "p"}).get_data(as_text=True))
+
+    assert events[1] == ("search_strategy", {"search_strategy": "(diabetes", "valid": False, "problems": ["圆括号不匹配"]})
+    assert events[-1][0] == "error"
+    assert client.post("/api/stream_ai_strategy", json={"prompt": " "}).status_code == 400
+
+
+def test_openai_compatible_backend_streams_deltas():
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for piece in ['{"search_', 'strategy": "x"}']:
+                self.wfile.write(f"data: {json.dumps({'choices': [{'delta': {'content': piece}}]})}\n\n".encode())
+            self.wfile.write(b"data: [DONE]\n\n")
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        backend = OpenAICompatibleBackend(f"http://127.0.0.1:{server.server_address[1]}/v1", "test-model", api_key="k")
+        chunks = list(backend.stream("prompt"))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert chunks == ['{"search_', 'strategy": "x"}']
+    assert received[0]["stream"] is True
+    assert received[0]["messages"] == [{"role": "user", "content": "prompt"}]
@@ -0,0 +1,94 @@
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+import literature
+from mock_eutils import MockEutilsServer
+
+
+pytestmark = pytest.mark.corpus_size(1200)
+
+
+class FailingEutilsServer(MockEutilsServer):
+    """第一批之后的ESummary请求返回400，模拟流式导出中途的上游错误"""
+
+    def esummary(self, params):
+        if int(params.get("retstart", 0)) > 0:
+            return 400, {"error": "simulated failure"}
+        return super().esummary(params)
+
+
+def test_csv_export_streams_every_record(eutils, client):
+    response = client.get("/api/export_pubmed_search", query_string={"search_strategy": "hta"})
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == "text/csv"
+    assert response.headers["X-Total-Count"] == "1200"
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row["PMID"] for row in rows] == eutils.pmids()
+    assert list(rows[0].keys()) == literature.RESULT_FIELDNAMES
+
+
+def test_csv_chunks_follow_esummary_batches():
+    batches = [[{"PMID": "1"}], [{"PMID": "2"}, {"PMID": "3"}]]
+
+    chunks = list(literature.iter_csv_chunks(iter(batches)))
+
+    assert len(chunks) == 2
+    assert chunks[0].decode("utf-8").startswith("PMID,Title")
+    assert chunks[1].decode("utf-8").count("\n") == 2
+
+
+def test_ndjson_gzip_export_respects_retmax(eutils, client):
+    response = client.post("/api/export_pubmed_search", json={"search_strategy": "hta", "format": "ndjson", "gzip": True, "retmax": 600})
+
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    lines = gzip.decompress(response.get_data()).decode("utf-8").splitlines()
+    assert len(lines) == 600
+    assert json.loads(lines[0])["PMID"] == eutils.pmids()[0]
+
+
+def test_empty_result_exports_header_only(eutils_server, client):
+    eutils_server(0)
+    response = client.get("/api/export_pubmed_search", query_string={"search_strategy": "nothing"})
+
+    assert response.get_data(as_text=True).strip() == ",".join(literature.RESULT_FIELDNAMES)
+
+
+def test_unknown_format_is_rejected(client):
+    response = client.get("/api/export_pubmed_search", query_string={"search_strategy": "hta", "format": "xlsx"})
+
+    assert response.status_code == 400
+
+
+def test_execute_search_can_skip_csv(eutils, client):
+    response = client.post("/api/execute_pubmed_search", json={"search_strategy": "hta", "include_csv": False})
+
+    data = response.get_json()
+    assert data["retrieved_count"] == 100
+    assert data["pubmed_results_csv"] is None
+
+
+@pytest.mark.parametrize("export_format", ["csv", "ndjson"])
+def test_upstream_failure_aborts_stream(eutils_server, client, export_format):
+    eutils_server(1200, FailingEutilsServer)
+    response = client.get("/api/export_pubmed_search", query_string={"search_strategy": "hta", "format": export_format})
+    assert response.status_code == 200
+
+    # 已开始的响应不能正常结束，否则客户端会把截断的文件当作完整结果
+    chunks = []
+    with pytest.raises(Exception):
+        for chunk in response.response:
+            chunks.append(chunk)
+    body = b"".join(chunks).decode("utf-8")
+    if export_format == "ndjson":
+        lines = body.splitlines()
+        assert len(lines) == literature.ESUMMARY_BATCH_SIZE + 1
+        assert "error" in json.loads(lines[-1])
+    else:
+        assert body.count("\n") == literature.ESUMMARY_BATCH_SIZE + 1